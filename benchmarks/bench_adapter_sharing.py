@@ -0,0 +1,58 @@
+# coding: utf-8
+"""
+Compares how many adapters (each one owning a serializer) are built when
+walking a paged response with and without adapter sharing between derived
+clients.
+
+    python -m benchmarks.bench_adapter_sharing
+"""
+
+from __future__ import unicode_literals, print_function
+
+import timeit
+
+from tapioca.adapters import TapiocaAdapter
+
+from benchmarks.stubs import (
+    StubSession, BenchClient, UnsharedBenchClient, list_body)
+
+
+ITEM_COUNT = 10000
+
+
+def walk(client_class, body):
+    client = client_class(session=StubSession(body))
+    response = client.items().get()
+    for item in response().pages():
+        item.name().data
+
+
+def count_adapters(client_class, body):
+    created = [0]
+    original_init = TapiocaAdapter.__init__
+
+    def counting_init(self, *args, **kwargs):
+        created[0] += 1
+        original_init(self, *args, **kwargs)
+
+    TapiocaAdapter.__init__ = counting_init
+    try:
+        walk(client_class, body)
+    finally:
+        TapiocaAdapter.__init__ = original_init
+    return created[0]
+
+
+def main():
+    body = list_body(ITEM_COUNT)
+    for label, client_class in (('shared', BenchClient),
+                                ('unshared', UnsharedBenchClient)):
+        adapters = count_adapters(client_class, body)
+        seconds = min(timeit.repeat(lambda: walk(client_class, body),
+                                    number=1, repeat=5))
+        print('{:<9} adapters={:<7} time={:.4f}s'.format(
+            label, adapters, seconds))
+
+
+if __name__ == '__main__':
+    main()
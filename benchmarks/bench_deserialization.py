@@ -0,0 +1,51 @@
+# coding: utf-8
+"""
+Compares converting a column of timestamps one executor at a time with
+the bulk ``to_datetime(field=...)`` call.
+
+    python -m benchmarks.bench_deserialization
+"""
+
+from __future__ import unicode_literals, print_function
+
+import timeit
+
+from tapioca.adapters import JSONAdapterMixin, TapiocaAdapter, \
+    generate_wrapper_from_adapter
+
+
+ITEM_COUNT = 10000
+
+
+class DeserializationBenchAdapter(JSONAdapterMixin, TapiocaAdapter):
+    api_root = 'https://api.example.org/'
+    resource_mapping = {}
+
+
+DeserializationBenchClient = generate_wrapper_from_adapter(
+    DeserializationBenchAdapter)
+
+
+def per_item(items):
+    return [item.created_at().to_datetime() for item in items]
+
+
+def bulk(items):
+    return items().to_datetime(field='created_at')
+
+
+def main():
+    client = DeserializationBenchClient()
+    items = client._wrap_in_tapioca([{
+        'id': i,
+        'created_at': '2023-01-01T10:%02d:%02d.%06dZ' % (i // 60 % 60, i % 60, i),
+    } for i in range(ITEM_COUNT)])
+
+    assert per_item(items) == bulk(items)
+    for label, convert in (('per item', per_item), ('bulk', bulk)):
+        seconds = min(timeit.repeat(lambda: convert(items), number=1, repeat=5))
+        print('{:<9} {} items: {:.4f}s'.format(label, ITEM_COUNT, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# coding: utf-8
+"""
+Compares the installed JSON codecs decoding and encoding realistic list
+payloads, and JSONAdapterMixin.response_to_native with each codec.
+
+    python -m benchmarks.bench_json_codecs
+"""
+
+from __future__ import unicode_literals, print_function
+
+import importlib
+import json
+import timeit
+
+from tapioca.json_codecs import CODEC_CLASSES, JSONCodec, get_json_codec
+
+from benchmarks.stubs import BenchAdapter, build_response
+
+
+PAYLOAD_SIZES = (100, 10000)
+
+
+def build_payload(item_count):
+    return {
+        'data': [{
+            'id': i,
+            'name': 'User number %d' % i,
+            'email': 'user%d@example.org' % i,
+            'active': i % 3 != 0,
+            'score': i * 1.25,
+            'created_at': '2023-01-%02dT10:00:00+00:00' % (i % 28 + 1),
+            'tags': ['tag-%d' % (i % 7), 'tag-%d' % (i % 11)],
+            'address': {'street': '%d Main Street' % i, 'city': 'Recife',
+                        'zip': '%05d' % i},
+        } for i in range(item_count)],
+        'paging': {'next': 'https://api.example.org/items/?page=2'},
+    }
+
+
+def installed_codecs():
+    for codec_class in CODEC_CLASSES:
+        if codec_class is not JSONCodec:
+            try:
+                importlib.import_module(codec_class.name)
+            except ImportError:
+                continue
+        yield get_json_codec(codec_class.name)
+
+
+def best_of(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main():
+    for item_count in PAYLOAD_SIZES:
+        payload = build_payload(item_count)
+        body = json.dumps(payload).encode('utf-8')
+        number = max(1, 1000 // item_count)
+        print('{} items, {:.1f} KiB'.format(item_count, len(body) / 1024.0))
+
+        response = build_response('https://api.example.org/items/', body)
+        print('  {:<9} {:>12} {:>12} {:>16}'.format(
+            'codec', 'loads', 'dumps', 'response_to_native'))
+        for codec in installed_codecs():
+            adapter = BenchAdapter()
+            adapter.json_codec = codec
+            loads = best_of(lambda: codec.loads(body), number)
+            dumps = best_of(lambda: codec.dumps(payload), number)
+            native = best_of(lambda: adapter.response_to_native(response), number)
+            print('  {:<9} {:>10.3f}ms {:>10.3f}ms {:>14.3f}ms'.format(
+                codec.name, loads * 1000, dumps * 1000, native * 1000))
+
+        response_json = best_of(response.json, number)
+        print('  {:<9} {:>10.3f}ms {:>12} {:>14}'.format(
+            'r.json()', response_json * 1000, '', ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# coding: utf-8
+"""
+Compares walking nested response data through views with wrapping every
+step in a full client, as navigation did before.
+
+    python -m benchmarks.bench_navigation
+"""
+
+from __future__ import unicode_literals, print_function
+
+import timeit
+
+from tapioca.tapioca import TapiocaClient
+
+from benchmarks.stubs import StubSession, UnsharedBenchClient, list_body
+
+
+ITEM_COUNT = 10000
+
+
+def walk(response):
+    data = response.data
+    for index in range(ITEM_COUNT):
+        data[index].name().data
+
+
+def wrap_in_full_client(self, name, data):
+    return self._wrap_in_tapioca(data)
+
+
+def main():
+    client = UnsharedBenchClient(session=StubSession(list_body(ITEM_COUNT)))
+    response = client.items().get()
+
+    seconds = min(timeit.repeat(lambda: walk(response), number=1, repeat=5))
+    print('{:<13} {} items: {:.4f}s'.format('views', ITEM_COUNT, seconds))
+
+    wrap_in_view = TapiocaClient._wrap_in_view
+    TapiocaClient._wrap_in_view = wrap_in_full_client
+    try:
+        seconds = min(timeit.repeat(lambda: walk(response), number=1, repeat=5))
+    finally:
+        TapiocaClient._wrap_in_view = wrap_in_view
+    print('{:<13} {} items: {:.4f}s'.format('full clients', ITEM_COUNT, seconds))
+
+
+if __name__ == '__main__':
+    main()
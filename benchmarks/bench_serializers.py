@@ -0,0 +1,76 @@
+# coding: utf-8
+"""
+Compares SimpleSerializer.serialize with the previous name-based dispatch
+on a bulk request body.
+
+    python -m benchmarks.bench_serializers
+"""
+
+from __future__ import unicode_literals, print_function
+
+import timeit
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from tapioca.serializers import SimpleSerializer
+
+
+ITEM_COUNT = 50000
+
+
+class NameDispatchSerializer(SimpleSerializer):
+    """
+    The dispatch used before the per-class dispatch table.
+    """
+
+    def serialize_dict(self, data):
+        serialized = {}
+
+        for key, value in data.items():
+            serialized[key] = self.serialize(value)
+
+        return serialized
+
+    def serialize_list(self, data):
+        serialized = []
+        for item in data:
+            serialized.append(self.serialize(item))
+
+        return serialized
+
+    def serialize(self, data):
+        data_type = type(data).__name__
+
+        serialize_method = ('serialize_' + data_type).lower()
+        if hasattr(self, serialize_method):
+            return getattr(self, serialize_method)(data)
+
+        return data
+
+
+def build_body(item_count):
+    created_at = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    return [{
+        'id': i,
+        'name': 'Item %d' % i,
+        'active': True,
+        'price': 10.5,
+        'discount': None,
+        'tags': ['a', 'b', 'c'],
+        'dimensions': {'width': 10, 'height': 20, 'depth': 30},
+        'total': Decimal('99.90') if i % 10 == 0 else 99,
+        'created_at': created_at if i % 100 == 0 else '2023-01-01',
+    } for i in range(item_count)]
+
+
+def main():
+    body = build_body(ITEM_COUNT)
+    for label, serializer in (('dispatch table', SimpleSerializer()),
+                              ('name dispatch', NameDispatchSerializer())):
+        seconds = min(timeit.repeat(lambda: serializer.serialize(body),
+                                    number=1, repeat=5))
+        print('{:<15} {} dicts: {:.4f}s'.format(label, ITEM_COUNT, seconds))
+
+
+if __name__ == '__main__':
+    main()
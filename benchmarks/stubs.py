@@ -0,0 +1,107 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import json
+
+import requests
+
+from tapioca.adapters import (
+    TapiocaAdapter, JSONAdapterMixin, XMLAdapterMixin,
+    generate_wrapper_from_adapter)
+
+
+RESOURCE_MAPPING = {
+    'items': {
+        'resource': 'items/',
+        'docs': 'http://www.example.org/items'
+    },
+    'item': {
+        'resource': 'items/{id}/',
+        'docs': 'http://www.example.org/item'
+    },
+}
+
+
+def build_response(url, body, status_code=200,
+                   content_type='application/json'):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response.headers['Content-Type'] = content_type
+    response._content = body
+    response.encoding = 'utf-8'
+    return response
+
+
+class StubSession(object):
+    """
+    Answers every request with a canned body, without touching the network.
+    """
+
+    def __init__(self, body=b'{}', status_code=200,
+                 content_type='application/json'):
+        self.body = body
+        self.status_code = status_code
+        self.content_type = content_type
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        return build_response(url, self.body, self.status_code,
+                              self.content_type)
+
+
+class PagedStubSession(object):
+    """
+    Serves ``page_count`` pages of ``items_per_page`` items, each linking
+    to the next one with ``?page=N``.
+    """
+
+    def __init__(self, page_count, items_per_page):
+        self.page_count = page_count
+        self.pages = [list_body(items_per_page, next_page=page + 1)
+                      for page in range(1, page_count)]
+        self.pages.append(list_body(items_per_page))
+
+    def request(self, method, url, **kwargs):
+        page = url.partition('?page=')[2]
+        return build_response(url, self.pages[int(page or 1) - 1])
+
+
+def list_body(item_count, next_page=None):
+    items = [{'id': i, 'name': 'item %d' % i} for i in range(item_count)]
+    body = {'data': items}
+    if next_page is not None:
+        body['paging'] = {
+            'next': 'https://api.example.org/items/?page=%d' % next_page}
+    return json.dumps(body).encode('utf-8')
+
+
+class BenchAdapter(JSONAdapterMixin, TapiocaAdapter):
+    api_root = 'https://api.example.org'
+    resource_mapping = RESOURCE_MAPPING
+
+    def get_iterator_list(self, response_data):
+        return response_data['data']
+
+    def get_iterator_next_request_kwargs(self, iterator_request_kwargs,
+                                         response_data, response):
+        next_url = response_data.get('paging', {}).get('next')
+        if next_url:
+            return {'url': next_url}
+        return None
+
+
+class UnsharedBenchAdapter(BenchAdapter):
+    share_adapter = False
+
+
+class XMLBenchAdapter(XMLAdapterMixin, TapiocaAdapter):
+    api_root = 'https://api.example.org'
+    resource_mapping = RESOURCE_MAPPING
+
+
+BenchClient = generate_wrapper_from_adapter(BenchAdapter)
+UnsharedBenchClient = generate_wrapper_from_adapter(UnsharedBenchAdapter)
+XMLBenchClient = generate_wrapper_from_adapter(XMLBenchAdapter)
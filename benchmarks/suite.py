@@ -0,0 +1,242 @@
+# coding: utf-8
+"""
+Benchmarks the hot paths of tapioca against stub sessions, without
+network, and compares the results with the stored baseline.
+
+    python -m benchmarks.suite                 # run and compare
+    python -m benchmarks.suite -k decode       # only matching benchmarks
+    python -m benchmarks.suite --save          # store a new baseline
+    python -m benchmarks.suite --check         # exit 1 on regressions
+
+Times are microseconds per call and memory is bytes per item. Baselines
+depend on the machine, so store one before comparing changes.
+"""
+
+from __future__ import unicode_literals, print_function
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from tapioca.serializers import SimpleSerializer
+
+from benchmarks.stubs import (
+    BenchClient, PagedStubSession, StubSession, XMLBenchClient,
+    build_response, list_body)
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_THRESHOLD = 0.25
+
+BENCHMARKS = OrderedDict()
+
+
+def timed(number):
+    """
+    Registers a benchmark whose setup returns the function to time.
+    """
+    def decorator(setup):
+        def run(repeat):
+            function = setup()
+            seconds = min(timeit.repeat(function, number=number, repeat=repeat))
+            return seconds / number * 1e6
+
+        BENCHMARKS[setup.__name__] = (run, 'us')
+        return setup
+    return decorator
+
+
+def memory(count):
+    """
+    Registers a benchmark whose setup returns a function building ``count``
+    objects, measuring the memory they hold.
+    """
+    def decorator(setup):
+        def run(repeat):
+            build = setup()
+            tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                objects = build(count)
+                after = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            del objects
+            return (after - before) / count
+
+        BENCHMARKS[setup.__name__] = (run, 'B')
+        return setup
+    return decorator
+
+
+@timed(number=20000)
+def attribute_resolution():
+    client = BenchClient(session=StubSession())
+    return lambda: client.item
+
+
+@timed(number=20000)
+def data_navigation():
+    client = BenchClient(session=StubSession(b'{"a": {"b": {"c": 1}}}'))
+    response = client.items().get()
+    return lambda: response.a.b.c().data
+
+
+@timed(number=20000)
+def url_templating():
+    client = BenchClient(session=StubSession())
+    return lambda: client.item(id=42)
+
+
+@timed(number=5000)
+def make_request():
+    client = BenchClient(session=StubSession())
+    executor = client.items()
+    return executor.get
+
+
+@timed(number=50)
+def pages_throughput():
+    client = BenchClient(session=PagedStubSession(page_count=10, items_per_page=100))
+
+    def iterate():
+        for item in client.items().get()().pages():
+            pass
+    return iterate
+
+
+@timed(number=50)
+def json_decode():
+    adapter = BenchClient()._api
+    response = build_response('https://api.example.org/items/', list_body(1000))
+    return lambda: adapter.process_response(response)
+
+
+@timed(number=20)
+def xml_decode():
+    adapter = XMLBenchClient()._api
+    items = ''.join('<item><id>{0}</id><name>item {0}</name></item>'.format(i)
+                    for i in range(1000))
+    body = '<data>{}</data>'.format(items).encode('utf-8')
+    response = build_response('https://api.example.org/items/', body,
+                              content_type='application/xml')
+    return lambda: adapter.process_response(response)
+
+
+@timed(number=50)
+def serializer_round_trip():
+    serializer = SimpleSerializer()
+    created_at = datetime(2023, 1, 1, 10, tzinfo=timezone.utc)
+    body = [{'id': i, 'price': Decimal('9.90'), 'created_at': created_at}
+            for i in range(1000)]
+
+    def round_trip():
+        serialized = serializer.serialize(body)
+        serializer.deserialize_many('to_datetime', serialized, field='created_at')
+        serializer.deserialize_many('to_decimal', serialized, field='price')
+    return round_trip
+
+
+@memory(count=10000)
+def memory_per_view():
+    response = BenchClient(session=StubSession(list_body(10000))).items().get()
+    data = response.data
+    return lambda count: [data[index] for index in range(count)]
+
+
+@memory(count=10000)
+def memory_per_client():
+    client = BenchClient(session=StubSession())
+    items = json.loads(list_body(10000))['data']
+    return lambda count: [client._wrap_in_tapioca(items[index])
+                          for index in range(count)]
+
+
+def run(names, repeat):
+    results = OrderedDict()
+    for name in names:
+        function, unit = BENCHMARKS[name]
+        results[name] = {'value': function(repeat), 'unit': unit}
+    return results
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file)['results']
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as baseline_file:
+        json.dump({'python': platform.python_version(),
+                   'machine': platform.machine(),
+                   'results': results}, baseline_file, indent=2)
+        baseline_file.write('\n')
+
+
+def report(results, baseline, threshold):
+    """
+    Prints the results next to the baseline and returns the names of the
+    benchmarks more than ``threshold`` slower or bigger than it.
+    """
+    regressions = []
+    print('{:<24} {:>14} {:>14} {:>9}'.format('benchmark', 'baseline',
+                                              'current', 'change'))
+    for name, result in results.items():
+        current = '{:.2f} {}'.format(result['value'], result['unit'])
+        previous, change = '-', ''
+        if name in baseline:
+            base_value = baseline[name]['value']
+            previous = '{:.2f} {}'.format(base_value, baseline[name]['unit'])
+            ratio = result['value'] / base_value - 1 if base_value else 0
+            change = '{:+.1%}'.format(ratio)
+            if ratio > threshold:
+                change += ' !'
+                regressions.append(name)
+        print('{:<24} {:>14} {:>14} {:>9}'.format(name, previous, current, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-k', dest='pattern', default='*',
+                        help='only run benchmarks matching this glob pattern')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs of each benchmark, the fastest one counts')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true',
+                        help='store the results as the baseline')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with an error when a benchmark regressed')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='relative slowdown considered a regression')
+    args = parser.parse_args(argv)
+
+    pattern = args.pattern if any(c in args.pattern for c in '*?[') \
+        else '*{}*'.format(args.pattern)
+    names = [name for name in BENCHMARKS if fnmatch.fnmatch(name, pattern)]
+    results = run(names, args.repeat)
+
+    baseline = load_baseline(args.baseline)
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        save_baseline(args.baseline, dict(baseline, **results))
+        print('Baseline saved to {}'.format(args.baseline))
+    elif args.check and regressions:
+        print('Regressions: {}'.format(', '.join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,8 +26,13 @@ requirements = [
     'requests[security]>=2.6',
     'arrow>=0.6.0',
     'six>=1',
-    'xmltodict>=0.9.2'
+    'xmltodict>=0.12.0'
 ]
+extras_requirements = {
+    'async': ['httpx>=0.23'],
+    'http2': ['httpx[http2]>=0.23'],
+    'fast-json': ['orjson>=3'],
+}
 test_requirements = [
     'responses>=0.5',
     'mock>=1.3,<1.4'
@@ -61,6 +66,7 @@ setup(
     package_dir={'tapioca': 'tapioca'},
     include_package_data=True,
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="MIT",
     zip_safe=False,
     keywords='tapioca,wrapper,api',
@@ -9,5 +9,6 @@ __version__ = '2.3.0'
 
 from .adapters import (
     generate_wrapper_from_adapter,
+    generate_async_wrapper_from_adapter,
     TapiocaAdapter,
     FormAdapterMixin, JSONAdapterMixin)
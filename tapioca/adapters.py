@@ -1,27 +1,88 @@
 # coding: utf-8
 
-import json
 import xmltodict
 from collections.abc import Mapping
+from contextvars import ContextVar
 
 from .tapioca import TapiocaInstantiator
+from .aio import AsyncTapiocaInstantiator
 from .exceptions import (
     ResponseProcessException, ClientError, ServerError)
 from .serializers import SimpleSerializer
+from .json_codecs import get_json_codec
+from .streaming import JSONItemStream, XMLItemStream
+from .urls import compile_url_template
+
+
+# xmltodict kwargs of the request being made, kept per thread and asyncio
+# task so the adapter can be shared
+_xmltodict_unparse_kwargs = ContextVar('xmltodict_unparse_kwargs', default={})
+_xmltodict_parse_kwargs = ContextVar('xmltodict_parse_kwargs', default={})
 
 
 def generate_wrapper_from_adapter(adapter_class):
     return TapiocaInstantiator(adapter_class)
 
 
+def generate_async_wrapper_from_adapter(adapter_class):
+    return AsyncTapiocaInstantiator(adapter_class)
+
+
 class TapiocaAdapter(object):
     serializer_class = SimpleSerializer
+    # derived clients reuse this instance instead of building a new one.
+    # Set to False if the adapter keeps per-request state on ``self``.
+    share_adapter = True
+    # size of the chunks read from streamed responses
+    stream_chunk_size = 64 * 1024
+    # resource URLs are resolved once per name and api_params, and again
+    # when api_params change or authentication is refreshed. Set to False if
+    # get_api_root or get_resource_mapping depend on anything else.
+    cache_resources = True
+    max_cached_resources = 1024
+    # percent-encode the values filled in resource URL templates
+    quote_url_params = False
+    # seconds before the expiration reported by
+    # get_authentication_expiration in which authentication is refreshed
+    authentication_refresh_margin = 60
+    # transports built for instances which are not given a ``session``,
+    # ``None`` uses a requests.Session and an httpx.AsyncClient
+    transport_class = None
+    async_transport_class = None
 
     def __init__(self, serializer_class=None, *args, **kwargs):
         if serializer_class:
             self.serializer = serializer_class()
         else:
             self.serializer = self.get_serializer()
+        self._resolved_resources = {}
+
+    def _resolve_resource(self, name, api_params):
+        key = (name, id(api_params))
+        cached = self._resolved_resources.get(key)
+        # the params are kept in the entry as ids can be reused, with a copy
+        # to notice them being changed in place
+        if (cached is not None and cached[0] is api_params and
+                cached[1] == api_params):
+            return cached[2]
+
+        resolved = None
+        resource_mapping = self.get_resource_mapping(api_params)
+        if name in resource_mapping:
+            resource = resource_mapping[name]
+            api_root = self.get_api_root(api_params, resource_name=name)
+            url = api_root.rstrip('/') + '/' + resource['resource'].lstrip('/')
+            resolved = (url, resource)
+
+        if self.cache_resources:
+            if len(self._resolved_resources) >= self.max_cached_resources:
+                self._resolved_resources.clear()
+            self._resolved_resources[key] = (api_params, dict(api_params),
+                                             resolved)
+        return resolved
+
+    def _clear_resolved_resources(self):
+        self._resolved_resources.clear()
 
     def _get_to_native_method(self, method_name, value):
         if not self.serializer:
@@ -32,7 +93,11 @@ class TapiocaAdapter(object):
 
         return to_native_wrapper
 
-    def _value_to_native(self, method_name, value, **kwargs):
+    def _value_to_native(self, method_name, value, many=False, field=None,
+                         **kwargs):
+        if many or field is not None:
+            return self.serializer.deserialize_many(method_name, value,
+                                                    field=field, **kwargs)
         return self.serializer.deserialize(method_name, value, **kwargs)
 
     def get_serializer(self):
@@ -46,7 +111,8 @@ class TapiocaAdapter(object):
         return self.resource_mapping
 
     def fill_resource_template_url(self, template, params):
-        return template.format(**params)
+        return compile_url_template(template).fill(
+            params, quote_params=self.quote_url_params)
 
     def get_request_kwargs(self, api_params, *args, **kwargs):
         serialized = self.serialize_data(kwargs.get('data'))
@@ -70,6 +136,12 @@ class TapiocaAdapter(object):
 
         return data
 
+    def process_stream_response(self, response):
+        if response.status_code >= 400:
+            return self.process_response(response)
+
+        return self.response_to_stream(response)
+
     def serialize_data(self, data):
         if self.serializer:
             return self.serializer.serialize(data)
@@ -82,19 +154,35 @@ class TapiocaAdapter(object):
     def response_to_native(self, response):
         raise NotImplementedError()
 
+    def response_to_stream(self, response):
+        raise NotImplementedError()
+
     def get_iterator_list(self, response_data):
         raise NotImplementedError()
 
+    def get_iterator_stream_path(self, response):
+        raise NotImplementedError()
+
     def get_iterator_next_request_kwargs(self, iterator_request_kwargs,
                                          response_data, response):
         raise NotImplementedError()
 
+    def get_iterator_total_pages(self, response_data, response):
+        raise NotImplementedError()
+
+    def get_iterator_page_request_kwargs(self, iterator_request_kwargs,
+                                         response_data, response, page_index):
+        raise NotImplementedError()
+
     def is_authentication_expired(self, exception, *args, **kwargs):
         return False
 
     def refresh_authentication(self, api_params, *args, **kwargs):
         raise NotImplementedError()
 
+    def get_authentication_expiration(self, api_params):
+        return None
+
 
 class FormAdapterMixin(object):
 
@@ -106,6 +194,12 @@ class FormAdapterMixin(object):
 
 
 class JSONAdapterMixin(object):
+    # a codec object or the name of a JSON library ('json', 'orjson',
+    # 'simdjson' or 'ujson'), 'auto' uses the fastest installed one
+    json_codec = 'json'
+
+    def get_json_codec(self):
+        return get_json_codec(self.json_codec)
 
     def get_request_kwargs(self, api_params, *args, **kwargs):
         arguments = super(JSONAdapterMixin, self).get_request_kwargs(
@@ -118,15 +212,20 @@ class JSONAdapterMixin(object):
 
     def format_data_to_request(self, data):
         if data:
-            return json.dumps(data)
+            return self.get_json_codec().dumps(data)
 
     def response_to_native(self, response):
         if response.content.strip():
-            return response.json()
+            return self.get_json_codec().loads(response.content)
+
+    def response_to_stream(self, response):
+        return JSONItemStream(response, self.get_iterator_stream_path(response),
+                              codec=self.get_json_codec(),
+                              chunk_size=self.stream_chunk_size)
 
     def get_error_message(self, data, response=None):
         if not data and response.content.strip():
-            data = json.loads(response.content.decode('utf-8'))
+            data = self.get_json_codec().loads(response.content)
 
         if data:
             return data.get('error', None)
@@ -137,7 +236,7 @@ class XMLAdapterMixin(object):
     def _input_branches_to_xml_bytestring(self, data):
         if isinstance(data, Mapping):
             return xmltodict.unparse(
-                data, **self._xmltodict_unparse_kwargs).encode('utf-8')
+                data, **_xmltodict_unparse_kwargs.get()).encode('utf-8')
         try:
             return data.encode('utf-8')
         except Exception as e:
@@ -146,13 +245,13 @@ class XMLAdapterMixin(object):
 
     def get_request_kwargs(self, api_params, *args, **kwargs):
         # stores kwargs prefixed with 'xmltodict_unparse__' for use by xmltodict.unparse
-        self._xmltodict_unparse_kwargs = {k[len('xmltodict_unparse__'):]: kwargs.pop(k)
-                                          for k in kwargs.copy().keys()
-                                          if k.startswith('xmltodict_unparse__')}
+        _xmltodict_unparse_kwargs.set({k[len('xmltodict_unparse__'):]: kwargs.pop(k)
+                                       for k in kwargs.copy().keys()
+                                       if k.startswith('xmltodict_unparse__')})
         # stores kwargs prefixed with 'xmltodict_parse__' for use by xmltodict.parse
-        self._xmltodict_parse_kwargs = {k[len('xmltodict_parse__'):]: kwargs.pop(k)
-                                        for k in kwargs.copy().keys()
-                                        if k.startswith('xmltodict_parse__')}
+        _xmltodict_parse_kwargs.set({k[len('xmltodict_parse__'):]: kwargs.pop(k)
+                                     for k in kwargs.copy().keys()
+                                     if k.startswith('xmltodict_parse__')})
 
         arguments = super(XMLAdapterMixin, self).get_request_kwargs(
             api_params, *args, **kwargs)
@@ -166,8 +265,16 @@ class XMLAdapterMixin(object):
         if data:
             return self._input_branches_to_xml_bytestring(data)
 
+    def response_to_stream(self, response):
+        if 'xml' not in response.headers['content-type']:
+            return self.response_to_native(response)
+
+        return XMLItemStream(response, self.get_iterator_stream_path(response),
+                             parse_kwargs=_xmltodict_parse_kwargs.get(),
+                             chunk_size=self.stream_chunk_size)
+
     def response_to_native(self, response):
         if response.content.strip():
             if 'xml' in response.headers['content-type']:
-                return xmltodict.parse(response.content, **self._xmltodict_parse_kwargs)
+                return xmltodict.parse(response.content, **_xmltodict_parse_kwargs.get())
             return {'text': response.text}
@@ -0,0 +1,288 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import asyncio
+from collections import deque
+
+from .exceptions import ResponseProcessException
+from .streaming import ItemStream
+from .tapioca import (
+    BATCH_EXCEPTIONS, TapiocaInstantiator, TapiocaClient, TapiocaClientExecutor)
+from .transports import HTTPXAsyncTransport, get_async_transport
+
+
+class AsyncTapiocaInstantiator(TapiocaInstantiator):
+
+    def _get_session(self, adapter, api_params, share_session,
+                     transport_class=None, **pool_options):
+        if share_session:
+            raise ValueError("share_session is not supported by async clients")
+        transport_class = transport_class or HTTPXAsyncTransport
+        return transport_class.from_pool_options(**pool_options)
+
+    def _get_transport(self, session):
+        return get_async_transport(session)
+
+    def _get_transport_class(self, adapter):
+        return adapter.async_transport_class
+
+    def _get_client_class(self):
+        return AsyncTapiocaClient
+
+
+class AsyncTapiocaClient(TapiocaClient):
+
+    def _get_default_session(self):
+        return get_async_transport(None)
+
+    def _wrap_in_tapioca(self, data, *args, **kwargs):
+        return self._wrap_in(AsyncTapiocaClient, data, *args, **kwargs)
+
+    def _wrap_in_tapioca_executor(self, data, *args, **kwargs):
+        return self._wrap_in(AsyncTapiocaClientExecutor, data, *args, **kwargs)
+
+
+class AsyncTapiocaClientExecutor(AsyncTapiocaClient, TapiocaClientExecutor):
+
+    async def _refresh_authentication(self, auth_generation, event=None,
+                                      emit=True):
+        if event is not None:
+            event.timings.start('auth_refresh')
+        refresh_data = await self._auth_refresh.refresh_async(
+            auth_generation,
+            lambda: self._api.refresh_authentication(self._api_params))
+        self._authentication_refreshed(refresh_data, event, emit)
+        return refresh_data
+
+    async def _close_response(self, response):
+        aclose = getattr(response, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+        else:
+            response.close()
+
+    async def _send_request(self, request_method, request_kwargs, event):
+        retry_policy = self._get_resource_option('retry', self._retry)
+        rate_limiter = self._get_resource_option('rate_limiter', self._rate_limiter)
+        retries = 0
+
+        while True:
+            if rate_limiter is not None:
+                await rate_limiter.acquire_async()
+
+            try:
+                response = await self._session.request(request_method, **request_kwargs)
+            except Exception as exception:
+                delay = self._get_retry_delay(retry_policy, request_method,
+                                              retries, event, exception=exception)
+                if delay is None:
+                    raise
+            else:
+                if rate_limiter is not None:
+                    rate_limiter.update(response)
+                delay = self._get_retry_delay(retry_policy, request_method,
+                                              retries, event, response=response)
+                if delay is None:
+                    return response, retries
+                await self._close_response(response)
+
+            await asyncio.sleep(delay)
+            retries += 1
+
+    async def _make_request(self, request_method, refresh_token=None, *args, **kwargs):
+        event = self._start_request(request_method, kwargs)
+
+        auth_generation = self._auth_refresh.generation
+        auth_refreshed = False
+        if self._authentication_expires_soon(refresh_token):
+            try:
+                self._refresh_data = await self._refresh_authentication(
+                    auth_generation, event, emit=False)
+                auth_refreshed = True
+            except Exception:
+                if not self._can_use_current_authentication(event):
+                    raise
+            auth_generation = self._auth_refresh.generation
+
+        request_kwargs, cache_key, cache_entry, client = self._prepare_request(
+            request_method, event, args, kwargs, auth_refreshed)
+        if client is not None:
+            return client
+
+        response, retries = None, 0
+        try:
+            with self._guard_circuit():
+                event.timings.start('network')
+                response, retries = await self._send_request(request_method,
+                                                             request_kwargs, event)
+                event.timings.stop('network')
+                data, client_response = self._process_response(
+                    request_kwargs, event, response, cache_key, cache_entry)
+        except ResponseProcessException as e:
+            tapioca_exception = self._get_tapioca_exception(
+                e, response, request_kwargs, retries=retries,
+                timings=event.timings)
+
+            should_refresh = self._should_refresh_authentication(
+                refresh_token, tapioca_exception)
+            if should_refresh:
+                self._refresh_data = await self._refresh_authentication(
+                    auth_generation, event)
+
+            self._emit_response('on_error', event, response, request_kwargs,
+                                retries, exception=tapioca_exception)
+            if not (should_refresh and self._refresh_data):
+                raise tapioca_exception
+
+            event.timings.start('replay')
+            client = await self._make_request(request_method,
+                                              refresh_token=False, *args, **kwargs)
+            return self._set_replay_timings(event.timings, client)
+        except Exception as e:
+            self._emit_response('on_error', event, response, request_kwargs,
+                                event.retries, exception=e)
+            raise
+
+        return self._finish_request(request_method, request_kwargs, event,
+                                    response, retries, cache_key, data,
+                                    client_response)
+
+    async def batch(self, executors, method='get', concurrency=32, **kwargs):
+        """
+        Performs ``method`` on every executor with at most ``concurrency``
+        requests in flight. Items may also be ``(executor, kwargs)`` pairs to
+        pass per-request kwargs. Returns, in input order, the response clients
+        or the ``TapiocaException``, connection error or timeout raised by each
+        request.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def execute(item):
+            request, request_kwargs = self._get_batch_request(item, method,
+                                                              kwargs)
+            async with semaphore:
+                try:
+                    return await request(**request_kwargs)
+                except BATCH_EXCEPTIONS as e:
+                    return e
+
+        return await asyncio.gather(*[execute(item) for item in executors])
+
+    async def _page_executors(self, max_pages=None):
+        executor = self
+        page_count = 1
+        yield executor
+
+        while max_pages is None or page_count < max_pages:
+            next_request_kwargs = executor._get_next_page_request_kwargs()
+            if not next_request_kwargs:
+                break
+
+            response = await self.get(**next_request_kwargs)
+            executor = response()
+            page_count += 1
+            yield executor
+
+    async def _prefetched_page_executors(self, prefetch, max_pages=None):
+        fetched = asyncio.Queue(maxsize=prefetch)
+
+        async def fetch_pages():
+            page_executors = self._page_executors(max_pages=max_pages)
+            try:
+                await page_executors.__anext__()  # the first page is already fetched
+                async for executor in page_executors:
+                    await fetched.put((executor, None))
+            except Exception as e:
+                await fetched.put((None, e))
+            finally:
+                await page_executors.aclose()
+            await fetched.put((None, None))
+
+        worker = asyncio.ensure_future(fetch_pages())
+
+        try:
+            yield self
+            while True:
+                executor, exception = await fetched.get()
+                if exception is not None:
+                    raise exception
+                if executor is None:
+                    break
+                yield executor
+        finally:
+            # unlike threads, a request in flight can be cancelled
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+
+    async def _fetch_page(self, page_index):
+        response = await self.get(**self._get_iterator_page_request_kwargs(page_index))
+        return response()
+
+    async def _parallel_page_executors(self, parallel, max_pages=None, ordered=True):
+        total_pages = self._get_iterator_total_pages() or 1
+        if max_pages is not None:
+            total_pages = min(total_pages, max_pages)
+
+        yield self
+
+        remaining = iter(range(1, total_pages))
+        # at most ``parallel`` fetched or in flight pages are kept around
+        pending = deque()
+
+        def submit_next():
+            page_index = next(remaining, None)
+            if page_index is not None:
+                pending.append(asyncio.ensure_future(self._fetch_page(page_index)))
+
+        try:
+            for _ in range(parallel):
+                submit_next()
+
+            while pending:
+                if ordered:
+                    task = pending.popleft()
+                else:
+                    done, _ = await asyncio.wait(pending,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    task = done.pop()
+                    pending.remove(task)
+
+                executor = await task
+                submit_next()
+                yield executor
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def pages(self, max_pages=None, max_items=None, prefetch=0, parallel=0,
+                    ordered=True, **kwargs):
+        page_executors = self._get_page_executors(max_pages, prefetch, parallel,
+                                                  ordered)
+        page_count = 0
+        item_count = 0
+        executor = None
+
+        try:
+            async for executor in page_executors:
+                iterator_list = executor._get_iterator_list()
+                if not iterator_list:
+                    break
+
+                for item in iterator_list:
+                    if self._reached_max_limits(page_count, item_count,
+                                                max_pages, max_items):
+                        break
+                    yield self._wrap_in_tapioca(item)
+                    item_count += 1
+
+                page_count += 1
+
+                if self._reached_max_limits(page_count, item_count, max_pages,
+                                            max_items):
+                    break
+        finally:
+            await page_executors.aclose()
+            if executor is not None and isinstance(executor._data, ItemStream):
+                executor._data.close()
@@ -0,0 +1,63 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import asyncio
+import inspect
+import threading
+
+
+class SingleFlightRefresh(object):
+    """
+    Serializes the authentication refreshes of clients sharing the same
+    ``api_params``. Requests take the current ``generation`` before being
+    sent; when they fail with expired authentication, only the first one to
+    call ``refresh`` with that generation runs the refresh, while the others
+    wait for it and get its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._async_lock = None
+        self.generation = 0
+        self.result = None
+
+    def refresh(self, generation, refresh_authentication):
+        with self._lock:
+            if generation == self.generation:
+                try:
+                    self.result = refresh_authentication()
+                except Exception:
+                    self.result = None
+                    raise
+                finally:
+                    self.generation += 1
+            return self.result
+
+    async def refresh_async(self, generation, refresh_authentication):
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+
+        async with self._async_lock:
+            if generation == self.generation:
+                try:
+                    result = refresh_authentication()
+                    if inspect.isawaitable(result):
+                        result = await result
+                    self.result = result
+                except Exception:
+                    self.result = None
+                    raise
+                finally:
+                    self.generation += 1
+            return self.result
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_async_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
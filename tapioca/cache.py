@@ -0,0 +1,295 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from requests.models import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+
+
+CACHEABLE_METHODS = ('GET', 'HEAD')
+CACHEABLE_STATUS_CODES = (200, 203)
+# request headers identifying who a request is made for
+CREDENTIAL_HEADERS = ('authorization', 'proxy-authorization', 'cookie')
+
+
+class CacheEntry(object):
+    """
+    A cached response together with its already decoded native data.
+    ``vary`` maps the request headers named in the response ``Vary`` header
+    to the values they had in the request.
+    """
+
+    vary = None
+
+    def __init__(self, data, response, expires_at=0, etag=None,
+                 last_modified=None, vary=None):
+        self.data = data
+        self.response = response
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+        self.vary = vary
+
+    def is_fresh(self, now=None):
+        return (now or time.time()) < self.expires_at
+
+    def matches(self, request_headers):
+        """
+        Tells whether the entry was stored for a request with the same
+        values in the headers its response varies on.
+        """
+        if not self.vary:
+            return True
+        request_headers = CaseInsensitiveDict(request_headers or {})
+        return all(request_headers.get(name) == value
+                   for name, value in self.vary.items())
+
+    def can_revalidate(self):
+        return bool(self.etag or self.last_modified)
+
+    def get_conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class BaseCache(object):
+
+    def get(self, key):
+        raise NotImplementedError()
+
+    def set(self, key, entry):
+        raise NotImplementedError()
+
+    def delete(self, key):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class MemoryCache(BaseCache):
+    """
+    Thread-safe in-memory cache discarding the least recently used entries
+    once ``maxsize`` is reached. Like with ``FileCache``, every hit gets its
+    own copy of the cached data: it is kept pickled, which is much faster
+    to load than decoding the response again.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                return None
+            self._entries.move_to_end(key)
+
+        entry, pickled_data = stored
+        entry = copy.copy(entry)
+        entry.data = pickle.loads(pickled_data)
+        return entry
+
+    def set(self, key, entry):
+        pickled_data = pickle.dumps(entry.data, pickle.HIGHEST_PROTOCOL)
+        entry = copy.copy(entry)
+        entry.data = None
+        stored = (entry, pickled_data)
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileCache(BaseCache):
+    """
+    Stores pickled entries in ``directory``, one file per key.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_path(self, key):
+        filename = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, filename)
+
+    def get(self, key):
+        try:
+            with open(self._get_path(key), 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def set(self, key, entry):
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(file_descriptor, 'wb') as cache_file:
+            pickle.dump(entry, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self._get_path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._get_path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for filename in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, filename))
+
+
+def _serialize_credential(value):
+    if hasattr(value, '__dict__'):
+        return [type(value).__name__, vars(value)]
+    return repr(value)
+
+
+def get_cache_namespace(request_kwargs, api_params=None):
+    """
+    Returns a hash of the credential headers and ``auth`` of a request and
+    of the ``api_params`` of its wrapper, so requests made with different
+    credentials never share cached responses.
+    """
+    headers = request_kwargs.get('headers') or {}
+    credentials = {
+        'headers': sorted((name.lower(), value) for name, value in headers.items()
+                          if name.lower() in CREDENTIAL_HEADERS),
+        'auth': request_kwargs.get('auth'),
+        'api_params': api_params,
+    }
+    try:
+        serialized = json.dumps(credentials, sort_keys=True,
+                                default=_serialize_credential)
+    except (TypeError, ValueError):
+        serialized = repr(credentials)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:32]
+
+
+def get_cache_key(request_method, request_kwargs, api_params=None):
+    if request_method.upper() not in CACHEABLE_METHODS:
+        return None
+
+    params = request_kwargs.get('params')
+    if isinstance(params, dict):
+        params = sorted(params.items())
+
+    request = PreparedRequest()
+    request.prepare_url(request_kwargs['url'], params)
+    return '{} {} {}'.format(get_cache_namespace(request_kwargs, api_params),
+                             request_method.upper(), request.url)
+
+
+def get_vary_headers(response, request_headers):
+    """
+    Returns the request headers ``response`` varies on with their values,
+    or ``None`` if it varies on everything and can not be reused.
+    """
+    names = [name.strip().lower()
+             for name in response.headers.get('Vary', '').split(',')
+             if name.strip()]
+    if '*' in names:
+        return None
+    request_headers = CaseInsensitiveDict(request_headers or {})
+    return {name: request_headers.get(name) for name in names}
+
+
+def parse_cache_control(header):
+    directives = {}
+    for directive in header.split(','):
+        name, _, value = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+def get_expiration_time(response, now=None):
+    """
+    Returns when ``response`` stops being fresh, following its
+    ``Cache-Control`` and ``Expires`` headers, or ``None`` if it must not
+    be stored.
+    """
+    now = now or time.time()
+    cache_control = parse_cache_control(response.headers.get('Cache-Control', ''))
+
+    if 'no-store' in cache_control:
+        return None
+    if 'no-cache' in cache_control:
+        return now
+
+    if 'max-age' in cache_control:
+        try:
+            max_age = int(cache_control['max-age'])
+            age = int(response.headers.get('Age', 0))
+        except ValueError:
+            return now
+        return now + max_age - age
+
+    expires = response.headers.get('Expires')
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            return now
+
+    return now
+
+
+def build_cache_entry(data, response, now=None, request_headers=None):
+    if response.status_code not in CACHEABLE_STATUS_CODES:
+        return None
+
+    expires_at = get_expiration_time(response, now=now)
+    if expires_at is None:
+        return None
+
+    vary = get_vary_headers(response, request_headers)
+    if vary is None:
+        return None
+
+    entry = CacheEntry(data, response, expires_at=expires_at,
+                       etag=response.headers.get('ETag'),
+                       last_modified=response.headers.get('Last-Modified'),
+                       vary=vary)
+
+    if not entry.is_fresh(now=now) and not entry.can_revalidate():
+        return None
+    return entry
+
+
+def refresh_cache_entry(entry, response, now=None):
+    """
+    Returns a copy of ``entry`` with its freshness updated from a
+    ``304 Not Modified`` response.
+    """
+    return CacheEntry(entry.data, entry.response,
+                      expires_at=get_expiration_time(response, now=now) or 0,
+                      etag=response.headers.get('ETag', entry.etag),
+                      last_modified=response.headers.get('Last-Modified',
+                                                         entry.last_modified),
+                      vary=entry.vary)
@@ -0,0 +1,126 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import threading
+import time
+from contextlib import contextmanager
+
+from .exceptions import CircuitOpenError, ResponseProcessException, ServerError
+from .retry import RETRY_EXCEPTIONS
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class _Circuit(object):
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_calls = 0
+
+
+class CircuitBreaker(object):
+    """
+    Stops calling an API root after ``failure_threshold`` consecutive
+    failures, raising ``CircuitOpenError`` instead. Failures are server
+    errors and the connection errors and timeouts in ``exceptions``.
+
+    After ``recovery_timeout`` seconds the circuit is half open and lets
+    ``half_open_max_calls`` requests through: it closes again if they
+    succeed and opens for another ``recovery_timeout`` if one fails.
+    """
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30,
+                 half_open_max_calls=1, exceptions=RETRY_EXCEPTIONS):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.exceptions = tuple(exceptions)
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def get_state(self, key):
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return CLOSED
+            self._update_state(circuit)
+            return circuit.state
+
+    def _update_state(self, circuit):
+        if (circuit.state == OPEN and
+                time.monotonic() - circuit.opened_at >= self.recovery_timeout):
+            circuit.state = HALF_OPEN
+            circuit.trial_calls = 0
+
+    def before_request(self, key):
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            self._update_state(circuit)
+
+            if circuit.state == OPEN or (
+                    circuit.state == HALF_OPEN and
+                    circuit.trial_calls >= self.half_open_max_calls):
+                raise CircuitOpenError("Circuit open for {}".format(key))
+            if circuit.state == HALF_OPEN:
+                circuit.trial_calls += 1
+
+    def is_failure(self, exception):
+        if isinstance(exception, ResponseProcessException):
+            return issubclass(exception.tapioca_exception, ServerError)
+        return isinstance(exception, self.exceptions)
+
+    def record(self, key, exception=None):
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            if circuit.state == HALF_OPEN:
+                circuit.trial_calls -= 1
+
+            if exception is None or not self.is_failure(exception):
+                circuit.state = CLOSED
+                circuit.failures = 0
+                return
+
+            circuit.failures += 1
+            if (circuit.state == HALF_OPEN or
+                    circuit.failures >= self.failure_threshold):
+                circuit.state = OPEN
+                circuit.opened_at = time.monotonic()
+
+    def release(self, key):
+        """
+        Gives back the trial call of a request which ended without a result,
+        e.g. because it was cancelled, counting neither a success nor a
+        failure.
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None and circuit.state == HALF_OPEN:
+                circuit.trial_calls -= 1
+
+    @contextmanager
+    def guard(self, key):
+        self.before_request(key)
+        try:
+            yield
+        except Exception as exception:
+            self.record(key, exception)
+            raise
+        except BaseException:
+            self.release(key)
+            raise
+        self.record(key)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -30,3 +30,9 @@ class ServerError(TapiocaException):
 
     def __init__(self, message='', client=None):
         super(ServerError, self).__init__(message, client=client)
+
+
+class CircuitOpenError(TapiocaException):
+
+    def __init__(self, message='', client=None):
+        super(CircuitOpenError, self).__init__(message, client=client)
@@ -0,0 +1,128 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import time
+
+
+EVENTS = ('before_request', 'after_response', 'on_error', 'on_retry',
+          'on_auth_refresh')
+
+
+class RequestTimings(object):
+    """
+    Monotonic start and end times, in seconds, of the phases of a request:
+    ``serialize``, ``network``, ``decode``, ``wrap``, and ``auth_refresh``
+    and ``replay`` when authentication is refreshed. The timings of the
+    replayed request are in ``replay``.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.replay = None
+
+    def __repr__(self):
+        return '<{} {}>'.format(self.__class__.__name__, ' '.join(
+            '{}={:.6f}'.format(phase, duration)
+            for phase, duration in self.durations.items()))
+
+    def start(self, phase):
+        self.phases[phase] = (time.monotonic(), None)
+
+    def stop(self, phase):
+        self.phases[phase] = (self.phases[phase][0], time.monotonic())
+
+    def finish(self):
+        """
+        Stops the phases still running, e.g. when the request failed.
+        """
+        now = time.monotonic()
+        for phase, (started_at, ended_at) in list(self.phases.items()):
+            if ended_at is None:
+                self.phases[phase] = (started_at, now)
+
+    def get_duration(self, phase):
+        started_at, ended_at = self.phases.get(phase, (None, None))
+        if ended_at is None:
+            return None
+        return ended_at - started_at
+
+    @property
+    def durations(self):
+        return {phase: ended_at - started_at
+                for phase, (started_at, ended_at) in self.phases.items()
+                if ended_at is not None}
+
+
+class RequestEvent(object):
+    """
+    Passed to every hook of a request, updated as it progresses. The same
+    object is given to the ``before_request`` hooks and to the
+    ``after_response`` or ``on_error`` hooks ending the request. ``cached``
+    is true when the response data comes from the cache, either without
+    sending the request or after the server answered ``304 Not Modified``.
+    """
+
+    def __init__(self, resource_name, method, url, timings):
+        self.resource_name = resource_name
+        self.method = method
+        self.url = url
+        self.timings = timings
+        self.status_code = None
+        self.request_bytes = None
+        self.response_bytes = None
+        self.retries = 0
+        self.retry_delay = None
+        self.exception = None
+        self.refresh_data = None
+        self.cached = False
+
+    def __repr__(self):
+        return '<{} {} {} {}>'.format(self.__class__.__name__, self.method,
+                                      self.url, self.status_code)
+
+
+class Hooks(object):
+    """
+    Callbacks called with a ``RequestEvent`` on request events:
+
+    - ``before_request``: the request is about to be sent, or answered from
+      the cache if ``cached`` is set.
+    - ``after_response``: the response was processed successfully.
+    - ``on_error``: the request raised an exception, set as ``exception``.
+    - ``on_retry``: the request is retried after ``retry_delay`` seconds.
+    - ``on_auth_refresh``: authentication was refreshed before the request
+      was sent or replayed.
+
+    Collectors are objects with methods named after the events they handle.
+    """
+
+    def __init__(self, collectors=(), **callbacks):
+        self._callbacks = {event_name: [] for event_name in EVENTS}
+        for collector in collectors:
+            self.add_collector(collector)
+        for event_name, callback in callbacks.items():
+            self.register(event_name, callback)
+
+    def register(self, event_name, callback):
+        if event_name not in self._callbacks:
+            raise ValueError("Unknown event: {}".format(event_name))
+        self._callbacks[event_name].append(callback)
+
+    def add_collector(self, collector):
+        for event_name in EVENTS:
+            callback = getattr(collector, event_name, None)
+            if callback is not None:
+                self.register(event_name, callback)
+
+    def emit(self, event_name, event):
+        for callback in self._callbacks[event_name]:
+            callback(event)
+
+
+def get_body_size(body):
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return None
@@ -0,0 +1,93 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import importlib
+import json
+
+
+class JSONCodec(object):
+    """
+    Encodes and decodes JSON with the standard library. ``loads`` accepts
+    the raw response bytes, skipping the text decoding step.
+    """
+    name = 'json'
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, data):
+        return json.dumps(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        self._orjson = importlib.import_module('orjson')
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+    def dumps(self, data):
+        return self._orjson.dumps(data, option=self._orjson.OPT_NON_STR_KEYS)
+
+
+class UjsonCodec(JSONCodec):
+    name = 'ujson'
+
+    def __init__(self):
+        self._ujson = importlib.import_module('ujson')
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+    def dumps(self, data):
+        return self._ujson.dumps(data, escape_forward_slashes=False)
+
+
+class SimdjsonCodec(JSONCodec):
+    name = 'simdjson'
+
+    def __init__(self):
+        self._simdjson = importlib.import_module('simdjson')
+
+    def loads(self, data):
+        return self._simdjson.loads(data)
+
+    def dumps(self, data):
+        return self._simdjson.dumps(data)
+
+
+CODEC_CLASSES = (OrjsonCodec, SimdjsonCodec, UjsonCodec, JSONCodec)
+
+_codecs = {}
+
+
+def get_json_codec(codec='json'):
+    """
+    Returns a codec instance given a codec object or a library name.
+    ``'auto'`` picks the fastest installed library and ``None`` the
+    standard library.
+    """
+    if codec is None:
+        codec = 'json'
+    elif not isinstance(codec, str):
+        return codec
+
+    if codec not in _codecs:
+        _codecs[codec] = _build_codec(codec)
+    return _codecs[codec]
+
+
+def _build_codec(name):
+    for codec_class in CODEC_CLASSES:
+        if name != 'auto' and codec_class.name != name:
+            continue
+        try:
+            return codec_class()
+        except ImportError:
+            if name != 'auto':
+                raise
+
+    raise ValueError("Unknown JSON codec: {}".format(name))
@@ -0,0 +1,225 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import bisect
+import threading
+import time
+
+
+# seconds; byte counts use the same buckets scaled by BYTES_BUCKET_SCALE
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5,
+                   5, 10)
+BYTES_BUCKET_SCALE = 1024 * 1024
+
+PHASES = ('serialize', 'network', 'decode', 'wrap')
+
+
+class Histogram(object):
+    """
+    Counts observed values into cumulative-friendly buckets: ``counts[i]``
+    is the number of values up to ``buckets[i]``, and the last count holds
+    the values above every bucket.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def get_percentile(self, percentile):
+        """
+        Returns the upper bound of the bucket holding the given percentile
+        (0 to 100), or ``None`` if it is above every bucket.
+        """
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return None
+
+        threshold = count * percentile / 100.0
+        accumulated = 0
+        for bucket, bucket_count in zip(self.buckets, counts):
+            accumulated += bucket_count
+            if accumulated >= threshold:
+                return bucket
+        return None
+
+
+class HistogramRegistry(object):
+    """
+    Hooks collector keeping histograms of the ``duration`` of requests, of
+    their ``serialize``, ``network``, ``decode`` and ``wrap`` phases and of
+    their ``request_bytes`` and ``response_bytes``, per resource name, method
+    and status code. ``get`` returns ``None`` for histograms without values.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, resource_name=None, method=None, status_code=None):
+        return self._histograms.get((name, resource_name, method, status_code))
+
+    def get_or_create(self, name, resource_name=None, method=None,
+                      status_code=None):
+        key = (name, resource_name, method, status_code)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    buckets = self.buckets
+                    if name.endswith('_bytes'):
+                        buckets = [bucket * BYTES_BUCKET_SCALE for bucket in buckets]
+                    histogram = self._histograms[key] = Histogram(buckets)
+        return histogram
+
+    def __iter__(self):
+        return iter(list(self._histograms.items()))
+
+    def _observe(self, event):
+        labels = (event.resource_name, event.method, event.status_code)
+        durations = event.timings.durations
+
+        total = sum(durations.get(phase, 0) for phase in PHASES)
+        self.get_or_create('duration', *labels).observe(total)
+        for phase in PHASES:
+            if phase in durations:
+                self.get_or_create(phase, *labels).observe(durations[phase])
+        for name in ('request_bytes', 'response_bytes'):
+            value = getattr(event, name)
+            if value is not None:
+                self.get_or_create(name, *labels).observe(value)
+
+    def after_response(self, event):
+        self._observe(event)
+
+    def on_error(self, event):
+        self._observe(event)
+
+
+class Span(object):
+    """
+    Minimal span following the OpenTelemetry ``Span`` interface used by
+    ``SpanCollector``. Times are in nanoseconds since the epoch.
+    """
+
+    def __init__(self, name, attributes=None, start_time=None, tracer=None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.exceptions = []
+        self.start_time = start_time or time.time_ns()
+        self.end_time = None
+        self._tracer = tracer
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_event(self, name, attributes=None):
+        self.events.append((name, dict(attributes or {})))
+
+    def record_exception(self, exception):
+        self.exceptions.append(exception)
+
+    def end(self, end_time=None):
+        self.end_time = end_time or time.time_ns()
+        if self._tracer is not None:
+            self._tracer._finish(self)
+
+
+class InMemoryTracer(object):
+    """
+    Tracer keeping every ended span in ``spans``.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def start_span(self, name, attributes=None):
+        return Span(name, attributes, tracer=self)
+
+    def _finish(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+
+class SpanCollector(object):
+    """
+    Hooks collector recording a span per request, with its phase durations
+    and byte counts as attributes and its retries and authentication
+    refreshes as span events. ``tracer`` can be an OpenTelemetry tracer or
+    anything with a compatible ``start_span``; by default spans are kept in
+    an ``InMemoryTracer``.
+    """
+
+    def __init__(self, tracer=None):
+        self.tracer = tracer if tracer is not None else InMemoryTracer()
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, event):
+        span = self.tracer.start_span(
+            '{} {}'.format(event.method, event.resource_name or event.url),
+            attributes={'http.method': event.method, 'http.url': event.url})
+        if event.resource_name:
+            span.set_attribute('tapioca.resource', event.resource_name)
+        if event.request_bytes is not None:
+            span.set_attribute('http.request_content_length', event.request_bytes)
+        with self._lock:
+            self._spans[id(event)] = span
+
+    def _get_span(self, event, pop=False):
+        with self._lock:
+            if pop:
+                return self._spans.pop(id(event), None)
+            return self._spans.get(id(event))
+
+    def on_retry(self, event):
+        span = self._get_span(event)
+        if span is not None:
+            span.add_event('retry', {'tapioca.retries': event.retries,
+                                     'tapioca.retry_delay': event.retry_delay})
+
+    def on_auth_refresh(self, event):
+        span = self._get_span(event)
+        if span is not None:
+            span.add_event('auth_refresh')
+
+    def _end_span(self, event):
+        span = self._get_span(event, pop=True)
+        if span is None:
+            return None
+
+        if event.status_code is not None:
+            span.set_attribute('http.status_code', event.status_code)
+        if event.response_bytes is not None:
+            span.set_attribute('http.response_content_length', event.response_bytes)
+        span.set_attribute('tapioca.retries', event.retries)
+        span.set_attribute('tapioca.cached', event.cached)
+        for phase, duration in event.timings.durations.items():
+            span.set_attribute('tapioca.{}_duration'.format(phase), duration)
+        return span
+
+    def after_response(self, event):
+        span = self._end_span(event)
+        if span is not None:
+            span.end()
+
+    def on_error(self, event):
+        span = self._end_span(event)
+        if span is not None:
+            span.record_exception(event.exception)
+            span.end()
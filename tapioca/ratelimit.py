@@ -0,0 +1,102 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import asyncio
+import threading
+import time
+
+
+class RateLimiter(object):
+    """
+    Token bucket allowing ``rate`` requests per second on average, with
+    bursts of up to ``burst`` requests (``rate`` by default). It can be
+    shared between threads and asyncio tasks; each request reserves a
+    token and waits until the bucket would have had it.
+
+    Responses carrying ``X-RateLimit-Remaining`` and ``X-RateLimit-Reset``
+    headers shrink the bucket to what the server still allows. The reset
+    header may be a Unix timestamp or a number of seconds.
+
+    ``wait_count``, ``wait_time`` and ``max_wait`` tell how many requests
+    had to wait and for how long, in seconds.
+    """
+
+    remaining_header = 'X-RateLimit-Remaining'
+    reset_header = 'X-RateLimit-Reset'
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = burst if burst is not None else max(1, rate)
+        self.wait_count = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst,
+                           self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self):
+        """
+        Takes a token from the bucket and returns how many seconds the
+        caller must wait before making its request.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            wait = max(0.0, -self._tokens / self.rate)
+            if wait:
+                self.wait_count += 1
+                self.wait_time += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def update(self, response):
+        try:
+            remaining = int(response.headers[self.remaining_header])
+        except (KeyError, ValueError):
+            return
+
+        with self._lock:
+            self._refill(time.monotonic())
+            if remaining > 0:
+                self._tokens = min(self._tokens, remaining)
+                return
+
+            # no request is made until the quota is reset
+            reset_in = self._get_reset_in(response) or 0
+            self._tokens = min(self._tokens, -reset_in * self.rate)
+
+    def _get_reset_in(self, response):
+        try:
+            reset = float(response.headers[self.reset_header])
+        except (KeyError, ValueError):
+            return None
+
+        # values larger than a year of seconds are timestamps
+        if reset > 365 * 24 * 60 * 60:
+            reset -= time.time()
+        return max(0.0, reset)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,106 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'])
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+if httpx is not None:
+    RETRY_EXCEPTIONS += (httpx.TransportError,)
+
+
+class RetryPolicy(object):
+    """
+    Decides if and when a failed request is sent again.
+
+    Requests are retried up to ``total`` times when they raise one of
+    ``exceptions`` or get a response with one of ``status_codes``, as long
+    as their method is in ``methods``; by default only idempotent methods,
+    so ``POST`` and ``PATCH`` are never sent twice. Retries wait
+    ``backoff_factor * 2 ** retries`` seconds, at most ``max_backoff``,
+    randomized between zero and that value when ``jitter`` is set. A
+    ``Retry-After`` header in the response takes precedence when
+    ``respect_retry_after`` is set; requests asked to wait longer than
+    ``max_retry_after`` seconds, ``max_backoff`` by default, are not retried.
+    """
+
+    def __init__(self, total=3, status_codes=RETRY_STATUS_CODES,
+                 exceptions=RETRY_EXCEPTIONS, methods=IDEMPOTENT_METHODS,
+                 backoff_factor=0.5, max_backoff=30, jitter=True,
+                 respect_retry_after=True, max_retry_after=None):
+        self.total = total
+        self.status_codes = frozenset(status_codes)
+        self.exceptions = tuple(exceptions)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = (max_retry_after if max_retry_after is not None
+                                else max_backoff)
+
+    def __repr__(self):
+        return '<{} total={}>'.format(self.__class__.__name__, self.total)
+
+    def get_delay(self, request_method, retries, response=None, exception=None):
+        """
+        Returns how many seconds to wait before retrying a request which
+        already was retried ``retries`` times and got ``response`` or raised
+        ``exception``, or ``None`` if it must not be retried.
+        """
+        if retries >= self.total or request_method.upper() not in self.methods:
+            return None
+
+        if exception is not None:
+            if not isinstance(exception, self.exceptions):
+                return None
+        elif response.status_code not in self.status_codes:
+            return None
+
+        if response is not None and self.respect_retry_after:
+            retry_after = get_retry_after(response)
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    return None
+                return retry_after
+
+        return self.get_backoff(retries)
+
+    def get_backoff(self, retries):
+        backoff = min(self.backoff_factor * 2 ** retries, self.max_backoff)
+        if self.jitter:
+            return random.uniform(0, backoff)
+        return backoff
+
+
+def get_retry_after(response, now=None):
+    """
+    Returns the seconds to wait according to the ``Retry-After`` header of
+    ``response``, which may be a number of seconds or an HTTP date.
+    """
+    retry_after = response.headers.get('Retry-After')
+    if not retry_after:
+        return None
+
+    try:
+        return max(0, int(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0, retry_at - (now or time.time()))
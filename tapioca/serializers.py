@@ -1,40 +1,123 @@
 
 import arrow
+from datetime import datetime, timezone
 from decimal import Decimal
 
 
+# leaves returned as they are unless the serializer defines a method for them
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def parse_iso_datetime(value):
+    """
+    Parses ISO 8601 strings with ``datetime.fromisoformat``, falling back
+    to arrow for any other format. Like arrow, naive values are taken as
+    UTC.
+    """
+    if isinstance(value, str):
+        if value.endswith(('Z', 'z')):
+            value = value[:-1] + '+00:00'
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            if parsed.tzinfo is None:
+                return parsed.replace(tzinfo=timezone.utc)
+            return parsed
+
+    return arrow.get(value).datetime
+
+
 class BaseSerializer(object):
+    """
+    ``serialize`` dispatches each value to the ``serialize_<type name>``
+    method matching the first class in its MRO, so subclasses of handled
+    types are serialized too. The names of the methods are collected once
+    per class and the resolution is cached per type; methods are still
+    looked up on the instance when called. Values of ``SCALAR_TYPES`` are
+    returned as they are unless the class defines a method for them.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super(BaseSerializer, cls).__init_subclass__(**kwargs)
+        cls._build_serialize_dispatch()
+
+    @classmethod
+    def _build_serialize_dispatch(cls):
+        cls._serialize_methods = frozenset(
+            name for name in dir(cls)
+            if name.startswith('serialize_') and name == name.lower())
+        cls._serialize_dispatch = {}
+        cls._passthrough_types = frozenset(
+            data_type for data_type in SCALAR_TYPES
+            if cls._get_serialize_method(data_type) is None)
+
+    @classmethod
+    def _get_serialize_method(cls, data_type):
+        try:
+            return cls._serialize_dispatch[data_type]
+        except KeyError:
+            pass
+
+        method_name = None
+        for klass in data_type.__mro__:
+            name = ('serialize_' + klass.__name__).lower()
+            if name in cls._serialize_methods:
+                method_name = name
+                break
+
+        cls._serialize_dispatch[data_type] = method_name
+        return method_name
 
     def deserialize(self, method_name, value, **kwargs):
         if hasattr(self, method_name):
             return getattr(self, method_name)(value, **kwargs)
         raise NotImplementedError("Desserialization method not found")
 
-    def serialize_dict(self, data):
-        serialized = {}
+    def deserialize_many(self, method_name, values, field=None, **kwargs):
+        """
+        Deserializes every value, or the ``field`` of every item, of a list
+        using the ``<method_name>_many`` method if the serializer has one.
+        """
+        if field is not None:
+            values = [value[field] for value in values]
 
-        for key, value in data.items():
-            serialized[key] = self.serialize(value)
+        if hasattr(self, method_name + '_many'):
+            return getattr(self, method_name + '_many')(values, **kwargs)
 
-        return serialized
+        if not hasattr(self, method_name):
+            raise NotImplementedError("Desserialization method not found")
+        method = getattr(self, method_name)
+        return [method(value, **kwargs) for value in values]
 
-    def serialize_list(self, data):
-        serialized = []
-        for item in data:
-            serialized.append(self.serialize(item))
+    def serialize_dict(self, data):
+        passthrough_types = self._passthrough_types
+        serialize = self.serialize
+        return {key: value if type(value) in passthrough_types else serialize(value)
+                for key, value in data.items()}
 
-        return serialized
+    def serialize_list(self, data):
+        passthrough_types = self._passthrough_types
+        serialize = self.serialize
+        return [item if type(item) in passthrough_types else serialize(item)
+                for item in data]
 
     def serialize(self, data):
-        data_type = type(data).__name__
+        data_type = type(data)
+        if data_type in self._passthrough_types:
+            return data
 
-        serialize_method = ('serialize_' + data_type).lower()
-        if hasattr(self, serialize_method):
-            return getattr(self, serialize_method)(data)
+        method_name = self._get_serialize_method(data_type)
+        if method_name is not None:
+            return getattr(self, method_name)(data)
 
         return data
 
 
+BaseSerializer._build_serialize_dispatch()
+
+
 class SimpleSerializer(BaseSerializer):
 
     def to_datetime(self, value):
@@ -43,6 +126,12 @@ class SimpleSerializer(BaseSerializer):
     def to_decimal(self, value):
         return Decimal(value)
 
+    def to_datetime_many(self, values):
+        return [parse_iso_datetime(value) for value in values]
+
+    def to_decimal_many(self, values):
+        return list(map(Decimal, values))
+
     def serialize_decimal(self, data):
         return str(data)
 
@@ -0,0 +1,64 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import threading
+
+import requests
+from requests.adapters import DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE, HTTPAdapter
+
+
+POOL_OPTIONS = ('pool_connections', 'pool_maxsize', 'pool_block', 'keep_alive')
+
+
+def build_session(pool_connections=DEFAULT_POOLSIZE, pool_maxsize=DEFAULT_POOLSIZE,
+                  pool_block=DEFAULT_POOLBLOCK, keep_alive=True):
+    """
+    Builds a ``requests.Session`` with its connection pool configured.
+
+    ``pool_connections`` is the number of hosts with a cached pool,
+    ``pool_maxsize`` the number of connections kept per host and
+    ``pool_block`` makes requests wait for a free connection instead of
+    opening (and discarding) extra ones. With ``keep_alive=False`` every
+    connection is closed after its response.
+    """
+    session = requests.Session()
+    http_adapter = HTTPAdapter(pool_connections=pool_connections,
+                               pool_maxsize=pool_maxsize,
+                               pool_block=pool_block)
+    session.mount('https://', http_adapter)
+    session.mount('http://', http_adapter)
+
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+
+    return session
+
+
+class SessionRegistry(object):
+    """
+    Process-wide sessions keyed by API root, so every wrapper of the same
+    API reuses one warmed connection pool.
+    """
+
+    def __init__(self, session_factory=build_session):
+        self._session_factory = session_factory
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_root, session_factory=None, **pool_options):
+        session_factory = session_factory or self._session_factory
+        key = (api_root, session_factory, tuple(sorted(pool_options.items())))
+        with self._lock:
+            if key not in self._sessions:
+                self._sessions[key] = session_factory(**pool_options)
+            return self._sessions[key]
+
+    def clear(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+shared_sessions = SessionRegistry()
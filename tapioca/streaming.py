@@ -0,0 +1,246 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import queue
+import re
+import threading
+
+import xmltodict
+
+from .json_codecs import get_json_codec
+
+
+class ItemStream(object):
+    """
+    Items of a streamed response, parsed as the body is downloaded. It can
+    only be iterated once. Once exhausted, ``response_data`` holds the rest
+    of the response with the item list left empty.
+    """
+
+    def __init__(self, response, chunk_size=64 * 1024):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.exhausted = False
+        self._response_data = None
+        self._items = self._iter_items()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._items)
+        except StopIteration:
+            self.exhausted = True
+            self.response.close()
+            raise
+
+    def __contains__(self, item):
+        # membership tests would consume the stream
+        return False
+
+    def _iter_items(self):
+        raise NotImplementedError()
+
+    @property
+    def response_data(self):
+        if not self.exhausted:
+            raise ValueError("The stream must be consumed before accessing "
+                             "the response data")
+        return self._response_data
+
+    def close(self):
+        self._items.close()
+        self.response.close()
+
+
+_QUOTE, _COMMA, _COLON = ord('"'), ord(','), ord(':')
+_OPENERS = (ord('{'), ord('['))
+_STRUCTURAL = re.compile(rb'["{}\[\],:]')
+_STRING_END = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+
+class _Frame(object):
+    __slots__ = ('is_object', 'key', 'expects_key', 'path_depth', 'is_target')
+
+    def __init__(self, is_object, path_depth=None, is_target=False):
+        self.is_object = is_object
+        self.key = None
+        self.expects_key = is_object
+        self.path_depth = path_depth
+        self.is_target = is_target
+
+
+class JSONItemStream(ItemStream):
+    """
+    Yields the items of the JSON array found under ``path``, a sequence of
+    object keys or a dotted string (empty for a top level array), decoding
+    one item at a time with ``codec``.
+    """
+
+    def __init__(self, response, path=(), codec=None, **kwargs):
+        if isinstance(path, str):
+            path = [key for key in path.split('.') if key]
+        self.path = tuple(path)
+        self.codec = get_json_codec(codec)
+        super(JSONItemStream, self).__init__(response, **kwargs)
+
+    def _open_frame(self, stack, is_object):
+        parent = stack[-1] if stack else None
+        path_depth = None
+        if parent is None:
+            path_depth = 0
+        elif (parent.is_object and parent.path_depth is not None and
+                parent.path_depth < len(self.path) and
+                parent.key == self.path[parent.path_depth]):
+            path_depth = parent.path_depth + 1
+
+        is_target = (not is_object and path_depth == len(self.path))
+        frame = _Frame(is_object, path_depth, is_target)
+        stack.append(frame)
+        return frame
+
+    def _iter_items(self):
+        buffer = bytearray()
+        skeleton = bytearray()
+        stack = []
+        position = 0
+        copied = 0
+        item_start = None
+        target_found = False
+
+        for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+            buffer += chunk
+
+            while True:
+                match = _STRUCTURAL.search(buffer, position)
+                if match is None:
+                    position = len(buffer)
+                    break
+
+                index = match.start()
+                char = buffer[index]
+
+                if char == _QUOTE:
+                    string_end = _STRING_END.match(buffer, index + 1)
+                    if string_end is None:
+                        # the string continues in the next chunk
+                        position = index
+                        break
+                    position = string_end.end()
+                    frame = stack[-1] if stack else None
+                    if frame is not None and frame.expects_key:
+                        frame.expects_key = False
+                        if frame.path_depth is not None:
+                            frame.key = self.codec.loads(
+                                bytes(buffer[index:position]))
+                    continue
+
+                position = index + 1
+
+                if char in _OPENERS:
+                    frame = self._open_frame(stack, char == _OPENERS[0])
+                    if frame.is_target and not target_found:
+                        target_found = True
+                        skeleton += buffer[copied:position]
+                        item_start = position
+                    else:
+                        frame.is_target = False
+                elif char == _COMMA:
+                    frame = stack[-1]
+                    if frame.is_target:
+                        item = bytes(buffer[item_start:index])
+                        item_start = position
+                        yield self.codec.loads(item)
+                    elif frame.is_object:
+                        frame.expects_key = True
+                elif char != _COLON:
+                    frame = stack.pop()
+                    if frame.is_target:
+                        item = bytes(buffer[item_start:index])
+                        item_start = None
+                        copied = index
+                        if item.strip():
+                            yield self.codec.loads(item)
+
+            if item_start is not None:
+                discard = item_start
+                item_start = 0
+            else:
+                skeleton += buffer[copied:position]
+                discard = position
+                copied = 0
+            del buffer[:discard]
+            position -= discard
+
+        skeleton += buffer[copied:]
+        if skeleton.strip():
+            self._response_data = self.codec.loads(bytes(skeleton))
+
+
+class XMLItemStream(ItemStream):
+    """
+    Yields the elements found under ``path``, a sequence of tag names or a
+    dotted string starting at the root tag, converted by xmltodict exactly
+    as ``xmltodict.parse`` would. ``response_data`` is always ``None``.
+
+    xmltodict pushes items to a callback, so the document is parsed in a
+    worker thread which hands at most ``max_buffered_items`` items over.
+    """
+
+    def __init__(self, response, path, parse_kwargs=None,
+                 max_buffered_items=128, **kwargs):
+        if isinstance(path, str):
+            path = [tag for tag in path.split('.') if tag]
+        self.path = list(path)
+        self.parse_kwargs = parse_kwargs or {}
+        self.max_buffered_items = max_buffered_items
+        super(XMLItemStream, self).__init__(response, **kwargs)
+
+    def _iter_items(self):
+        parsed = queue.Queue(maxsize=self.max_buffered_items)
+        stop = threading.Event()
+
+        def put(entry):
+            while not stop.is_set():
+                try:
+                    parsed.put(entry, timeout=0.05)
+                    return
+                except queue.Full:
+                    pass
+
+        def item_callback(item_path, item):
+            if [tag for tag, _ in item_path] == self.path:
+                put(('item', item))
+            # a falsy value interrupts the parsing
+            return not stop.is_set()
+
+        def parse():
+            chunks = (chunk for chunk in
+                      self.response.iter_content(chunk_size=self.chunk_size))
+            try:
+                xmltodict.parse(chunks, item_depth=len(self.path),
+                                item_callback=item_callback,
+                                **self.parse_kwargs)
+            except xmltodict.ParsingInterrupted:
+                pass
+            except Exception as e:
+                put(('error', e))
+                return
+            put(('end', None))
+
+        worker = threading.Thread(target=parse, daemon=True)
+        worker.start()
+
+        try:
+            while True:
+                kind, value = parsed.get()
+                if kind == 'error':
+                    raise value
+                if kind == 'end':
+                    break
+                yield value
+        finally:
+            stop.set()
+            worker.join()
@@ -2,7 +2,16 @@
 
 from __future__ import unicode_literals
 
+import abc
 import copy
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+from operator import attrgetter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
 import webbrowser
@@ -10,7 +19,19 @@ import webbrowser
 import json
 from collections import OrderedDict
 
-from .exceptions import ResponseProcessException
+from .auth import SingleFlightRefresh
+from .cache import (
+    build_cache_entry, get_cache_key, refresh_cache_entry)
+from .exceptions import ResponseProcessException, TapiocaException
+from .hooks import RequestEvent, RequestTimings, get_body_size
+from .retry import RETRY_EXCEPTIONS
+from .sessions import POOL_OPTIONS, build_session, shared_sessions
+from .streaming import ItemStream
+from .transports import get_transport
+
+
+# returned in place of the result of a batch item instead of aborting it
+BATCH_EXCEPTIONS = (TapiocaException,) + RETRY_EXCEPTIONS
 
 
 class TapiocaInstantiator(object):
@@ -20,77 +41,82 @@ class TapiocaInstantiator(object):
 
     def __call__(self, serializer_class=None, session=None, **kwargs):
         refresh_token_default = kwargs.pop('refresh_token_by_default', False)
-        return TapiocaClient(
-            self.adapter_class(serializer_class=serializer_class),
-            api_params=kwargs, refresh_token_by_default=refresh_token_default,
-            session=session)
-
-
-class TapiocaClient(object):
-
-    def __init__(self, api, data=None, response=None, request_kwargs=None,
-                 api_params=None, resource=None, refresh_token_by_default=False,
-                 refresh_data=None, session=None, *args, **kwargs):
-        self._api = api
-        self._data = data
-        self._response = response
-        self._api_params = api_params or {}
-        self._request_kwargs = request_kwargs
-        self._resource = resource
-        self._refresh_token_default = refresh_token_by_default
-        self._refresh_data = refresh_data
-        self._session = session or requests.Session()
-
-    def _instatiate_api(self):
-        serializer_class = None
-        if self._api.serializer:
-            serializer_class = self._api.serializer.__class__
-        return self._api.__class__(
-            serializer_class=serializer_class)
-
-    def _wrap_in_tapioca(self, data, *args, **kwargs):
-        request_kwargs = kwargs.pop('request_kwargs', self._request_kwargs)
-        return TapiocaClient(self._instatiate_api(), data=data,
-                             api_params=self._api_params,
-                             request_kwargs=request_kwargs,
-                             refresh_token_by_default=self._refresh_token_default,
-                             refresh_data=self._refresh_data,
-                             session=self._session,
-                             *args, **kwargs)
-
-    def _wrap_in_tapioca_executor(self, data, *args, **kwargs):
-        request_kwargs = kwargs.pop('request_kwargs', self._request_kwargs)
-        return TapiocaClientExecutor(self._instatiate_api(), data=data,
-                                     api_params=self._api_params,
-                                     request_kwargs=request_kwargs,
-                                     refresh_token_by_default=self._refresh_token_default,
-                                     refresh_data=self._refresh_data,
-                                     session=self._session,
-                                     *args, **kwargs)
-
-    def _get_doc(self):
-        resources = copy.copy(self._resource)
-        docs = ("Automatic generated __doc__ from resource_mapping.\n"
-                "Resource: %s\n"
-                "Docs: %s\n" % (resources.pop('resource', ''),
-                                resources.pop('docs', '')))
-        for key, value in sorted(resources.items()):
-            docs += "%s: %s\n" % (key.title(), value)
-        docs = docs.strip()
-        return docs
+        share_session = kwargs.pop('share_session', False)
+        cache = kwargs.pop('cache', None)
+        retry = kwargs.pop('retry', None)
+        rate_limiter = kwargs.pop('rate_limiter', None)
+        circuit_breaker = kwargs.pop('circuit_breaker', None)
+        hooks = kwargs.pop('hooks', None)
+        pool_options = {option: kwargs.pop(option)
+                        for option in POOL_OPTIONS if option in kwargs}
+
+        adapter = self.adapter_class(serializer_class=serializer_class)
+
+        transport_class = self._get_transport_class(adapter)
+        if isinstance(session, type):
+            # transport classes are built like the adapter transport_class
+            transport_class, session = session, None
+
+        if pool_options or share_session:
+            if session is not None:
+                raise ValueError("Connection pool options can not be used "
+                                 "with an existing session")
+            session = self._get_session(adapter, kwargs, share_session,
+                                        transport_class, **pool_options)
+        elif session is not None:
+            session = self._get_transport(session)
+        elif transport_class is not None:
+            session = self._get_session(adapter, kwargs, False, transport_class)
+
+        return self._get_client_class()(
+            adapter, api_params=kwargs,
+            refresh_token_by_default=refresh_token_default, session=session,
+            cache=cache, retry=retry, rate_limiter=rate_limiter,
+            circuit_breaker=circuit_breaker, hooks=hooks)
+
+    def _get_session(self, adapter, api_params, share_session,
+                     transport_class=None, **pool_options):
+        session_factory = build_session
+        if transport_class is not None:
+            session_factory = transport_class.from_pool_options
+
+        if share_session:
+            return shared_sessions.get(adapter.get_api_root(api_params),
+                                       session_factory=session_factory,
+                                       **pool_options)
+        return session_factory(**pool_options)
+
+    def _get_transport(self, session):
+        return get_transport(session)
+
+    def _get_transport_class(self, adapter):
+        return adapter.transport_class
+
+    def _get_client_class(self):
+        return TapiocaClient
+
+
+class BaseTapiocaClient(metaclass=abc.ABCMeta):
+    """
+    Navigation shared by clients and the views of their data. It declares
+    no instance attributes so ``TapiocaClientView`` can use ``__slots__``.
+    """
 
-    __doc__ = property(_get_doc)
+    __slots__ = ()
 
     def __call__(self, *args, **kwargs):
         data = self._data
 
-        url_params = self._api_params.get('default_url_params', {})
-        url_params.update(kwargs)
+        url_params = dict(self._api_params.get('default_url_params') or {},
+                          **kwargs)
         if self._resource and url_params:
             data = self._api.fill_resource_template_url(self._data, url_params)
 
         return self._wrap_in_tapioca_executor(data, resource=self._resource,
-                                              response=self._response)
+                                              resource_name=self._resource_name,
+                                              response=self._response,
+                                              retries=self._retries,
+                                              timings=self._timings)
     """
     Convert a snake_case string in CamelCase.
     http://stackoverflow.com/questions/19053707/convert-snake-case-snake-case-to-lower-camel-case-lowercamelcase-in-python
@@ -104,18 +130,13 @@ class TapiocaClient(object):
     def _get_client_from_name(self, name):
         if (isinstance(self._data, list) and isinstance(name, int) or
                 hasattr(self._data, '__iter__') and name in self._data):
-            return self._wrap_in_tapioca(data=self._data[name])
+            return self._wrap_in_view(name, self._data[name])
 
         # if could not access, falback to resource mapping
-        resource_mapping = self._api.get_resource_mapping(self._api_params)
-        if name in resource_mapping:
-            resource = resource_mapping[name]
-            api_root = self._api.get_api_root(
-                self._api_params, resource_name=name
-            )
-
-            url = api_root.rstrip('/') + '/' + resource['resource'].lstrip('/')
-            return self._wrap_in_tapioca(url, resource=resource)
+        resolved = self._api._resolve_resource(name, self._api_params)
+        if resolved is not None:
+            url, resource = resolved
+            return self._wrap_in_tapioca(url, resource=resource, resource_name=name)
 
         return None
 
@@ -186,6 +207,130 @@ class TapiocaClient(object):
         return key in self._data
 
 
+class TapiocaClient(BaseTapiocaClient):
+
+    def __init__(self, api, data=None, response=None, request_kwargs=None,
+                 api_params=None, resource=None, refresh_token_by_default=False,
+                 refresh_data=None, session=None, cache=None, auth_refresh=None,
+                 retry=None, retries=0, rate_limiter=None, circuit_breaker=None,
+                 hooks=None, resource_name=None, timings=None, *args, **kwargs):
+        self._api = api
+        self._data = data
+        self._response = response
+        self._api_params = api_params if api_params is not None else {}
+        self._request_kwargs = request_kwargs
+        self._resource = resource
+        self._refresh_token_default = refresh_token_by_default
+        self._refresh_data = refresh_data
+        self._session = session or self._get_default_session()
+        self._cache = cache
+        self._auth_refresh = auth_refresh or SingleFlightRefresh()
+        self._retry = retry
+        self._retries = retries
+        self._rate_limiter = rate_limiter
+        self._circuit_breaker = circuit_breaker
+        self._hooks = hooks
+        self._resource_name = resource_name
+        self._timings = timings
+
+    def _get_default_session(self):
+        return requests.Session()
+
+    def _instatiate_api(self):
+        if getattr(self._api, 'share_adapter', False):
+            return self._api
+
+        serializer_class = None
+        if self._api.serializer:
+            serializer_class = self._api.serializer.__class__
+        return self._api.__class__(
+            serializer_class=serializer_class)
+
+    def _wrap_in_tapioca(self, data, *args, **kwargs):
+        return self._wrap_in(TapiocaClient, data, *args, **kwargs)
+
+    def _wrap_in_tapioca_executor(self, data, *args, **kwargs):
+        return self._wrap_in(TapiocaClientExecutor, data, *args, **kwargs)
+
+    def _wrap_in(self, client_class, data, *args, **kwargs):
+        request_kwargs = kwargs.pop('request_kwargs', self._request_kwargs)
+        return client_class(self._instatiate_api(), data=data,
+                            api_params=self._api_params,
+                            request_kwargs=request_kwargs,
+                            refresh_token_by_default=self._refresh_token_default,
+                            refresh_data=self._refresh_data,
+                            session=self._session,
+                            cache=self._cache,
+                            auth_refresh=self._auth_refresh,
+                            retry=self._retry,
+                            rate_limiter=self._rate_limiter,
+                            circuit_breaker=self._circuit_breaker,
+                            hooks=self._hooks,
+                            *args, **kwargs)
+
+    def _wrap_in_view(self, name, data):
+        return TapiocaClientView(self, (name,), data)
+
+    def _get_doc(self):
+        resources = copy.copy(self._resource)
+        docs = ("Automatic generated __doc__ from resource_mapping.\n"
+                "Resource: %s\n"
+                "Docs: %s\n" % (resources.pop('resource', ''),
+                                resources.pop('docs', '')))
+        for key, value in sorted(resources.items()):
+            docs += "%s: %s\n" % (key.title(), value)
+        docs = docs.strip()
+        return docs
+
+    __doc__ = property(_get_doc)
+
+
+class TapiocaClientView(BaseTapiocaClient):
+    """
+    Client for data nested in a response. It only keeps the client the
+    navigation started from and the path to the data, leaving the creation
+    of executors and clients to it.
+    """
+
+    __slots__ = ('_root', '_path', '_data')
+
+    _api = property(attrgetter('_root._api'))
+    _api_params = property(attrgetter('_root._api_params'))
+    _request_kwargs = property(attrgetter('_root._request_kwargs'))
+    _refresh_token_default = property(attrgetter('_root._refresh_token_default'))
+    _refresh_data = property(attrgetter('_root._refresh_data'))
+    _session = property(attrgetter('_root._session'))
+    _cache = property(attrgetter('_root._cache'))
+    _auth_refresh = property(attrgetter('_root._auth_refresh'))
+    _retry = property(attrgetter('_root._retry'))
+    _rate_limiter = property(attrgetter('_root._rate_limiter'))
+    _circuit_breaker = property(attrgetter('_root._circuit_breaker'))
+    _hooks = property(attrgetter('_root._hooks'))
+    _response = None
+    _resource = None
+    _resource_name = None
+    _retries = 0
+    _timings = None
+
+    def __init__(self, root, path, data):
+        self._root = root
+        self._path = path
+        self._data = data
+
+    def _wrap_in_tapioca(self, data, *args, **kwargs):
+        return self._root._wrap_in_tapioca(data, *args, **kwargs)
+
+    def _wrap_in_tapioca_executor(self, data, *args, **kwargs):
+        return self._root._wrap_in_tapioca_executor(data, *args, **kwargs)
+
+    def _wrap_in_view(self, name, data):
+        return TapiocaClientView(self._root, self._path + (name,), data)
+
+
+# views are still clients to code checking isinstance(..., TapiocaClient)
+TapiocaClient.register(TapiocaClientView)
+
+
 class TapiocaClientExecutor(TapiocaClient):
 
     def __init__(self, api, *args, **kwargs):
@@ -196,6 +341,8 @@ class TapiocaClientExecutor(TapiocaClient):
                         " TapiocaClientExecutor object")
 
     def __iter__(self):
+        if isinstance(self._data, ItemStream):
+            return (self._wrap_in_tapioca(item) for item in self._data)
         raise Exception("Cannot iterate over a TapiocaClientExecutor object")
 
     def __getattr__(self, name):
@@ -228,44 +375,343 @@ class TapiocaClientExecutor(TapiocaClient):
     def refresh_data(self):
         return self._refresh_data
 
-    def _make_request(self, request_method, refresh_token=None, *args, **kwargs):
+    @property
+    def retries(self):
+        return self._retries
+
+    @property
+    def timings(self):
+        return self._timings
+
+    def _get_tapioca_exception(self, exception, response, request_kwargs,
+                               retries=0, timings=None):
+        client = self._wrap_in_tapioca(exception.data, response=response,
+                                       request_kwargs=request_kwargs,
+                                       retries=retries, timings=timings)
+
+        error_message = self._api.get_error_message(data=exception.data,
+                                                    response=response)
+        return exception.tapioca_exception(message=error_message,
+                                           client=client)
+
+    def _refresh_authentication(self, auth_generation, event=None, emit=True):
+        if event is not None:
+            event.timings.start('auth_refresh')
+        refresh_data = self._auth_refresh.refresh(
+            auth_generation,
+            lambda: self._api.refresh_authentication(self._api_params))
+        self._authentication_refreshed(refresh_data, event, emit)
+        return refresh_data
+
+    def _authentication_refreshed(self, refresh_data, event=None, emit=True):
+        # refresh_authentication may change values of nested api_params the
+        # resolved resources depend on
+        self._api._clear_resolved_resources()
+        if event is not None:
+            event.timings.stop('auth_refresh')
+            event.refresh_data = refresh_data
+            if emit:
+                self._emit_auth_refresh(event)
+
+    def _emit_auth_refresh(self, event):
+        if self._hooks is not None:
+            self._hooks.emit('on_auth_refresh', event)
+
+    def _emit_before_request(self, event, request_kwargs):
+        if self._hooks is None:
+            return
+        event.request_bytes = get_body_size(request_kwargs.get('data'))
+        self._hooks.emit('before_request', event)
+
+    def _emit_retry(self, event, retries, delay, response=None, exception=None):
+        if self._hooks is None:
+            return
+        event.retries = retries
+        event.retry_delay = delay
+        event.status_code = response.status_code if response is not None else None
+        event.exception = exception
+        self._hooks.emit('on_retry', event)
+
+    def _wrap_response(self, timings, data, **kwargs):
+        timings.start('wrap')
+        client = self._wrap_in_tapioca(data, timings=timings, **kwargs)
+        timings.stop('wrap')
+        return client
+
+    def _set_replay_timings(self, timings, client):
+        # the replayed request has timings of its own, which are kept in the
+        # timings of the request that failed
+        timings.stop('replay')
+        timings.replay = client._timings
+        client._timings = timings
+        return client
+
+    def _emit_response(self, event_name, event, response, request_kwargs,
+                       retries, exception=None):
+        if self._hooks is None:
+            return
+        event.timings.finish()
+        event.retries = retries
+        event.exception = exception
+        if response is not None:
+            event.status_code = response.status_code
+            if not request_kwargs.get('stream'):
+                event.response_bytes = len(response.content)
+        self._hooks.emit(event_name, event)
+
+    def _get_resource_option(self, name, default):
+        if self._resource and name in self._resource:
+            return self._resource[name]
+        return default
+
+    def _guard_circuit(self):
+        if self._circuit_breaker is None:
+            return nullcontext()
+
+        api_root = self._api.get_api_root(self._api_params,
+                                          resource_name=self._resource_name)
+        return self._circuit_breaker.guard(api_root)
+
+    def _get_retry_delay(self, retry_policy, request_method, retries, event,
+                         response=None, exception=None):
+        """
+        Returns how long to wait before retrying the request, or ``None`` if
+        its response or exception must be returned or raised as is.
+        """
+        if retry_policy is None:
+            return None
+        delay = retry_policy.get_delay(request_method, retries,
+                                       response=response, exception=exception)
+        if delay is not None:
+            self._emit_retry(event, retries + 1, delay, response=response,
+                             exception=exception)
+        return delay
+
+    def _send_request(self, request_method, request_kwargs, event):
+        retry_policy = self._get_resource_option('retry', self._retry)
+        rate_limiter = self._get_resource_option('rate_limiter', self._rate_limiter)
+        retries = 0
+
+        while True:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+
+            try:
+                response = self._session.request(request_method, **request_kwargs)
+            except Exception as exception:
+                delay = self._get_retry_delay(retry_policy, request_method,
+                                              retries, event, exception=exception)
+                if delay is None:
+                    raise
+            else:
+                if rate_limiter is not None:
+                    rate_limiter.update(response)
+                delay = self._get_retry_delay(retry_policy, request_method,
+                                              retries, event, response=response)
+                if delay is None:
+                    return response, retries
+                response.close()
+
+            time.sleep(delay)
+            retries += 1
+
+    def _get_authentication_expiration(self):
+        expiration = self._api.get_authentication_expiration(self._api_params)
+        if isinstance(expiration, datetime):
+            expiration = expiration.timestamp()
+        return expiration
+
+    def _authentication_expires_soon(self, refresh_token):
+        if refresh_token is False or not self._refresh_token_default:
+            return False
+
+        expiration = self._get_authentication_expiration()
+        if expiration is None:
+            return False
+        return time.time() >= expiration - self._api.authentication_refresh_margin
+
+    def _can_use_current_authentication(self, event):
+        """
+        Tells whether the request can still be sent with the current
+        authentication after refreshing it ahead of its expiration failed.
+        """
+        event.timings.stop('auth_refresh')
+        expiration = self._get_authentication_expiration()
+        return expiration is not None and time.time() < expiration
+
+    def _should_refresh_authentication(self, refresh_token, tapioca_exception):
+        should_refresh_token = (refresh_token is not False and
+                                self._refresh_token_default)
+        auth_expired = self._api.is_authentication_expired(tapioca_exception)
+        return should_refresh_token and auth_expired
+
+    def _get_cache_entry(self, request_method, request_kwargs):
+        if self._cache is None or request_kwargs.get('stream'):
+            return None, None
+
+        cache_key = get_cache_key(request_method, request_kwargs,
+                                  self._api_params)
+        if cache_key is None:
+            return None, None
+
+        cache_entry = self._cache.get(cache_key)
+        if cache_entry is not None and not cache_entry.matches(
+                request_kwargs.get('headers')):
+            cache_entry = None
+        return cache_key, cache_entry
+
+    def _update_cache(self, request_method, request_kwargs, cache_key, data,
+                      response):
+        if self._cache is None or request_kwargs.get('stream'):
+            return
+
+        if cache_key is None:
+            # unsafe methods invalidate what was cached for the same URL
+            self._cache.delete(get_cache_key('GET', request_kwargs,
+                                             self._api_params))
+            return
+
+        cache_entry = build_cache_entry(data, response,
+                                        request_headers=request_kwargs.get('headers'))
+        if cache_entry is not None:
+            self._cache.set(cache_key, cache_entry)
+
+    def _start_request(self, request_method, kwargs):
         if 'url' not in kwargs:
             kwargs['url'] = self._data
-
+        return RequestEvent(self._resource_name, request_method, kwargs['url'],
+                            RequestTimings())
+
+    def _prepare_request(self, request_method, event, args, kwargs,
+                         auth_refreshed=False):
+        """
+        Serializes the request and looks it up in the cache. Returns its
+        kwargs, cache key and cache entry, and the client of a fresh cached
+        response, in which case the request must not be sent.
+        ``auth_refreshed`` tells authentication was refreshed ahead of the
+        request, which is reported once ``before_request`` is.
+        """
+        event.timings.start('serialize')
         request_kwargs = self._api.get_request_kwargs(
             self._api_params, request_method, *args, **kwargs)
-
-        response = self._session.request(request_method, **request_kwargs)
-
-        try:
+        event.timings.stop('serialize')
+
+        cache_key, cache_entry = self._get_cache_entry(request_method,
+                                                       request_kwargs)
+        if cache_entry is not None:
+            event.cached = cache_entry.is_fresh()
+            if not event.cached:
+                request_kwargs['headers'] = dict(
+                    request_kwargs.get('headers') or {},
+                    **cache_entry.get_conditional_headers())
+
+        self._emit_before_request(event, request_kwargs)
+        if auth_refreshed:
+            self._emit_auth_refresh(event)
+
+        if not event.cached:
+            return request_kwargs, cache_key, cache_entry, None
+
+        client = self._wrap_response(event.timings, cache_entry.data,
+                                     response=cache_entry.response,
+                                     request_kwargs=request_kwargs)
+        # nothing was received, so no response_bytes
+        event.status_code = cache_entry.response.status_code
+        self._emit_response('after_response', event, None, request_kwargs, 0)
+        return request_kwargs, cache_key, cache_entry, client
+
+    def _process_response(self, request_kwargs, event, response, cache_key,
+                          cache_entry):
+        """
+        Decodes ``response``, or takes the data of ``cache_entry`` if the
+        response revalidated it. Returns the data and the response the client
+        is built with.
+        """
+        if cache_entry is not None and response.status_code == 304:
+            event.cached = True
+            cache_entry = refresh_cache_entry(cache_entry, response)
+            self._cache.set(cache_key, cache_entry)
+            return cache_entry.data, cache_entry.response
+
+        event.timings.start('decode')
+        if request_kwargs.get('stream'):
+            data = self._api.process_stream_response(response)
+        else:
             data = self._api.process_response(response)
-        except ResponseProcessException as e:
-            client = self._wrap_in_tapioca(e.data, response=response,
-                                           request_kwargs=request_kwargs)
-
-            error_message = self._api.get_error_message(data=e.data,
-                                                        response=response)
-            tapioca_exception = e.tapioca_exception(message=error_message,
-                                                    client=client)
+        event.timings.stop('decode')
+        return data, response
 
-            should_refresh_token = (refresh_token is not False and
-                                    self._refresh_token_default)
-            auth_expired = self._api.is_authentication_expired(tapioca_exception)
+    def _finish_request(self, request_method, request_kwargs, event, response,
+                        retries, cache_key, data, client_response):
+        if client_response is response:
+            self._update_cache(request_method, request_kwargs, cache_key, data,
+                               response)
 
-            propagate_exception = True
+        client = self._wrap_response(event.timings, data,
+                                     response=client_response,
+                                     request_kwargs=request_kwargs,
+                                     retries=retries)
+        self._emit_response('after_response', event, response, request_kwargs,
+                            retries)
+        return client
 
-            if should_refresh_token and auth_expired:
-                self._refresh_data = self._api.refresh_authentication(self._api_params)
-                if self._refresh_data:
-                    propagate_exception = False
-                    return self._make_request(request_method,
-                                              refresh_token=False, *args, **kwargs)
+    def _make_request(self, request_method, refresh_token=None, *args, **kwargs):
+        event = self._start_request(request_method, kwargs)
+
+        auth_generation = self._auth_refresh.generation
+        auth_refreshed = False
+        if self._authentication_expires_soon(refresh_token):
+            try:
+                self._refresh_data = self._refresh_authentication(
+                    auth_generation, event, emit=False)
+                auth_refreshed = True
+            except Exception:
+                if not self._can_use_current_authentication(event):
+                    raise
+            auth_generation = self._auth_refresh.generation
+
+        request_kwargs, cache_key, cache_entry, client = self._prepare_request(
+            request_method, event, args, kwargs, auth_refreshed)
+        if client is not None:
+            return client
 
-            if propagate_exception:
+        response, retries = None, 0
+        try:
+            with self._guard_circuit():
+                event.timings.start('network')
+                response, retries = self._send_request(request_method,
+                                                       request_kwargs, event)
+                event.timings.stop('network')
+                data, client_response = self._process_response(
+                    request_kwargs, event, response, cache_key, cache_entry)
+        except ResponseProcessException as e:
+            tapioca_exception = self._get_tapioca_exception(
+                e, response, request_kwargs, retries=retries,
+                timings=event.timings)
+
+            should_refresh = self._should_refresh_authentication(
+                refresh_token, tapioca_exception)
+            if should_refresh:
+                self._refresh_data = self._refresh_authentication(auth_generation,
+                                                                  event)
+
+            self._emit_response('on_error', event, response, request_kwargs,
+                                retries, exception=tapioca_exception)
+            if not (should_refresh and self._refresh_data):
                 raise tapioca_exception
 
-        return self._wrap_in_tapioca(data, response=response,
-                                     request_kwargs=request_kwargs)
+            event.timings.start('replay')
+            client = self._make_request(request_method,
+                                        refresh_token=False, *args, **kwargs)
+            return self._set_replay_timings(event.timings, client)
+        except Exception as e:
+            self._emit_response('on_error', event, response, request_kwargs,
+                                event.retries, exception=e)
+            raise
+
+        return self._finish_request(request_method, request_kwargs, event,
+                                    response, retries, cache_key, data,
+                                    client_response)
 
     def get(self, *args, **kwargs):
         return self._make_request('GET', *args, **kwargs)
@@ -285,12 +731,52 @@ class TapiocaClientExecutor(TapiocaClient):
     def delete(self, *args, **kwargs):
         return self._make_request('DELETE', *args, **kwargs)
 
+    def _get_batch_request(self, item, method, kwargs):
+        if isinstance(item, tuple):
+            item, item_kwargs = item
+            kwargs = dict(kwargs, **item_kwargs)
+
+        if not isinstance(item, TapiocaClientExecutor):
+            item = item()
+        return getattr(item, method.lower()), kwargs
+
+    def batch(self, executors, method='get', concurrency=32, **kwargs):
+        """
+        Performs ``method`` on every executor using up to ``concurrency``
+        threads. Items may also be ``(executor, kwargs)`` pairs to pass
+        per-request kwargs. Returns, in input order, the response clients or
+        the ``TapiocaException``, connection error or timeout raised by each
+        request.
+        """
+        def execute(item):
+            request, request_kwargs = self._get_batch_request(item, method,
+                                                              kwargs)
+            try:
+                return request(**request_kwargs)
+            except BATCH_EXCEPTIONS as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(execute, executors))
+
     def _get_iterator_list(self):
+        if isinstance(self._data, ItemStream):
+            return self._data
         return self._api.get_iterator_list(self._data)
 
     def _get_iterator_next_request_kwargs(self):
+        data = self._data
+        if isinstance(data, ItemStream):
+            data = data.response_data
         return self._api.get_iterator_next_request_kwargs(
-            self._request_kwargs, self._data, self._response)
+            self._request_kwargs, data, self._response)
+
+    def _get_next_page_request_kwargs(self):
+        next_request_kwargs = self._get_iterator_next_request_kwargs()
+        if next_request_kwargs and isinstance(self._data, ItemStream):
+            # the next pages are streamed too
+            next_request_kwargs = dict(next_request_kwargs, stream=True)
+        return next_request_kwargs
 
     def _reached_max_limits(self, page_count, item_count, max_pages,
                             max_items):
@@ -298,33 +784,154 @@ class TapiocaClientExecutor(TapiocaClient):
         reached_item_limit = max_items is not None and max_items <= item_count
         return reached_page_limit or reached_item_limit
 
-    def pages(self, max_pages=None, max_items=None, **kwargs):
+    def _page_executors(self, max_pages=None):
         executor = self
-        iterator_list = executor._get_iterator_list()
-        page_count = 0
-        item_count = 0
+        page_count = 1
+        yield executor
 
-        while iterator_list:
-            if self._reached_max_limits(page_count, item_count, max_pages,
-                                        max_items):
+        while max_pages is None or page_count < max_pages:
+            next_request_kwargs = executor._get_next_page_request_kwargs()
+            if not next_request_kwargs:
                 break
-            for item in iterator_list:
-                if self._reached_max_limits(page_count, item_count, max_pages,
-                                            max_items):
-                    break
-                yield self._wrap_in_tapioca(item)
-                item_count += 1
 
+            response = self.get(**next_request_kwargs)
+            executor = response()
             page_count += 1
+            yield executor
+
+    def _prefetched_page_executors(self, prefetch, max_pages=None):
+        fetched = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+
+        def put(page):
+            while not stop.is_set():
+                try:
+                    fetched.put(page, timeout=0.05)
+                    return
+                except queue.Full:
+                    pass
+
+        def fetch_pages():
+            page_executors = self._page_executors(max_pages=max_pages)
+            next(page_executors)  # the first page is already fetched
+            try:
+                for executor in page_executors:
+                    put((executor, None))
+                    if stop.is_set():
+                        break
+            except Exception as e:
+                put((None, e))
+            put((None, None))
+
+        worker = threading.Thread(target=fetch_pages, daemon=True)
+        worker.start()
 
-            next_request_kwargs = executor._get_iterator_next_request_kwargs()
+        try:
+            yield self
+            while True:
+                executor, exception = fetched.get()
+                if exception is not None:
+                    raise exception
+                if executor is None:
+                    break
+                yield executor
+        finally:
+            # a request already in flight cannot be aborted, wait for it so
+            # no work outlives the generator
+            stop.set()
+            worker.join()
 
-            if not next_request_kwargs:
-                break
+    def _get_iterator_total_pages(self):
+        return self._api.get_iterator_total_pages(self._data, self._response)
 
-            response = self.get(**next_request_kwargs)
-            executor = response()
-            iterator_list = executor._get_iterator_list()
+    def _get_iterator_page_request_kwargs(self, page_index):
+        return self._api.get_iterator_page_request_kwargs(
+            copy.copy(self._request_kwargs), self._data, self._response,
+            page_index)
+
+    def _fetch_page(self, page_index):
+        return self.get(**self._get_iterator_page_request_kwargs(page_index))()
+
+    def _parallel_page_executors(self, parallel, max_pages=None, ordered=True):
+        total_pages = self._get_iterator_total_pages() or 1
+        if max_pages is not None:
+            total_pages = min(total_pages, max_pages)
+
+        yield self
+
+        remaining = iter(range(1, total_pages))
+        pool = ThreadPoolExecutor(max_workers=parallel)
+        # at most ``parallel`` fetched or in flight pages are kept around
+        pending = deque()
+
+        def submit_next():
+            page_index = next(remaining, None)
+            if page_index is not None:
+                pending.append(pool.submit(self._fetch_page, page_index))
+
+        try:
+            for _ in range(parallel):
+                submit_next()
+
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+
+                executor = future.result()
+                submit_next()
+                yield executor
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def _get_page_executors(self, max_pages, prefetch, parallel, ordered):
+        if prefetch and parallel:
+            raise ValueError("prefetch and parallel can not be used together")
+        if (prefetch or parallel) and isinstance(self._data, ItemStream):
+            raise ValueError("Streamed responses can only be paged sequentially")
+
+        if parallel:
+            return self._parallel_page_executors(
+                parallel, max_pages=max_pages, ordered=ordered)
+        if prefetch:
+            return self._prefetched_page_executors(prefetch, max_pages=max_pages)
+        return self._page_executors(max_pages=max_pages)
+
+    def pages(self, max_pages=None, max_items=None, prefetch=0, parallel=0,
+              ordered=True, **kwargs):
+        page_executors = self._get_page_executors(max_pages, prefetch, parallel,
+                                                  ordered)
+        page_count = 0
+        item_count = 0
+        executor = None
+
+        try:
+            for executor in page_executors:
+                iterator_list = executor._get_iterator_list()
+                if not iterator_list:
+                    break
+
+                for item in iterator_list:
+                    if self._reached_max_limits(page_count, item_count,
+                                                max_pages, max_items):
+                        break
+                    yield self._wrap_in_tapioca(item)
+                    item_count += 1
+
+                page_count += 1
+
+                if self._reached_max_limits(page_count, item_count, max_pages,
+                                            max_items):
+                    break
+        finally:
+            page_executors.close()
+            if executor is not None and isinstance(executor._data, ItemStream):
+                executor._data.close()
 
     def open_docs(self):
         if not self._resource:
@@ -0,0 +1,477 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import asyncio
+import json
+import threading
+from urllib.parse import urlsplit
+
+import requests
+import requests.auth
+from requests.structures import CaseInsensitiveDict
+
+from .sessions import build_session
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class TransportResponse(object):
+    """
+    Response returned by transports which do not return a
+    ``requests.Response``, exposing the part of its API tapioca uses.
+    """
+
+    def __init__(self, status_code, headers=None, content=b'', url=None,
+                 encoding='utf-8'):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self._content = content
+        self.url = url
+        self.encoding = encoding
+
+    def __repr__(self):
+        return '<{} [{}]>'.format(self.__class__.__name__, self.status_code)
+
+    @property
+    def content(self):
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self, **kwargs):
+        return json.loads(self.content, **kwargs)
+
+    def iter_content(self, chunk_size=1):
+        content = self.content
+        if not chunk_size:
+            yield content
+            return
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        self.close()
+
+
+class HTTPXResponse(TransportResponse):
+    """
+    Wraps an ``httpx.Response``, which is available as ``raw``.
+    ``on_close`` is called once when the response is closed.
+    """
+
+    def __init__(self, response, on_close=None):
+        self.raw = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.encoding = response.encoding
+        self._on_close = on_close
+
+    @property
+    def content(self):
+        return self.raw.content
+
+    @property
+    def text(self):
+        return self.raw.text
+
+    def json(self, **kwargs):
+        return self.raw.json(**kwargs)
+
+    def iter_content(self, chunk_size=1):
+        return self.raw.iter_bytes(chunk_size=chunk_size)
+
+    def close(self):
+        # responses of async clients are read in full, so already closed
+        if not self.raw.is_closed:
+            self.raw.close()
+        self._closed()
+
+    async def aclose(self):
+        if not self.raw.is_closed:
+            await self.raw.aclose()
+        self._closed()
+
+    def _closed(self):
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+
+class Transport(object):
+    """
+    Performs requests for sync clients. ``request`` receives the same
+    arguments as ``requests.Session.request`` and must return a response
+    exposing ``status_code``, ``headers``, ``content``, ``text``,
+    ``json()``, ``iter_content()`` and ``close()``, like
+    ``TransportResponse``. A ``requests.Session`` can be used as is.
+    """
+
+    @classmethod
+    def from_pool_options(cls, **pool_options):
+        if pool_options:
+            raise ValueError("{} does not support connection pool "
+                             "options".format(cls.__name__))
+        return cls()
+
+    def request(self, method, url, **kwargs):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class AsyncTransport(object):
+    """
+    Performs requests for async clients. ``request`` receives the same
+    arguments as ``requests.Session.request`` and must return a response
+    exposing ``status_code``, ``headers``, ``content``, ``text``,
+    ``json()``, ``iter_content()`` and ``close()`` or ``aclose()``, like
+    ``TransportResponse``.
+    """
+
+    @classmethod
+    def from_pool_options(cls, **pool_options):
+        if pool_options:
+            raise ValueError("{} does not support connection pool "
+                             "options".format(cls.__name__))
+        return cls()
+
+    async def request(self, method, url, **kwargs):
+        raise NotImplementedError()
+
+    async def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    Sends requests through a ``requests.Session``. Subclass it to change
+    how requests are sent without replacing the session.
+    """
+
+    def __init__(self, session=None):
+        self.session = session if session is not None else requests.Session()
+
+    @classmethod
+    def from_pool_options(cls, **pool_options):
+        return cls(build_session(**pool_options))
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def _import_httpx():
+    if httpx is None:
+        raise ImportError('httpx is required for async clients and httpx '
+                          'transports, install it with `pip install httpx`')
+    return httpx
+
+
+def _get_httpx_limits(pool_connections=10, pool_maxsize=10, pool_block=True,
+                      keep_alive=True):
+    # httpx has a single pool for all hosts and always waits for a free
+    # connection, so ``pool_block`` has no effect
+    max_connections = pool_connections * pool_maxsize
+    return _import_httpx().Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections if keep_alive else 0)
+
+
+# requests kwargs httpx only takes when building the client, with the
+# values meaning the client defaults
+HTTPX_CLIENT_KWARGS = {'verify': True, 'cert': None, 'proxies': None}
+HTTPX_REQUEST_KWARGS = frozenset([
+    'content', 'data', 'files', 'json', 'params', 'headers', 'cookies', 'auth',
+    'follow_redirects', 'timeout', 'extensions', 'stream'])
+
+
+def _to_httpx_auth(auth):
+    if not isinstance(auth, requests.auth.AuthBase):
+        return auth
+    # subclasses, like HTTPProxyAuth, may set other headers
+    if type(auth) is requests.auth.HTTPBasicAuth:
+        return (auth.username, auth.password)
+    if type(auth) is requests.auth.HTTPDigestAuth:
+        return _import_httpx().DigestAuth(auth.username, auth.password)
+    raise ValueError("httpx transports do not support {} auth, use an "
+                     "httpx.Auth instead".format(type(auth).__name__))
+
+
+def _to_httpx_timeout(timeout):
+    if isinstance(timeout, tuple) and len(timeout) == 2:
+        # requests only has connect and read timeouts
+        connect, read = timeout
+        return _import_httpx().Timeout(None, connect=connect, read=read)
+    return timeout
+
+
+def _to_httpx_kwargs(kwargs):
+    """
+    Translates the kwargs of ``requests.Session.request`` to the ones of
+    ``httpx.Client.request``. Options httpx only takes when building the
+    client, like ``verify``, ``cert`` and ``proxies``, are rejected unless
+    they have their default value.
+    """
+    # requests sends str/bytes ``data`` as the raw body, httpx calls it
+    # ``content``
+    data = kwargs.get('data')
+    if isinstance(data, (str, bytes)):
+        kwargs['content'] = kwargs.pop('data')
+    elif data is None:
+        kwargs.pop('data', None)
+
+    if 'allow_redirects' in kwargs:
+        kwargs['follow_redirects'] = kwargs.pop('allow_redirects')
+    if 'auth' in kwargs:
+        kwargs['auth'] = _to_httpx_auth(kwargs['auth'])
+    if 'timeout' in kwargs:
+        kwargs['timeout'] = _to_httpx_timeout(kwargs['timeout'])
+
+    for name, default in HTTPX_CLIENT_KWARGS.items():
+        if name in kwargs and (kwargs.pop(name) or None) != default:
+            raise ValueError(
+                "httpx transports can not set {0} per request, build the "
+                "transport with it instead: HTTPXTransport({0}=...)".format(name))
+
+    unsupported = set(kwargs).difference(HTTPX_REQUEST_KWARGS)
+    if unsupported:
+        raise ValueError("httpx transports do not support the {} request "
+                         "arguments".format(', '.join(sorted(unsupported))))
+    return kwargs
+
+
+class HTTPXTransport(Transport):
+    """
+    Sends requests through an ``httpx.Client``, which also speaks HTTP/2
+    when built with ``http2=True`` and the ``h2`` package is installed.
+    """
+
+    def __init__(self, client=None, **client_kwargs):
+        if client is None:
+            client = _import_httpx().Client(**client_kwargs)
+        self.client = client
+
+    @classmethod
+    def from_pool_options(cls, **pool_options):
+        return cls(limits=_get_httpx_limits(**pool_options))
+
+    def request(self, method, url, **kwargs):
+        kwargs = _to_httpx_kwargs(kwargs)
+        if kwargs.pop('stream', False):
+            send_kwargs = {name: kwargs.pop(name)
+                           for name in ('auth', 'follow_redirects') if name in kwargs}
+            request = self.client.build_request(method, url, **kwargs)
+            return HTTPXResponse(self.client.send(request, stream=True,
+                                                  **send_kwargs))
+        return HTTPXResponse(self.client.request(method, url, **kwargs))
+
+    def close(self):
+        self.client.close()
+
+
+class HTTPXAsyncTransport(AsyncTransport):
+    """
+    Sends requests through an ``httpx.AsyncClient``. Streamed responses are
+    read in full before their items are parsed one by one, as items are
+    iterated synchronously.
+    """
+
+    def __init__(self, client=None, **client_kwargs):
+        if client is None:
+            client = _import_httpx().AsyncClient(**client_kwargs)
+        self.client = client
+
+    @classmethod
+    def from_pool_options(cls, **pool_options):
+        return cls(limits=_get_httpx_limits(**pool_options))
+
+    async def request(self, method, url, **kwargs):
+        kwargs = _to_httpx_kwargs(kwargs)
+        kwargs.pop('stream', None)
+        return HTTPXResponse(await self.client.request(method, url, **kwargs))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def _get_origin(url):
+    parts = urlsplit(url)
+    return parts.scheme, parts.netloc
+
+
+class HTTP2Transport(HTTPXTransport):
+    """
+    Sends requests through an ``httpx.Client`` speaking HTTP/2, so
+    concurrent requests to the same origin are multiplexed over a single
+    connection instead of opening one connection each. At most
+    ``max_concurrent_streams`` requests per origin are in flight, the
+    others wait for one of them to finish; streamed responses hold their
+    stream until they are closed. Set ``max_concurrent_streams`` on a
+    subclass to change it for transports built by tapioca. Origins not supporting HTTP/2 are
+    reached with HTTP/1.1.
+
+    Requires the ``h2`` package: ``pip install tapioca-wrapper[http2]``.
+    """
+
+    max_concurrent_streams = 100
+
+    def __init__(self, client=None, max_concurrent_streams=None, **client_kwargs):
+        if max_concurrent_streams is None:
+            max_concurrent_streams = self.max_concurrent_streams
+        if max_concurrent_streams < 1:
+            raise ValueError("max_concurrent_streams must be at least 1")
+        if client is None:
+            client = _import_httpx().Client(http2=True, **client_kwargs)
+        super(HTTP2Transport, self).__init__(client)
+        self.max_concurrent_streams = max_concurrent_streams
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_pool_options(cls, **pool_options):
+        return cls(limits=_get_httpx_limits(**pool_options))
+
+    def _get_streams(self, url):
+        origin = _get_origin(url)
+        streams = self._streams.get(origin)
+        if streams is None:
+            with self._lock:
+                streams = self._streams.setdefault(
+                    origin, threading.BoundedSemaphore(self.max_concurrent_streams))
+        return streams
+
+    def request(self, method, url, **kwargs):
+        streams = self._get_streams(url)
+        stream = kwargs.get('stream', False)
+
+        streams.acquire()
+        try:
+            response = super(HTTP2Transport, self).request(method, url, **kwargs)
+        except BaseException:
+            streams.release()
+            raise
+
+        if stream:
+            response._on_close = streams.release
+        else:
+            streams.release()
+        return response
+
+
+class HTTP2AsyncTransport(HTTPXAsyncTransport):
+    """
+    ``HTTP2Transport`` for async clients.
+    """
+
+    max_concurrent_streams = 100
+
+    def __init__(self, client=None, max_concurrent_streams=None, **client_kwargs):
+        if max_concurrent_streams is None:
+            max_concurrent_streams = self.max_concurrent_streams
+        if max_concurrent_streams < 1:
+            raise ValueError("max_concurrent_streams must be at least 1")
+        if client is None:
+            client = _import_httpx().AsyncClient(http2=True, **client_kwargs)
+        super(HTTP2AsyncTransport, self).__init__(client)
+        self.max_concurrent_streams = max_concurrent_streams
+        self._streams = {}
+
+    @classmethod
+    def from_pool_options(cls, **pool_options):
+        return cls(limits=_get_httpx_limits(**pool_options))
+
+    def _get_streams(self, url):
+        origin = _get_origin(url)
+        streams = self._streams.get(origin)
+        if streams is None:
+            streams = self._streams[origin] = asyncio.Semaphore(
+                self.max_concurrent_streams)
+        return streams
+
+    async def request(self, method, url, **kwargs):
+        async with self._get_streams(url):
+            return await super(HTTP2AsyncTransport, self).request(
+                method, url, **kwargs)
+
+
+class _InMemoryRoutes(object):
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def add(self, method, url, body=b'', status_code=200, headers=None,
+            content_type='application/json'):
+        """
+        Answers ``method`` requests to ``url`` with the given response.
+        Responses added for the same route are returned in order, the last
+        one for every following request.
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        headers = dict({'Content-Type': content_type}, **(headers or {}))
+        with self._lock:
+            self.routes.setdefault((method.upper(), url), []).append(
+                (status_code, headers, body))
+
+    def _respond(self, method, url, kwargs):
+        with self._lock:
+            self.calls.append((method, url, kwargs))
+            answers = self.routes.get((method.upper(), url))
+            if not answers:
+                raise requests.ConnectionError(
+                    "No response for {} {}".format(method, url))
+            status_code, headers, body = (answers.pop(0) if len(answers) > 1
+                                          else answers[0])
+        return TransportResponse(status_code, headers, body, url=url)
+
+
+class InMemoryTransport(_InMemoryRoutes, Transport):
+    """
+    Answers requests with the responses added for their method and URL,
+    without network; for tests and benchmarks. Sent requests are recorded
+    in ``calls`` as ``(method, url, kwargs)`` tuples, and requests without
+    a response raise ``requests.ConnectionError``.
+    """
+
+    def request(self, method, url, **kwargs):
+        return self._respond(method, url, kwargs)
+
+
+class InMemoryAsyncTransport(_InMemoryRoutes, AsyncTransport):
+    """
+    ``InMemoryTransport`` for async clients.
+    """
+
+    async def request(self, method, url, **kwargs):
+        response = self._respond(method, url, kwargs)
+        await asyncio.sleep(0)
+        return response
+
+
+def get_transport(session):
+    if httpx is not None and isinstance(session, httpx.Client):
+        return HTTPXTransport(client=session)
+    return session
+
+
+def get_async_transport(session):
+    if session is None:
+        return HTTPXAsyncTransport()
+    if isinstance(session, AsyncTransport):
+        return session
+    return HTTPXAsyncTransport(client=session)
@@ -0,0 +1,90 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import re
+from functools import lru_cache
+from string import Formatter
+from urllib.parse import quote
+
+
+_FIELD_ROOT_RE = re.compile(r'[.\[]')
+
+
+class MissingURLParamsError(KeyError, ValueError):
+    """
+    Raised when a URL template is filled without some of its params. It is
+    a ``KeyError``, like the error of ``str.format``, and a ``ValueError``.
+    """
+
+    def __init__(self, missing):
+        self.missing = tuple(sorted(missing))
+        super(MissingURLParamsError, self).__init__(
+            "Missing URL params: {}".format(', '.join(self.missing)))
+
+    def __str__(self):
+        # KeyError shows the repr of its message
+        return self.args[0]
+
+
+class _QuotingFormatter(Formatter):
+
+    def format_field(self, value, format_spec):
+        return quote(super(_QuotingFormatter, self).format_field(value, format_spec),
+                     safe='')
+
+
+_formatter = Formatter()
+_quoting_formatter = _QuotingFormatter()
+
+
+class URLTemplate(object):
+    """
+    A resource URL template parsed once to know the names of its
+    placeholders, which are filled with ``str.format`` semantics. Templates
+    only using plain ``{name}`` placeholders are filled with ``format_map``;
+    the others go through ``string.Formatter``.
+    """
+
+    __slots__ = ('template', 'fields', '_simple')
+
+    def __init__(self, template):
+        self.template = template
+        fields = []
+        simple = True
+
+        for literal_text, field_name, format_spec, conversion in \
+                _formatter.parse(template):
+            if field_name is None:
+                continue
+
+            root_name = _FIELD_ROOT_RE.split(field_name, 1)[0]
+            if (format_spec or conversion or root_name != field_name or
+                    not field_name.isidentifier()):
+                simple = False
+            fields.append(root_name)
+
+        self.fields = tuple(fields)
+        self._simple = simple
+
+    def fill(self, params, quote_params=False):
+        if self._simple:
+            if quote_params:
+                params = {field: quote(format(params[field]), safe='')
+                          for field in self.fields if field in params}
+            try:
+                return self.template.format_map(params)
+            except KeyError:
+                pass
+
+        missing = set(self.fields).difference(params)
+        if missing:
+            raise MissingURLParamsError(missing)
+
+        formatter = _quoting_formatter if quote_params else _formatter
+        return formatter.vformat(self.template, (), params)
+
+
+@lru_cache(maxsize=1024)
+def compile_url_template(template):
+    return URLTemplate(template)
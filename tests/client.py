@@ -2,12 +2,22 @@
 
 from __future__ import unicode_literals
 
+import requests
+
 from tapioca.adapters import (
     TapiocaAdapter, JSONAdapterMixin, XMLAdapterMixin,
     generate_wrapper_from_adapter)
 from tapioca.serializers import SimpleSerializer
 
 
+def build_response(status_code=200, headers=None, content=b'{}'):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = content
+    return response
+
+
 RESOURCE_MAPPING = {
     'test': {
         'resource': 'test/',
@@ -44,6 +54,9 @@ class TesterClientAdapter(JSONAdapterMixin, TapiocaAdapter):
     def get_iterator_list(self, response_data):
         return response_data['data']
 
+    def get_iterator_stream_path(self, response):
+        return 'data'
+
     def get_iterator_next_request_kwargs(self, iterator_request_kwargs,
                                          response_data, response):
         paging = response_data.get('paging')
@@ -94,6 +107,20 @@ class FailTokenRefreshClientAdapter(TokenRefreshClientAdapter):
 FailTokenRefreshClient = generate_wrapper_from_adapter(FailTokenRefreshClientAdapter)
 
 
+class PageNumberClientAdapter(TesterClientAdapter):
+
+    def get_iterator_total_pages(self, response_data, response):
+        return response_data['total_pages']
+
+    def get_iterator_page_request_kwargs(self, iterator_request_kwargs,
+                                         response_data, response, page_index):
+        iterator_request_kwargs['params'] = {'page': page_index + 1}
+        return iterator_request_kwargs
+
+
+PageNumberClient = generate_wrapper_from_adapter(PageNumberClientAdapter)
+
+
 class XMLClientAdapter(XMLAdapterMixin, TapiocaAdapter):
     api_root = 'https://api.example.org'
     resource_mapping = RESOURCE_MAPPING
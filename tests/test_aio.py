@@ -0,0 +1,495 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import asyncio
+import json
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from tapioca.adapters import generate_async_wrapper_from_adapter
+from tapioca.aio import AsyncTapiocaClient, AsyncTapiocaClientExecutor
+from tapioca.circuitbreaker import CLOSED, HALF_OPEN, CircuitBreaker
+from tapioca.exceptions import ClientError, ServerError
+from tapioca.hooks import Hooks
+from tapioca.ratelimit import RateLimiter
+from tapioca.retry import RetryPolicy
+from tapioca.transports import (
+    AsyncTransport, HTTPXAsyncTransport, TransportResponse)
+
+from tests.client import (
+    PageNumberClientAdapter, TesterClientAdapter, TokenRefreshClientAdapter)
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+AsyncTesterClient = generate_async_wrapper_from_adapter(TesterClientAdapter)
+AsyncTokenRefreshClient = generate_async_wrapper_from_adapter(TokenRefreshClientAdapter)
+AsyncPageNumberClient = generate_async_wrapper_from_adapter(PageNumberClientAdapter)
+
+
+class StubAsyncTransport(AsyncTransport):
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+
+    def add(self, method, url, body='', status=200):
+        self.routes.setdefault((method, url), []).append((status, body))
+
+    async def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        await asyncio.sleep(0)
+        answers = self.routes[(method, url)]
+        status, body = answers.pop(0) if len(answers) > 1 else answers[0]
+
+        return TransportResponse(status, {'Content-Type': 'application/json'},
+                                 body.encode('utf-8'), url=url)
+
+
+class TestAsyncTapiocaClient(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.transport = StubAsyncTransport()
+        self.wrapper = AsyncTesterClient(session=self.transport)
+
+    def test_navigation_returns_async_clients(self):
+        self.assertIsInstance(self.wrapper.test, AsyncTapiocaClient)
+        self.assertIsInstance(self.wrapper.test(), AsyncTapiocaClientExecutor)
+        self.assertEqual(self.wrapper.user(id='123').data,
+                         'https://api.example.org/user/123/')
+
+    async def test_get_request(self):
+        self.transport.add('GET', self.wrapper.test().data,
+                           body='{"data": {"key": "value"}}')
+
+        response = await self.wrapper.test().get()
+
+        self.assertIsInstance(response, AsyncTapiocaClient)
+        self.assertEqual(response.data.key().data, 'value')
+        self.assertEqual(response().status_code, 200)
+        self.assertIsInstance(response.data.key(), AsyncTapiocaClientExecutor)
+
+    async def test_post_request_serializes_data(self):
+        self.transport.add('POST', self.wrapper.test().data,
+                           body='{"data": {"key": "value"}}', status=201)
+
+        await self.wrapper.test().post(data={'key': 'value'})
+
+        method, url, kwargs = self.transport.calls[0]
+        self.assertEqual(json.loads(kwargs['data']), {'key': 'value'})
+        self.assertEqual(kwargs['headers']['Content-Type'], 'application/json')
+
+    async def test_raises_client_error(self):
+        self.transport.add('GET', self.wrapper.test().data,
+                           body='{"error": "bad request test"}', status=400)
+
+        with self.assertRaises(ClientError) as context:
+            await self.wrapper.test().get()
+
+        self.assertIn('bad request test', context.exception.args)
+
+    async def test_raises_server_error(self):
+        self.transport.add('DELETE', self.wrapper.test().data, status=500)
+
+        with self.assertRaises(ServerError):
+            await self.wrapper.test().delete()
+
+    async def test_concurrent_requests(self):
+        for i in range(50):
+            self.transport.add('GET', self.wrapper.user(id=i).data,
+                               body='{"id": %d}' % i)
+
+        responses = await asyncio.gather(
+            *[self.wrapper.user(id=i).get() for i in range(50)])
+
+        self.assertEqual([r.id().data for r in responses], list(range(50)))
+
+    async def test_batch(self):
+        for i in range(3):
+            self.transport.add('GET', self.wrapper.user(id=i).data,
+                               body='{"id": %d}' % i)
+        self.transport.add('GET', self.wrapper.user(id=3).data, status=404)
+
+        results = await self.wrapper.test().batch(
+            [self.wrapper.user(id=i) for i in range(4)], concurrency=2)
+
+        self.assertEqual([result.id().data for result in results[:3]], [0, 1, 2])
+        self.assertIsInstance(results[3], ClientError)
+
+    @unittest.skipIf(httpx is None, 'httpx is not installed')
+    async def test_batch_captures_connection_errors_per_item(self):
+        def handler(request):
+            if request.url.path == '/user/1/':
+                raise httpx.ConnectError('connection refused', request=request)
+            return httpx.Response(200, json={'path': request.url.path})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        wrapper = AsyncTesterClient(session=client)
+
+        results = await wrapper.test().batch([wrapper.user(id=i) for i in range(3)])
+
+        self.assertEqual(results[0].path().data, '/user/0/')
+        self.assertIsInstance(results[1], httpx.ConnectError)
+        self.assertEqual(results[2].path().data, '/user/2/')
+        await client.aclose()
+
+    async def test_batch_limits_concurrency(self):
+        in_flight = []
+        max_in_flight = []
+        request = self.transport.request
+
+        async def counting_request(method, url, **kwargs):
+            in_flight.append(url)
+            max_in_flight.append(len(in_flight))
+            try:
+                return await request(method, url, **kwargs)
+            finally:
+                in_flight.remove(url)
+
+        self.transport.request = counting_request
+        self.transport.add('POST', self.wrapper.test().data, body='{}')
+
+        results = await self.wrapper.test().batch(
+            [(self.wrapper.test(), {'data': {'i': i}}) for i in range(6)],
+            method='post', concurrency=2)
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(max(max_in_flight), 2)
+        self.assertEqual([json.loads(kwargs['data'])['i']
+                          for _, _, kwargs in self.transport.calls], list(range(6)))
+
+    async def test_retries_requests(self):
+        wrapper = AsyncTesterClient(session=self.transport,
+                                    retry=RetryPolicy(backoff_factor=0))
+        self.transport.add('GET', wrapper.test().data, status=503)
+        self.transport.add('GET', wrapper.test().data, body='{}')
+
+        with mock.patch.object(TransportResponse, 'close') as close:
+            response = await wrapper.test().get()
+
+        self.assertEqual(response().status_code, 200)
+        self.assertEqual(response().retries, 1)
+        close.assert_called_once_with()
+
+    async def test_rate_limited_requests(self):
+        limiter = RateLimiter(rate=1, burst=1)
+        wrapper = AsyncTesterClient(session=self.transport, rate_limiter=limiter)
+        self.transport.add('GET', wrapper.test().data, body='{}')
+
+        with mock.patch('tapioca.ratelimit.asyncio.sleep') as sleep:
+            await asyncio.gather(wrapper.test().get(), wrapper.test().get())
+
+        self.assertEqual([round(call[0][0]) for call in sleep.call_args_list if call[0][0]],
+                         [1])
+        self.assertEqual(limiter.wait_count, 1)
+
+    async def test_cancelled_trial_request_releases_the_circuit(self):
+        class HangingTransport(StubAsyncTransport):
+            hang = True
+
+            async def request(self, method, url, **kwargs):
+                if self.hang:
+                    await asyncio.Event().wait()
+                return await super(HangingTransport, self).request(
+                    method, url, **kwargs)
+
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        transport = HangingTransport()
+        wrapper = AsyncTesterClient(session=transport, circuit_breaker=breaker)
+        transport.add('GET', wrapper.test().data, body='{}')
+        api_root = wrapper._api.get_api_root({})
+        breaker.before_request(api_root)
+        breaker.record(api_root, requests.ConnectionError())
+
+        request = asyncio.ensure_future(wrapper.test().get())
+        await asyncio.sleep(0)
+        request.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await request
+
+        self.assertEqual(breaker.get_state(api_root), HALF_OPEN)
+        transport.hang = False
+        response = await wrapper.test().get()
+        self.assertEqual(response().status_code, 200)
+        self.assertEqual(breaker.get_state(api_root), CLOSED)
+
+    async def test_hooks(self):
+        calls = []
+        hooks = Hooks(before_request=lambda event: calls.append('before_request'),
+                      on_retry=lambda event: calls.append('on_retry'),
+                      after_response=calls.append)
+        wrapper = AsyncTesterClient(session=self.transport, hooks=hooks,
+                                    retry=RetryPolicy(backoff_factor=0))
+        self.transport.add('GET', wrapper.test().data, status=503)
+        self.transport.add('GET', wrapper.test().data, body='{"a": 1}')
+
+        await wrapper.test().get()
+
+        self.assertEqual(calls[:2], ['before_request', 'on_retry'])
+        event = calls[2]
+        self.assertEqual(event.status_code, 200)
+        self.assertEqual(event.retries, 1)
+        self.assertEqual(event.response_bytes, len('{"a": 1}'))
+        self.assertEqual(set(event.timings.durations),
+                         {'serialize', 'network', 'decode', 'wrap'})
+
+    async def test_pages(self):
+        next_url = 'http://api.example.org/next_batch'
+        self.transport.add('GET', self.wrapper.test().data,
+                           body='{"data": [{"key": "a"}], "paging": {"next": "%s"}}' % next_url)
+        self.transport.add('GET', next_url,
+                           body='{"data": [{"key": "b"}, {"key": "c"}], "paging": {"next": ""}}')
+
+        response = await self.wrapper.test().get()
+
+        keys = [item.key().data async for item in response().pages()]
+
+        self.assertEqual(keys, ['a', 'b', 'c'])
+
+    async def test_pages_with_max_items(self):
+        next_url = 'http://api.example.org/next_batch'
+        self.transport.add('GET', self.wrapper.test().data,
+                           body='{"data": [{"key": "a"}], "paging": {"next": "%s"}}' % next_url)
+        self.transport.add('GET', next_url,
+                           body='{"data": [{"key": "b"}, {"key": "c"}], "paging": {"next": ""}}')
+
+        response = await self.wrapper.test().get()
+
+        keys = [item.key().data async for item in response().pages(max_items=2)]
+
+        self.assertEqual(keys, ['a', 'b'])
+
+    async def test_pages_stop_requesting_once_max_items_is_reached(self):
+        self._add_numbered_pages(3)
+
+        response = await self.wrapper.test().get()
+
+        pages = [item.page().data async for item in response().pages(max_items=2)]
+
+        self.assertEqual(pages, [0, 0])
+        self.assertEqual(len(self.transport.calls), 1)
+
+    def _add_numbered_pages(self, page_count):
+        url = self.wrapper.test().data
+        for page in range(page_count):
+            next_url = 'http://api.example.org/page/%d' % (page + 1)
+            if page == page_count - 1:
+                next_url = ''
+            self.transport.add('GET', url, body=json.dumps({
+                'data': [{'page': page}, {'page': page}],
+                'paging': {'next': next_url}}))
+            url = next_url
+
+    async def test_prefetched_pages(self):
+        self._add_numbered_pages(4)
+
+        response = await self.wrapper.test().get()
+
+        pages = [item.page().data
+                 async for item in response().pages(prefetch=2, max_pages=3)]
+
+        self.assertEqual(pages, [0, 0, 1, 1, 2, 2])
+        self.assertEqual(len(self.transport.calls), 3)
+
+    async def test_closing_prefetched_pages_stops_fetching(self):
+        self._add_numbered_pages(10)
+
+        response = await self.wrapper.test().get()
+
+        items = response().pages(prefetch=1)
+        await items.__anext__()
+        await items.aclose()
+        calls_after_close = len(self.transport.calls)
+        await asyncio.sleep(0.01)
+
+        self.assertLessEqual(calls_after_close, 3)
+        self.assertEqual(len(self.transport.calls), calls_after_close)
+
+    async def test_prefetched_pages_propagate_errors(self):
+        next_url = 'http://api.example.org/next_batch'
+        self.transport.add('GET', self.wrapper.test().data,
+                           body='{"data": [{"key": "a"}], "paging": {"next": "%s"}}' % next_url)
+        self.transport.add('GET', next_url, body='{}', status=500)
+
+        response = await self.wrapper.test().get()
+
+        with self.assertRaises(ServerError):
+            async for item in response().pages(prefetch=2):
+                pass
+
+    async def test_parallel_and_prefetch_are_exclusive(self):
+        client = self.wrapper._wrap_in_tapioca({'data': []})
+
+        with self.assertRaises(ValueError):
+            await client().pages(parallel=2, prefetch=2).__anext__()
+
+
+class TestAsyncTokenRefreshing(unittest.IsolatedAsyncioTestCase):
+
+    async def test_token_expired_automatically_refresh_authentication(self):
+        transport = StubAsyncTransport()
+        wrapper = AsyncTokenRefreshClient(token='token', session=transport,
+                                          refresh_token_by_default=True)
+        transport.add('POST', wrapper.test().data,
+                      body='{"error": "Token expired"}', status=401)
+        transport.add('POST', wrapper.test().data, body='{}', status=201)
+
+        response = await wrapper.test().post()
+
+        self.assertEqual(response().status_code, 201)
+        self.assertEqual(response().refresh_data, 'new_token')
+        self.assertEqual(response._api_params['token'], 'new_token')
+
+    async def test_awaitable_refresh_authentication(self):
+        class AsyncRefreshAdapter(TokenRefreshClientAdapter):
+            async def refresh_authentication(self, api_params, *args, **kwargs):
+                api_params['token'] = 'async_token'
+                return 'async_token'
+
+        transport = StubAsyncTransport()
+        wrapper = generate_async_wrapper_from_adapter(AsyncRefreshAdapter)(
+            token='token', session=transport, refresh_token_by_default=True)
+        transport.add('GET', wrapper.test().data, status=401)
+        transport.add('GET', wrapper.test().data, body='{}')
+
+        response = await wrapper.test().get()
+
+        self.assertEqual(response().refresh_data, 'async_token')
+
+    async def test_concurrent_expired_requests_refresh_authentication_once(self):
+        refreshes = []
+
+        class CountingRefreshAdapter(TokenRefreshClientAdapter):
+            async def refresh_authentication(self, api_params, *args, **kwargs):
+                refreshes.append(api_params['token'])
+                await asyncio.sleep(0)
+                api_params['token'] = 'new_token'
+                return 'new_token'
+
+        transport = StubAsyncTransport()
+        wrapper = generate_async_wrapper_from_adapter(CountingRefreshAdapter)(
+            token='token', session=transport, refresh_token_by_default=True)
+        for _ in range(5):
+            transport.add('GET', wrapper.test().data, status=401)
+        transport.add('GET', wrapper.test().data, body='{}')
+
+        responses = await asyncio.gather(*[wrapper.test().get() for _ in range(5)])
+
+        self.assertEqual([response().status_code for response in responses], [200] * 5)
+        self.assertEqual(refreshes, ['token'])
+
+    async def test_refreshes_authentication_before_expiration(self):
+        class ExpiringTokenAdapter(TokenRefreshClientAdapter):
+            def get_authentication_expiration(self, api_params):
+                return 0 if api_params['token'] == 'token' else time.time() + 3600
+
+        transport = StubAsyncTransport()
+        wrapper = generate_async_wrapper_from_adapter(ExpiringTokenAdapter)(
+            token='token', session=transport, refresh_token_by_default=True)
+        transport.add('GET', wrapper.test().data, body='{}')
+
+        response = await wrapper.test().get()
+
+        self.assertEqual(response().refresh_data, 'new_token')
+        self.assertEqual(len(transport.calls), 1)
+
+    async def test_failed_refresh_before_expiration_keeps_current_authentication(self):
+        class FailingRefreshAdapter(TokenRefreshClientAdapter):
+            def get_authentication_expiration(self, api_params):
+                return time.time() + 30
+
+            async def refresh_authentication(self, api_params, *args, **kwargs):
+                raise ConnectionError('auth server is down')
+
+        transport = StubAsyncTransport()
+        wrapper = generate_async_wrapper_from_adapter(FailingRefreshAdapter)(
+            token='token', session=transport, refresh_token_by_default=True)
+        transport.add('GET', wrapper.test().data, body='{}')
+
+        response = await wrapper.test().get()
+
+        self.assertEqual(response().status_code, 200)
+        self.assertEqual(response._api_params['token'], 'token')
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class TestHTTPXAsyncTransport(unittest.IsolatedAsyncioTestCase):
+
+    async def test_requests_kwargs_are_translated(self):
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return httpx.Response(200, json={'data': {'key': 'value'}})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        wrapper = AsyncTesterClient(session=client)
+
+        response = await wrapper.test().post(data={'key': 'value'},
+                                             params={'q': '1'})
+
+        self.assertIsInstance(wrapper._session, HTTPXAsyncTransport)
+        self.assertEqual(response.data.key().data, 'value')
+        self.assertEqual(json.loads(sent[0].content), {'key': 'value'})
+        self.assertEqual(sent[0].url.params['q'], '1')
+        await wrapper._session.close()
+
+    async def test_streamed_responses(self):
+        def handler(request):
+            return httpx.Response(200, json={'data': [{'key': 'a'}, {'key': 'b'}]})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        wrapper = AsyncTesterClient(session=client)
+
+        response = await wrapper.test().get(stream=True)
+
+        self.assertEqual([item.key().data for item in response()], ['a', 'b'])
+        await wrapper._session.close()
+
+    async def test_parallel_pages(self):
+        total_pages = 6
+
+        async def handler(request):
+            page = int(request.url.params.get('page', 1))
+            # later pages answer faster to shuffle completion order
+            await asyncio.sleep(0.01 * (total_pages - page))
+            return httpx.Response(200, json={'data': [{'page': page}],
+                                             'total_pages': total_pages})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        wrapper = AsyncPageNumberClient(session=client)
+        response = await wrapper.test().get()
+
+        ordered = [item.page().data
+                   async for item in response().pages(parallel=3)]
+        as_completed = [item.page().data
+                        async for item in response().pages(parallel=3, ordered=False)]
+        limited = [item.page().data
+                   async for item in response().pages(parallel=4, max_pages=3)]
+
+        self.assertEqual(ordered, [1, 2, 3, 4, 5, 6])
+        self.assertNotEqual(as_completed, ordered)
+        self.assertEqual(sorted(as_completed), ordered)
+        self.assertEqual(limited, [1, 2, 3])
+        await wrapper._session.close()
+
+    def test_pool_options_configure_httpx_limits(self):
+        with mock.patch('httpx.AsyncClient') as async_client:
+            wrapper = AsyncTesterClient(pool_connections=2, pool_maxsize=50,
+                                        keep_alive=False)
+
+        self.assertIsInstance(wrapper._session, HTTPXAsyncTransport)
+        limits = async_client.call_args[1]['limits']
+        self.assertEqual(limits.max_connections, 100)
+        self.assertEqual(limits.max_keepalive_connections, 0)
+
+    def test_share_session_is_not_supported(self):
+        with self.assertRaises(ValueError):
+            AsyncTesterClient(share_session=True)
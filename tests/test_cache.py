@@ -0,0 +1,326 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import responses
+from requests.auth import HTTPBasicAuth
+
+from tapioca.cache import (
+    CacheEntry, MemoryCache, FileCache, build_cache_entry, get_cache_key,
+    get_expiration_time)
+
+from tests.client import TesterClient, build_response
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_get_and_set(self):
+        cache = MemoryCache()
+        entry = CacheEntry({'key': 'value'}, None)
+
+        cache.set('key', entry)
+
+        self.assertEqual(cache.get('key').data, {'key': 'value'})
+        self.assertIsNone(cache.get('missing'))
+
+    def test_hits_get_their_own_copy_of_the_data(self):
+        cache = MemoryCache()
+        data = {'items': [1]}
+        cache.set('key', CacheEntry(data, None, etag='"abc"'))
+
+        data['items'].append(2)
+        cache.get('key').data['items'].append(3)
+        entry = cache.get('key')
+
+        self.assertEqual(entry.data, {'items': [1]})
+        self.assertEqual(entry.etag, '"abc"')
+
+    def test_discards_least_recently_used_entries(self):
+        cache = MemoryCache(maxsize=2)
+        cache.set('a', CacheEntry(1, None))
+        cache.set('b', CacheEntry(2, None))
+        cache.get('a')
+
+        cache.set('c', CacheEntry(3, None))
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a').data, 1)
+        self.assertEqual(cache.get('c').data, 3)
+
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_entries_survive_new_instances(self):
+        response = build_response(headers={'ETag': '"abc"'})
+        FileCache(self.directory).set('key', CacheEntry({'a': 1}, response,
+                                                        etag='"abc"'))
+
+        entry = FileCache(self.directory).get('key')
+
+        self.assertEqual(entry.data, {'a': 1})
+        self.assertEqual(entry.etag, '"abc"')
+        self.assertEqual(entry.response.status_code, 200)
+
+    def test_delete_and_clear(self):
+        cache = FileCache(self.directory)
+        cache.set('a', CacheEntry(1, None))
+        cache.set('b', CacheEntry(2, None))
+
+        cache.delete('a')
+        self.assertIsNone(cache.get('a'))
+
+        cache.clear()
+        self.assertIsNone(cache.get('b'))
+
+
+class TestCacheHelpers(unittest.TestCase):
+
+    def test_cache_key_includes_sorted_params(self):
+        key = get_cache_key('get', {'url': 'https://api.example.org/test/',
+                                    'params': {'b': 2, 'a': 1}})
+
+        self.assertTrue(key.endswith(' GET https://api.example.org/test/?a=1&b=2'))
+
+    def test_cache_key_depends_on_credentials(self):
+        url = 'https://api.example.org/test/'
+
+        def key(headers=None, auth=None, api_params=None):
+            return get_cache_key('GET', {'url': url, 'headers': headers,
+                                         'auth': auth}, api_params)
+
+        self.assertEqual(key(), key(headers={'Accept': 'application/json'}))
+        self.assertEqual(key(headers={'Authorization': 'alice'}),
+                         key(headers={'authorization': 'alice'}))
+        self.assertEqual(key(auth=HTTPBasicAuth('alice', 'secret')),
+                         key(auth=HTTPBasicAuth('alice', 'secret')))
+        self.assertEqual(len({key(),
+                              key(headers={'Authorization': 'alice'}),
+                              key(headers={'Authorization': 'bob'}),
+                              key(headers={'Cookie': 'session=1'}),
+                              key(auth=('alice', 'secret')),
+                              key(auth=HTTPBasicAuth('bob', 'secret')),
+                              key(api_params={'token': 'alice'}),
+                              key(api_params={'token': 'bob'})}), 8)
+
+    def test_cache_key_is_none_for_unsafe_methods(self):
+        self.assertIsNone(get_cache_key('POST', {'url': 'https://api.example.org/'}))
+
+    def test_expiration_from_max_age(self):
+        response = build_response(headers={'Cache-Control': 'public, max-age=60',
+                                           'Age': '10'})
+
+        self.assertEqual(get_expiration_time(response, now=1000), 1050)
+
+    def test_expiration_from_expires(self):
+        response = build_response(headers={'Expires': 'Thu, 01 Jan 1970 00:16:40 GMT'})
+
+        self.assertEqual(get_expiration_time(response, now=1), 1000)
+
+    def test_no_store_is_not_cached(self):
+        response = build_response(headers={'Cache-Control': 'no-store',
+                                           'ETag': '"abc"'})
+
+        self.assertIsNone(get_expiration_time(response))
+        self.assertIsNone(build_cache_entry({}, response))
+
+    def test_stale_response_without_validators_is_not_cached(self):
+        self.assertIsNone(build_cache_entry({}, build_response()))
+
+    def test_stale_response_with_validators_is_cached_for_revalidation(self):
+        response = build_response(headers={'Cache-Control': 'no-cache',
+                                           'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+
+        entry = build_cache_entry({}, response)
+
+        self.assertFalse(entry.is_fresh())
+        self.assertEqual(entry.get_conditional_headers(),
+                         {'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+
+    def test_entries_match_the_headers_responses_vary_on(self):
+        response = build_response(headers={'Cache-Control': 'max-age=60',
+                                           'Vary': 'Accept-Language'})
+
+        entry = build_cache_entry({}, response,
+                                  request_headers={'Accept-Language': 'en'})
+
+        self.assertTrue(entry.matches({'accept-language': 'en'}))
+        self.assertFalse(entry.matches({'Accept-Language': 'pt'}))
+        self.assertFalse(entry.matches(None))
+
+    def test_vary_star_is_not_cached(self):
+        response = build_response(headers={'Cache-Control': 'max-age=60',
+                                           'Vary': '*'})
+
+        self.assertIsNone(build_cache_entry({}, response))
+
+    def test_error_responses_are_not_cached(self):
+        response = build_response(status_code=404,
+                                  headers={'Cache-Control': 'max-age=60'})
+
+        self.assertIsNone(build_cache_entry({}, response))
+
+
+class TestCachedRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = MemoryCache()
+        self.wrapper = TesterClient(cache=self.cache)
+
+    @responses.activate
+    def test_fresh_responses_are_served_from_cache_without_decoding(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"key": "value"}', status=200,
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+
+        self.wrapper.test().get()
+        with mock.patch.object(self.wrapper._api, 'response_to_native') as decode:
+            response = self.wrapper.test().get()
+
+        self.assertEqual(len(responses.calls), 1)
+        decode.assert_not_called()
+        self.assertEqual(response.key().data, 'value')
+        self.assertEqual(response().status_code, 200)
+
+    @responses.activate
+    def test_mutating_cached_responses_does_not_change_the_cache(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": [1]}', status=200,
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+
+        self.wrapper.test().get().data().data.append('mutated')
+        self.wrapper.test().get().data().data.append('mutated')
+        response = self.wrapper.test().get()
+
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(response.data().data, [1])
+
+    @responses.activate
+    def test_query_params_are_part_of_the_cache_key(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"key": "value"}', status=200,
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+
+        self.wrapper.test().get(params={'page': 1})
+        self.wrapper.test().get(params={'page': 2})
+
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_credentials_do_not_share_cached_responses(self):
+        def request_callback(request):
+            return (200, {'Cache-Control': 'max-age=60'},
+                    '{"user": "%s"}' % request.headers['Authorization'])
+
+        responses.add_callback(responses.GET, self.wrapper.test().data,
+                               callback=request_callback,
+                               content_type='application/json')
+        other_wrapper = TesterClient(cache=self.cache)
+
+        alice = self.wrapper.test().get(headers={'Authorization': 'alice'})
+        bob = other_wrapper.test().get(headers={'Authorization': 'bob'})
+        cached_alice = other_wrapper.test().get(headers={'Authorization': 'alice'})
+
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(alice.user().data, 'alice')
+        self.assertEqual(bob.user().data, 'bob')
+        self.assertEqual(cached_alice.user().data, 'alice')
+
+    @responses.activate
+    def test_api_params_do_not_share_cached_responses(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"key": "value"}', status=200,
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+
+        TesterClient(cache=self.cache, token='alice').test().get()
+        TesterClient(cache=self.cache, token='bob').test().get()
+        TesterClient(cache=self.cache, token='alice').test().get()
+
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_responses_are_reused_for_the_headers_they_vary_on(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"key": "value"}', status=200,
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60',
+                               'Vary': 'Accept-Language'})
+
+        self.wrapper.test().get(headers={'Accept-Language': 'en'})
+        self.wrapper.test().get(headers={'Accept-Language': 'en'})
+        self.wrapper.test().get(headers={'Accept-Language': 'pt'})
+
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_stale_responses_are_revalidated(self):
+        url = self.wrapper.test().data
+        responses.add(responses.GET, url,
+                      body='{"key": "value"}', status=200,
+                      content_type='application/json',
+                      headers={'ETag': '"v1"', 'Cache-Control': 'no-cache'})
+        responses.add(responses.GET, url, status=304,
+                      headers={'Cache-Control': 'max-age=60'})
+
+        self.wrapper.test().get()
+        response = self.wrapper.test().get()
+        self.wrapper.test().get()
+
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(responses.calls[1].request.headers['If-None-Match'], '"v1"')
+        self.assertEqual(response.key().data, 'value')
+        self.assertEqual(response().status_code, 200)
+
+    @responses.activate
+    def test_expired_responses_are_fetched_again(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"key": "value"}', status=200,
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+
+        self.wrapper.test().get()
+        with mock.patch('tapioca.cache.time.time', return_value=time.time() + 61):
+            self.wrapper.test().get()
+
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_unsafe_methods_invalidate_cached_url(self):
+        url = self.wrapper.test().data
+        responses.add(responses.GET, url, body='{"key": "value"}', status=200,
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+        responses.add(responses.POST, url, body='{}', status=201,
+                      content_type='application/json')
+
+        self.wrapper.test().get()
+        self.wrapper.test().post(data={'key': 'other'})
+        self.wrapper.test().get()
+
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_clients_without_cache_always_request(self):
+        wrapper = TesterClient()
+        responses.add(responses.GET, wrapper.test().data,
+                      body='{"key": "value"}', status=200,
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+
+        wrapper.test().get()
+        wrapper.test().get()
+
+        self.assertEqual(len(responses.calls), 2)
@@ -0,0 +1,143 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import unittest
+from unittest import mock
+
+import requests
+import responses
+
+from tapioca.circuitbreaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from tapioca.exceptions import (
+    CircuitOpenError, ClientError, ResponseProcessException, ServerError, TapiocaException)
+
+from tests.client import TesterClient
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('tapioca.circuitbreaker.time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10)
+
+    def fail(self, key='api', exception=None):
+        self.breaker.before_request(key)
+        self.breaker.record(key, exception or requests.ConnectionError())
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail()
+        self.assertEqual(self.breaker.get_state('api'), CLOSED)
+
+        self.fail()
+        self.assertEqual(self.breaker.get_state('api'), OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request('api')
+
+        self.assertEqual(self.breaker.get_state('other_api'), CLOSED)
+
+    def test_successes_reset_failures(self):
+        self.fail()
+        self.breaker.before_request('api')
+        self.breaker.record('api')
+        self.fail()
+
+        self.assertEqual(self.breaker.get_state('api'), CLOSED)
+
+    def test_only_server_and_connection_errors_are_failures(self):
+        self.assertTrue(self.breaker.is_failure(ResponseProcessException(ServerError, None)))
+        self.assertTrue(self.breaker.is_failure(requests.Timeout()))
+        self.assertFalse(self.breaker.is_failure(ResponseProcessException(ClientError, None)))
+        self.assertFalse(self.breaker.is_failure(ValueError()))
+
+    def test_half_open_after_recovery_timeout(self):
+        self.fail()
+        self.fail()
+        self.now += 10
+
+        self.assertEqual(self.breaker.get_state('api'), HALF_OPEN)
+        self.breaker.before_request('api')
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request('api')
+
+        self.breaker.record('api')
+        self.assertEqual(self.breaker.get_state('api'), CLOSED)
+
+    def test_interrupted_trial_is_released(self):
+        self.fail()
+        self.fail()
+        self.now += 10
+
+        with self.assertRaises(KeyboardInterrupt):
+            with self.breaker.guard('api'):
+                raise KeyboardInterrupt()
+
+        self.assertEqual(self.breaker.get_state('api'), HALF_OPEN)
+        with self.breaker.guard('api'):
+            pass
+        self.assertEqual(self.breaker.get_state('api'), CLOSED)
+
+    def test_failed_trial_opens_the_circuit_again(self):
+        self.fail()
+        self.fail()
+        self.now += 10
+
+        self.fail()
+
+        self.assertEqual(self.breaker.get_state('api'), OPEN)
+        self.now += 9
+        self.assertEqual(self.breaker.get_state('api'), OPEN)
+
+
+class TestCircuitBreakerRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2)
+        self.wrapper = TesterClient(circuit_breaker=self.breaker)
+
+    @responses.activate
+    def test_fails_fast_when_open(self):
+        responses.add(responses.GET, self.wrapper.test().data, status=503, body='{}',
+                      content_type='application/json')
+
+        for _ in range(2):
+            with self.assertRaises(ServerError):
+                self.wrapper.test().get()
+
+        with self.assertRaises(CircuitOpenError) as context:
+            self.wrapper.test().get()
+
+        self.assertIsInstance(context.exception, TapiocaException)
+        self.assertIsNone(context.exception.status_code)
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(self.breaker.get_state('https://api.example.org'), OPEN)
+
+    @responses.activate
+    def test_circuits_are_kept_per_api_root(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body=requests.ConnectionError())
+        responses.add(responses.GET, self.wrapper.another_root().data, body='{}',
+                      content_type='application/json')
+
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.wrapper.test().get()
+
+        self.wrapper.another_root().get()
+
+        self.assertEqual(self.breaker.get_state('https://api.example.org'), OPEN)
+        self.assertEqual(self.breaker.get_state('https://api.another.com/'), CLOSED)
+
+    @responses.activate
+    def test_client_errors_do_not_open_the_circuit(self):
+        responses.add(responses.GET, self.wrapper.test().data, status=404, body='{}',
+                      content_type='application/json')
+
+        for _ in range(3):
+            with self.assertRaises(ClientError):
+                self.wrapper.test().get()
+
+        self.assertEqual(self.breaker.get_state('https://api.example.org'), CLOSED)
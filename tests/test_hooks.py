@@ -0,0 +1,235 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import time
+import unittest
+from unittest import mock
+
+import requests
+import responses
+
+from tapioca.adapters import generate_wrapper_from_adapter
+from tapioca.cache import MemoryCache
+from tapioca.exceptions import ClientError
+from tapioca.hooks import Hooks, RequestTimings, get_body_size
+from tapioca.retry import RetryPolicy
+
+from tests.client import TesterClient, TokenRefreshClientAdapter
+
+
+TokenRefreshClient = generate_wrapper_from_adapter(TokenRefreshClientAdapter)
+
+
+class ExpiringTokenAdapter(TokenRefreshClientAdapter):
+
+    def get_authentication_expiration(self, api_params):
+        return 0 if api_params['token'] == 'token' else time.time() + 3600
+
+
+ExpiringTokenClient = generate_wrapper_from_adapter(ExpiringTokenAdapter)
+
+
+class RecordingCollector(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def before_request(self, event):
+        self.calls.append(('before_request', event.status_code))
+
+    def after_response(self, event):
+        self.calls.append(('after_response', event.status_code))
+
+    def on_error(self, event):
+        self.calls.append(('on_error', event.status_code))
+
+    def on_retry(self, event):
+        self.calls.append(('on_retry', event.status_code))
+
+    def on_auth_refresh(self, event):
+        self.calls.append(('on_auth_refresh', event.refresh_data))
+
+
+class TestRequestTimings(unittest.TestCase):
+
+    def test_durations_only_include_stopped_phases(self):
+        timings = RequestTimings()
+        with mock.patch('tapioca.hooks.time.monotonic', side_effect=[1, 3, 4]):
+            timings.start('serialize')
+            timings.stop('serialize')
+            timings.start('network')
+
+        self.assertEqual(timings.durations, {'serialize': 2})
+        self.assertEqual(timings.get_duration('serialize'), 2)
+        self.assertIsNone(timings.get_duration('network'))
+        self.assertIsNone(timings.get_duration('decode'))
+
+    def test_finish_stops_running_phases(self):
+        timings = RequestTimings()
+        with mock.patch('tapioca.hooks.time.monotonic', side_effect=[1, 5]):
+            timings.start('network')
+            timings.finish()
+
+        self.assertEqual(timings.durations, {'network': 4})
+
+
+class TestHooks(unittest.TestCase):
+
+    def test_unknown_events_are_rejected(self):
+        with self.assertRaises(ValueError):
+            Hooks(on_request=print)
+
+    def test_callbacks_and_collectors(self):
+        calls = []
+        collector = RecordingCollector()
+        hooks = Hooks(collectors=[collector], after_response=calls.append)
+
+        hooks.emit('after_response', mock.Mock(status_code=200))
+        hooks.emit('on_retry', mock.Mock(status_code=503))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(collector.calls, [('after_response', 200),
+                                           ('on_retry', 503)])
+
+    def test_get_body_size(self):
+        self.assertEqual(get_body_size('çá'), 4)
+        self.assertEqual(get_body_size(b'abc'), 3)
+        self.assertIsNone(get_body_size(None))
+        self.assertIsNone(get_body_size(iter([b'abc'])))
+
+
+class TestRequestHooks(unittest.TestCase):
+
+    def setUp(self):
+        self.collector = RecordingCollector()
+        self.events = []
+        self.hooks = Hooks(collectors=[self.collector],
+                           after_response=self.events.append,
+                           on_error=self.events.append)
+        self.wrapper = TesterClient(hooks=self.hooks)
+
+    @responses.activate
+    def test_successful_request(self):
+        responses.add(responses.POST, self.wrapper.test().data,
+                      body='{"data": {"key": "value"}}',
+                      content_type='application/json')
+
+        self.wrapper.test().post(data={'key': 'value'})
+
+        self.assertEqual(self.collector.calls, [('before_request', None),
+                                                ('after_response', 200)])
+        event = self.events[0]
+        self.assertEqual(event.resource_name, 'test')
+        self.assertEqual(event.method, 'POST')
+        self.assertEqual(event.url, self.wrapper.test().data)
+        self.assertEqual(event.request_bytes,
+                         len(responses.calls[0].request.body))
+        self.assertEqual(event.response_bytes, len('{"data": {"key": "value"}}'))
+        self.assertEqual(set(event.timings.durations),
+                         {'serialize', 'network', 'decode', 'wrap'})
+
+    @responses.activate
+    def test_client_error(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"error": "bad"}', status=400,
+                      content_type='application/json')
+
+        with self.assertRaises(ClientError) as context:
+            self.wrapper.test().get()
+
+        self.assertEqual(self.collector.calls, [('before_request', None),
+                                                ('on_error', 400)])
+        self.assertIs(self.events[0].exception, context.exception)
+
+    def test_connection_error(self):
+        with mock.patch.object(requests.Session, 'request',
+                               side_effect=requests.ConnectionError()):
+            with self.assertRaises(requests.ConnectionError):
+                self.wrapper.test().get()
+
+        self.assertEqual(self.collector.calls, [('before_request', None),
+                                                ('on_error', None)])
+        self.assertIn('network', self.events[0].timings.durations)
+
+    @responses.activate
+    def test_retries(self):
+        wrapper = TesterClient(hooks=self.hooks,
+                               retry=RetryPolicy(backoff_factor=0))
+        responses.add(responses.GET, wrapper.test().data, status=503)
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      content_type='application/json')
+
+        wrapper.test().get()
+
+        self.assertEqual(self.collector.calls, [('before_request', None),
+                                                ('on_retry', 503),
+                                                ('after_response', 200)])
+        self.assertEqual(self.events[0].retries, 1)
+
+    @responses.activate
+    def test_auth_refresh_and_replay(self):
+        wrapper = TokenRefreshClient(hooks=self.hooks,
+                                     refresh_token_by_default=True)
+        responses.add(responses.GET, wrapper.test().data, status=401,
+                      body='{"error": "expired"}', content_type='application/json')
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      content_type='application/json')
+
+        with mock.patch.object(TokenRefreshClientAdapter, 'refresh_authentication',
+                               return_value='new token'):
+            wrapper.test().get()
+
+        self.assertEqual(self.collector.calls, [('before_request', None),
+                                                ('on_auth_refresh', 'new token'),
+                                                ('on_error', 401),
+                                                ('before_request', None),
+                                                ('after_response', 200)])
+        self.assertIn('auth_refresh', self.events[0].timings.durations)
+
+    @responses.activate
+    def test_auth_refresh_before_request(self):
+        wrapper = ExpiringTokenClient(token='token', hooks=self.hooks,
+                                      refresh_token_by_default=True)
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      content_type='application/json')
+
+        wrapper.test().get()
+
+        self.assertEqual(self.collector.calls, [('before_request', None),
+                                                ('on_auth_refresh', 'new_token'),
+                                                ('after_response', 200)])
+        self.assertIn('auth_refresh', self.events[0].timings.durations)
+
+    @responses.activate
+    def test_cached_responses(self):
+        wrapper = TesterClient(hooks=self.hooks, cache=MemoryCache())
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+
+        wrapper.test().get()
+        wrapper.test().get()
+
+        self.assertEqual(self.collector.calls, [('before_request', None),
+                                                ('after_response', 200),
+                                                ('before_request', None),
+                                                ('after_response', 200)])
+        self.assertEqual([event.cached for event in self.events], [False, True])
+        self.assertIsNone(self.events[1].response_bytes)
+        self.assertEqual(set(self.events[1].timings.durations),
+                         {'serialize', 'wrap'})
+
+    @responses.activate
+    def test_revalidated_responses(self):
+        wrapper = TesterClient(hooks=self.hooks, cache=MemoryCache())
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      content_type='application/json',
+                      headers={'Cache-Control': 'no-cache', 'ETag': '"abc"'})
+        responses.add(responses.GET, wrapper.test().data, status=304)
+
+        wrapper.test().get()
+        wrapper.test().get()
+
+        self.assertEqual([event.cached for event in self.events], [False, True])
+        self.assertEqual(self.events[1].status_code, 304)
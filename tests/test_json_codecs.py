@@ -0,0 +1,97 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import importlib
+import json
+import unittest
+
+import responses
+
+from tapioca.adapters import generate_wrapper_from_adapter
+from tapioca.json_codecs import CODEC_CLASSES, JSONCodec, get_json_codec
+
+from tests.client import TesterClientAdapter
+
+
+PAYLOAD = {
+    'name': 'tapioca',
+    'url': 'https://api.example.org/items/1/',
+    'numbers': [1, 2.5, -3],
+    'nested': {'flag': True, 'empty': None, 'unicode': 'mandioca ç'},
+}
+
+
+def is_installed(codec_class):
+    if codec_class is JSONCodec:
+        return True
+    try:
+        importlib.import_module(codec_class.name)
+    except ImportError:
+        return False
+    return True
+
+
+class AutoJSONClientAdapter(TesterClientAdapter):
+    json_codec = 'auto'
+
+
+class TestJSONCodecs(unittest.TestCase):
+
+    def test_installed_codecs_round_trip(self):
+        for codec_class in CODEC_CLASSES:
+            if not is_installed(codec_class):
+                continue
+            with self.subTest(codec=codec_class.name):
+                codec = get_json_codec(codec_class.name)
+                encoded = codec.dumps(PAYLOAD)
+
+                self.assertEqual(json.loads(encoded), PAYLOAD)
+                self.assertEqual(codec.loads(json.dumps(PAYLOAD).encode('utf-8')),
+                                 PAYLOAD)
+
+    def test_default_codec_is_the_standard_library(self):
+        self.assertIs(type(get_json_codec()), JSONCodec)
+        self.assertIs(type(get_json_codec(None)), JSONCodec)
+
+    def test_auto_codec_is_the_first_installed(self):
+        expected = next(c for c in CODEC_CLASSES if is_installed(c))
+
+        self.assertIsInstance(get_json_codec('auto'), expected)
+
+    def test_codecs_are_reused(self):
+        self.assertIs(get_json_codec('json'), get_json_codec('json'))
+
+    def test_codec_objects_are_returned_as_is(self):
+        codec = JSONCodec()
+
+        self.assertIs(get_json_codec(codec), codec)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            get_json_codec('yaml')
+
+
+class TestJSONAdapterCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = generate_wrapper_from_adapter(AutoJSONClientAdapter)()
+
+    def test_adapter_uses_the_standard_library_by_default(self):
+        wrapper = generate_wrapper_from_adapter(TesterClientAdapter)()
+
+        self.assertIs(type(wrapper._api.get_json_codec()), JSONCodec)
+
+    def test_adapter_uses_configured_codec(self):
+        self.assertIs(self.wrapper._api.get_json_codec(), get_json_codec('auto'))
+
+    @responses.activate
+    def test_request_and_response_through_codec(self):
+        responses.add(responses.POST, self.wrapper.test().data,
+                      body=json.dumps(PAYLOAD), status=201,
+                      content_type='application/json')
+
+        response = self.wrapper.test().post(data=PAYLOAD)
+
+        self.assertEqual(response().data, PAYLOAD)
+        self.assertEqual(json.loads(responses.calls[0].request.body), PAYLOAD)
@@ -0,0 +1,164 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import time
+import unittest
+
+import responses
+
+from tapioca.adapters import generate_wrapper_from_adapter
+from tapioca.cache import MemoryCache
+from tapioca.exceptions import ClientError
+from tapioca.hooks import Hooks
+from tapioca.metrics import Histogram, HistogramRegistry, SpanCollector
+from tapioca.retry import RetryPolicy
+
+from tests.client import TesterClient, TokenRefreshClientAdapter
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_observe(self):
+        histogram = Histogram(buckets=[1, 5, 10])
+
+        for value in [0.5, 1, 2, 7, 20]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 1, 1, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 30.5)
+
+    def test_get_percentile(self):
+        histogram = Histogram(buckets=[1, 5, 10])
+
+        self.assertIsNone(histogram.get_percentile(50))
+
+        for value in [0.5, 2, 3, 7]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.get_percentile(25), 1)
+        self.assertEqual(histogram.get_percentile(50), 5)
+        self.assertEqual(histogram.get_percentile(100), 10)
+
+        histogram.observe(20)
+        self.assertIsNone(histogram.get_percentile(100))
+
+
+class TestHistogramRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = HistogramRegistry()
+        self.wrapper = TesterClient(hooks=Hooks(collectors=[self.registry]))
+
+    @responses.activate
+    def test_records_requests(self):
+        responses.add(responses.GET, self.wrapper.test().data, body='{"a": 1}',
+                      content_type='application/json')
+
+        self.wrapper.test().get()
+        self.wrapper.test().get()
+
+        labels = ('test', 'GET', 200)
+        for name in ('duration', 'serialize', 'network', 'decode', 'wrap'):
+            self.assertEqual(self.registry.get(name, *labels).count, 2)
+        self.assertEqual(self.registry.get('response_bytes', *labels).sum, 16)
+        self.assertIsNone(self.registry.get('request_bytes', *labels))
+        self.assertEqual(len(list(self.registry)), 6)
+
+    @responses.activate
+    def test_records_cached_responses(self):
+        wrapper = TesterClient(hooks=Hooks(collectors=[self.registry]),
+                               cache=MemoryCache())
+        responses.add(responses.GET, wrapper.test().data, body='{"a": 1}',
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+
+        wrapper.test().get()
+        wrapper.test().get()
+
+        labels = ('test', 'GET', 200)
+        self.assertEqual(self.registry.get('duration', *labels).count, 2)
+        self.assertEqual(self.registry.get('network', *labels).count, 1)
+        self.assertEqual(self.registry.get('response_bytes', *labels).count, 1)
+
+    @responses.activate
+    def test_records_errors(self):
+        responses.add(responses.GET, self.wrapper.test().data, status=404,
+                      body='{}', content_type='application/json')
+
+        with self.assertRaises(ClientError):
+            self.wrapper.test().get()
+
+        self.assertEqual(self.registry.get('duration', 'test', 'GET', 404).count, 1)
+
+
+class TestSpanCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.collector = SpanCollector()
+        self.wrapper = TesterClient(hooks=Hooks(collectors=[self.collector]),
+                                    retry=RetryPolicy(backoff_factor=0))
+
+    @responses.activate
+    def test_records_spans(self):
+        responses.add(responses.GET, self.wrapper.test().data, status=503)
+        responses.add(responses.GET, self.wrapper.test().data, body='{}',
+                      content_type='application/json')
+
+        self.wrapper.test().get()
+
+        span, = self.collector.tracer.spans
+        self.assertEqual(span.name, 'GET test')
+        self.assertEqual(span.attributes['http.status_code'], 200)
+        self.assertEqual(span.attributes['tapioca.retries'], 1)
+        self.assertIn('tapioca.network_duration', span.attributes)
+        self.assertEqual([name for name, attributes in span.events], ['retry'])
+        self.assertGreaterEqual(span.end_time, span.start_time)
+
+    @responses.activate
+    def test_records_auth_refreshes_before_requests(self):
+        class ExpiringTokenAdapter(TokenRefreshClientAdapter):
+            def get_authentication_expiration(self, api_params):
+                return 0 if api_params['token'] == 'token' else time.time() + 3600
+
+        wrapper = generate_wrapper_from_adapter(ExpiringTokenAdapter)(
+            token='token', refresh_token_by_default=True,
+            hooks=Hooks(collectors=[self.collector]))
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      content_type='application/json')
+
+        wrapper.test().get()
+
+        span, = self.collector.tracer.spans
+        self.assertEqual([name for name, attributes in span.events],
+                         ['auth_refresh'])
+        self.assertIn('tapioca.auth_refresh_duration', span.attributes)
+
+    @responses.activate
+    def test_records_cached_responses(self):
+        wrapper = TesterClient(hooks=Hooks(collectors=[self.collector]),
+                               cache=MemoryCache())
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      content_type='application/json',
+                      headers={'Cache-Control': 'max-age=60'})
+
+        wrapper.test().get()
+        wrapper.test().get()
+
+        self.assertEqual([span.attributes['tapioca.cached']
+                          for span in self.collector.tracer.spans],
+                         [False, True])
+
+    @responses.activate
+    def test_records_exceptions(self):
+        responses.add(responses.POST, self.wrapper.test().data, status=400,
+                      body='{}', content_type='application/json')
+
+        with self.assertRaises(ClientError) as context:
+            self.wrapper.test().post()
+
+        span, = self.collector.tracer.spans
+        self.assertEqual(span.attributes['http.status_code'], 400)
+        self.assertEqual(span.exceptions, [context.exception])
+        self.assertEqual(self.collector._spans, {})
@@ -0,0 +1,139 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import pickle
+import threading
+import time
+import unittest
+from unittest import mock
+
+import responses
+
+from tapioca.adapters import generate_wrapper_from_adapter
+from tapioca.ratelimit import RateLimiter
+
+from tests.client import (
+    RESOURCE_MAPPING, TesterClientAdapter, TesterClient, build_response)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('tapioca.ratelimit.time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_allows_bursts_then_spaces_requests(self):
+        limiter = RateLimiter(rate=10, burst=2)
+
+        waits = [limiter.reserve() for _ in range(4)]
+
+        self.assertEqual(waits, [0, 0, 0.1, 0.2])
+        self.assertEqual(limiter.wait_count, 2)
+        self.assertAlmostEqual(limiter.wait_time, 0.3)
+        self.assertEqual(limiter.max_wait, 0.2)
+
+    def test_refills_over_time(self):
+        limiter = RateLimiter(rate=10, burst=1)
+        limiter.reserve()
+
+        self.now += 0.1
+
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_remaining_header_shrinks_the_bucket(self):
+        limiter = RateLimiter(rate=10)
+
+        limiter.update(build_response(headers={'X-RateLimit-Remaining': '1'}))
+
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0.1)
+
+    def test_waits_for_reset_when_quota_is_exhausted(self):
+        limiter = RateLimiter(rate=10)
+
+        limiter.update(build_response(headers={'X-RateLimit-Remaining': '0',
+                                               'X-RateLimit-Reset': '5'}))
+
+        self.assertAlmostEqual(limiter.reserve(), 5.1)
+
+    def test_reset_header_may_be_a_timestamp(self):
+        limiter = RateLimiter(rate=10)
+
+        limiter.update(build_response(headers={'X-RateLimit-Remaining': '0',
+                                               'X-RateLimit-Reset': str(int(time.time()) + 60)}))
+
+        self.assertGreater(limiter.reserve(), 55)
+
+    def test_ignores_missing_headers(self):
+        limiter = RateLimiter(rate=10)
+
+        limiter.update(build_response(headers={'X-RateLimit-Remaining': 'many'}))
+
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_is_pickleable(self):
+        limiter = pickle.loads(pickle.dumps(RateLimiter(rate=10, burst=1)))
+
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0.1)
+
+
+class TestRateLimitedRequests(unittest.TestCase):
+
+    @responses.activate
+    def test_requests_acquire_tokens_from_threads(self):
+        limiter = RateLimiter(rate=1, burst=1)
+        wrapper = TesterClient(rate_limiter=limiter)
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      content_type='application/json')
+
+        threads = [threading.Thread(target=wrapper.test().get) for _ in range(5)]
+        with mock.patch('tapioca.ratelimit.time.sleep') as sleep:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(responses.calls), 5)
+        self.assertEqual(limiter.wait_count, 4)
+        self.assertEqual(sorted(round(call[0][0]) for call in sleep.call_args_list),
+                         [1, 2, 3, 4])
+
+    @responses.activate
+    def test_response_headers_update_the_limiter(self):
+        limiter = RateLimiter(rate=10)
+        wrapper = TesterClient(rate_limiter=limiter)
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '2'},
+                      content_type='application/json')
+
+        with mock.patch('tapioca.ratelimit.time.sleep') as sleep:
+            wrapper.test().get()
+            wrapper.test().get()
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertAlmostEqual(sleep.call_args[0][0], 2.1, places=1)
+
+    @responses.activate
+    def test_resource_rate_limiter(self):
+        limiter = RateLimiter(rate=10, burst=1)
+
+        class ResourceLimitAdapter(TesterClientAdapter):
+            resource_mapping = dict(RESOURCE_MAPPING, test=dict(
+                RESOURCE_MAPPING['test'], rate_limiter=limiter))
+
+        wrapper = generate_wrapper_from_adapter(ResourceLimitAdapter)()
+        responses.add(responses.GET, wrapper.test().data, body='{}',
+                      content_type='application/json')
+        responses.add(responses.GET, wrapper.user(id=1).data, body='{}',
+                      content_type='application/json')
+
+        with mock.patch('tapioca.ratelimit.time.sleep') as sleep:
+            wrapper.test().get()
+            wrapper.user(id=1).get()
+            wrapper.test().get()
+
+        self.assertEqual(sleep.call_count, 1)
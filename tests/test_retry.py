@@ -0,0 +1,177 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+import requests
+import responses
+
+from tapioca.adapters import generate_wrapper_from_adapter
+from tapioca.exceptions import ClientError, ServerError
+from tapioca.retry import RetryPolicy, get_retry_after
+
+from tests.client import (
+    RESOURCE_MAPPING, TesterClientAdapter, TesterClient, build_response)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(total=2, backoff_factor=1, jitter=False)
+
+    def test_retries_statuses_and_exceptions(self):
+        self.assertEqual(self.policy.get_delay('GET', 0, response=build_response(503)), 1)
+        self.assertEqual(self.policy.get_delay('GET', 1, response=build_response(429)), 2)
+        self.assertEqual(
+            self.policy.get_delay('GET', 0, exception=requests.ConnectionError()), 1)
+
+        self.assertIsNone(self.policy.get_delay('GET', 0, response=build_response(404)))
+        self.assertIsNone(self.policy.get_delay('GET', 0, exception=ValueError()))
+
+    def test_stops_after_total_retries(self):
+        self.assertIsNone(self.policy.get_delay('GET', 2, response=build_response(503)))
+
+    def test_does_not_retry_non_idempotent_methods(self):
+        self.assertIsNone(self.policy.get_delay('POST', 0, response=build_response(503)))
+        self.assertIsNone(self.policy.get_delay('patch', 0, response=build_response(503)))
+
+        policy = RetryPolicy(methods=['GET', 'POST'], jitter=False)
+        self.assertIsNotNone(policy.get_delay('post', 0, response=build_response(503)))
+
+    def test_backoff_is_capped_and_jittered(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+        self.assertEqual(policy.get_backoff(10), 5)
+
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+        for retries in range(5):
+            self.assertTrue(0 <= policy.get_backoff(retries) <= min(2 ** retries, 5))
+
+    def test_honours_retry_after(self):
+        response = build_response(503, {'Retry-After': '7'})
+
+        self.assertEqual(self.policy.get_delay('GET', 0, response=response), 7)
+        self.assertEqual(
+            RetryPolicy(backoff_factor=1, jitter=False, respect_retry_after=False).get_delay(
+                'GET', 0, response=response),
+            1)
+
+    def test_long_retry_after_is_not_retried(self):
+        response = build_response(429, {'Retry-After': '3600'})
+
+        self.assertIsNone(self.policy.get_delay('GET', 0, response=response))
+        self.assertIsNone(RetryPolicy(max_backoff=5).get_delay(
+            'GET', 0, response=build_response(429, {'Retry-After': '6'})))
+        self.assertEqual(RetryPolicy(max_retry_after=3600).get_delay(
+            'GET', 0, response=response), 3600)
+
+    def test_retry_after_dates(self):
+        response = build_response(503, {'Retry-After': formatdate(1000, usegmt=True)})
+
+        self.assertEqual(get_retry_after(response, now=990), 10)
+        self.assertEqual(get_retry_after(response, now=2000), 0)
+        self.assertIsNone(get_retry_after(build_response(503, {'Retry-After': 'soon'})))
+        self.assertIsNone(get_retry_after(build_response(503)))
+
+
+class TestRetryRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.retry = RetryPolicy(total=2, backoff_factor=0)
+        self.wrapper = TesterClient(retry=self.retry)
+        self.url = self.wrapper.test().data
+
+    @responses.activate
+    def test_retries_until_success(self):
+        responses.add(responses.GET, self.url, status=503, body='{}',
+                      content_type='application/json')
+        responses.add(responses.GET, self.url, status=200, body='{"data": 1}',
+                      content_type='application/json')
+
+        response = self.wrapper.test().get()
+
+        self.assertEqual(response.data().data, 1)
+        self.assertEqual(response().retries, 1)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_raises_error_when_retries_are_exhausted(self):
+        responses.add(responses.GET, self.url, status=503, body='{}',
+                      content_type='application/json')
+
+        with self.assertRaises(ServerError) as context:
+            self.wrapper.test().get()
+
+        self.assertEqual(context.exception.client().retries, 2)
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_retries_connection_errors(self):
+        responses.add(responses.GET, self.url, body=requests.ConnectionError())
+        responses.add(responses.GET, self.url, status=200, body='{}',
+                      content_type='application/json')
+
+        response = self.wrapper.test().get()
+
+        self.assertEqual(response().retries, 1)
+
+    @responses.activate
+    def test_does_not_retry_post(self):
+        responses.add(responses.POST, self.url, status=503, body='{}',
+                      content_type='application/json')
+
+        with self.assertRaises(ServerError):
+            self.wrapper.test().post()
+
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_waits_retry_after(self):
+        responses.add(responses.GET, self.url, status=429, body='{}',
+                      headers={'Retry-After': '3'}, content_type='application/json')
+        responses.add(responses.GET, self.url, status=200, body='{}',
+                      content_type='application/json')
+
+        with mock.patch('tapioca.tapioca.time.sleep') as sleep:
+            self.wrapper.test().get()
+
+        sleep.assert_called_once_with(3)
+
+    @responses.activate
+    def test_long_retry_after_returns_the_response(self):
+        responses.add(responses.GET, self.url, status=429, body='{}',
+                      headers={'Retry-After': '3600'}, content_type='application/json')
+
+        with mock.patch('tapioca.tapioca.time.sleep') as sleep:
+            with self.assertRaises(ClientError) as context:
+                self.wrapper.test().get()
+
+        sleep.assert_not_called()
+        self.assertEqual(context.exception.status_code, 429)
+
+    @responses.activate
+    def test_resource_retry_policy(self):
+        class ResourceRetryAdapter(TesterClientAdapter):
+            resource_mapping = dict(RESOURCE_MAPPING, test=dict(
+                RESOURCE_MAPPING['test'], retry=None))
+
+        wrapper = generate_wrapper_from_adapter(ResourceRetryAdapter)(retry=self.retry)
+        responses.add(responses.GET, self.url, status=503, body='{}',
+                      content_type='application/json')
+
+        with self.assertRaises(ServerError):
+            wrapper.test().get()
+
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_no_retries_by_default(self):
+        responses.add(responses.GET, self.url, status=503, body='{}',
+                      content_type='application/json')
+
+        with self.assertRaises(ServerError):
+            TesterClient().test().get()
+
+        self.assertEqual(len(responses.calls), 1)
@@ -4,11 +4,14 @@ from __future__ import unicode_literals
 
 import arrow
 import unittest
+from unittest import mock
 import responses
 import json
+from collections import OrderedDict
+from datetime import datetime, timezone
 from decimal import Decimal
 
-from tapioca.serializers import BaseSerializer, SimpleSerializer
+from tapioca.serializers import BaseSerializer, SimpleSerializer, parse_iso_datetime
 
 from tests.client import TesterClient, SerializerClient
 
@@ -145,6 +148,76 @@ class TestDeserialization(unittest.TestCase):
             response.decimal_value().to_kwargs(some_key='some value'),
             {'some_key': 'some value'})
 
+    @responses.activate
+    def test_convert_field_of_list_items(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": [{"date": "2014-11-13T14:53:18Z"}, '
+                           '{"date": "2014-11-14T10:00:00.5+02:00"}]}',
+                      status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get()
+        dates = response.data().to_datetime(field='date')
+
+        self.assertEqual(dates, [
+            datetime(2014, 11, 13, 14, 53, 18, tzinfo=timezone.utc),
+            datetime(2014, 11, 14, 8, 0, 0, 500000, tzinfo=timezone.utc),
+        ])
+
+    @responses.activate
+    def test_convert_many_values(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"values": ["10.51", "1"]}',
+                      status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get()
+
+        self.assertEqual(response.values().to_decimal(many=True),
+                         [Decimal('10.51'), Decimal('1')])
+
+    @responses.activate
+    def test_convert_many_without_bulk_method(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"values": ["a", "b"]}',
+                      status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get()
+
+        self.assertEqual(response.values().to_kwargs(many=True, key='value'),
+                         [{'key': 'value'}, {'key': 'value'}])
+        with self.assertRaises(NotImplementedError):
+            response.values().to_blablabla(many=True)
+
+
+class TestParseIsoDatetime(unittest.TestCase):
+
+    def test_matches_arrow(self):
+        values = [
+            '2014-11-13T14:53:18.694072+00:00',
+            '2014-11-13T14:53:18Z',
+            '2014-11-13T14:53:18',
+            '2014-11-13',
+            '2014-11-13T14:53:18.694-03:00',
+            '2014-11-13T14:53:18.12345Z',
+            1415890398,
+        ]
+
+        for value in values:
+            with self.subTest(value=value):
+                parsed = parse_iso_datetime(value)
+                self.assertEqual(parsed, arrow.get(value).datetime)
+                self.assertIsNotNone(parsed.tzinfo)
+
+    def test_datetime_many(self):
+        values = ['2014-11-13T14:53:18Z', '2014-11-13T14:53:18+01:00']
+
+        self.assertEqual(SimpleSerializer().to_datetime_many(values),
+                         SimpleSerializer().deserialize_many('to_datetime', values))
+        self.assertEqual(SimpleSerializer().to_datetime_many(values),
+                         [arrow.get(value).datetime for value in values])
+
 
 class TestSerialization(unittest.TestCase):
 
@@ -236,3 +309,76 @@ class TestSerialization(unittest.TestCase):
         serialized = self.serializer.serialize(data)
 
         self.assertEqual(serialized, [string_date])
+
+    def test_subclasses_of_handled_types_are_serialized(self):
+        class Money(Decimal):
+            pass
+
+        class Timestamp(datetime):
+            pass
+
+        data = [Money('1.5'), Timestamp(2014, 11, 13, 14, 53, 18, tzinfo=timezone.utc)]
+
+        serialized = self.serializer.serialize(data)
+
+        self.assertEqual(serialized, ['1.5', '2014-11-13T14:53:18+00:00'])
+
+    def test_mapping_subclasses_are_serialized(self):
+        data = OrderedDict([('key', Decimal('1.0'))])
+
+        serialized = self.serializer.serialize(data)
+
+        self.assertEqual(serialized, {'key': '1.0'})
+
+    def test_unknown_types_are_returned_as_is(self):
+        data = object()
+
+        self.assertIs(self.serializer.serialize(data), data)
+
+    def test_scalar_serialize_methods_are_respected(self):
+        class StripSerializer(SimpleSerializer):
+
+            def serialize_str(self, data):
+                return data.strip()
+
+        serialized = StripSerializer().serialize({'key': [' value ', 1]})
+
+        self.assertEqual(serialized, {'key': ['value', 1]})
+        self.assertNotIn(str, StripSerializer._passthrough_types)
+        self.assertIn(str, SimpleSerializer._passthrough_types)
+
+    def test_dispatch_is_cached_per_serializer_class(self):
+        class BoolSerializer(SimpleSerializer):
+
+            def serialize_bool(self, data):
+                return int(data)
+
+        self.assertEqual(BoolSerializer().serialize([True, 1]), [1, 1])
+        self.assertEqual(self.serializer.serialize([True, 1]), [True, 1])
+        self.assertIn(Decimal, SimpleSerializer._serialize_dispatch)
+        self.assertIsNot(BoolSerializer._serialize_dispatch,
+                         SimpleSerializer._serialize_dispatch)
+
+    def test_static_and_class_serialize_methods(self):
+        class DescriptorSerializer(SimpleSerializer):
+
+            @staticmethod
+            def serialize_decimal(data):
+                return float(data)
+
+            @classmethod
+            def serialize_datetime(cls, data):
+                return cls.__name__
+
+        serialized = DescriptorSerializer().serialize(
+            [Decimal('1.5'), datetime(2014, 11, 13)])
+
+        self.assertEqual(serialized, [1.5, 'DescriptorSerializer'])
+
+    def test_serialize_methods_overridden_on_the_instance(self):
+        with mock.patch.object(self.serializer, 'serialize_decimal',
+                               return_value='patched') as serialize_decimal:
+            serialized = self.serializer.serialize({'key': Decimal('1.5')})
+
+        self.assertEqual(serialized, {'key': 'patched'})
+        serialize_decimal.assert_called_once_with(Decimal('1.5'))
@@ -0,0 +1,59 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import unittest
+
+import requests
+
+from tapioca.sessions import SessionRegistry, build_session
+
+
+class TestBuildSession(unittest.TestCase):
+
+    def test_mounts_configured_pool(self):
+        session = build_session(pool_connections=3, pool_maxsize=50,
+                                pool_block=True)
+
+        for prefix in ('https://', 'http://'):
+            http_adapter = session.get_adapter(prefix + 'api.example.org')
+            self.assertEqual(http_adapter._pool_connections, 3)
+            self.assertEqual(http_adapter._pool_maxsize, 50)
+            self.assertTrue(http_adapter._pool_block)
+
+    def test_keep_alive_is_enabled_by_default(self):
+        session = build_session()
+
+        self.assertNotEqual(session.headers.get('Connection'), 'close')
+
+    def test_disable_keep_alive(self):
+        session = build_session(keep_alive=False)
+
+        self.assertEqual(session.headers['Connection'], 'close')
+
+
+class TestSessionRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = SessionRegistry()
+
+    def test_same_api_root_reuses_session(self):
+        session = self.registry.get('https://api.example.org', pool_maxsize=20)
+
+        self.assertIsInstance(session, requests.Session)
+        self.assertIs(self.registry.get('https://api.example.org', pool_maxsize=20),
+                      session)
+
+    def test_different_api_roots_or_options_get_different_sessions(self):
+        session = self.registry.get('https://api.example.org')
+
+        self.assertIsNot(self.registry.get('https://api.another.com'), session)
+        self.assertIsNot(self.registry.get('https://api.example.org', pool_maxsize=20),
+                         session)
+
+    def test_clear(self):
+        session = self.registry.get('https://api.example.org')
+
+        self.registry.clear()
+
+        self.assertIsNot(self.registry.get('https://api.example.org'), session)
@@ -0,0 +1,319 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import json
+import unittest
+from xml.parsers.expat import ExpatError
+
+import responses
+import xmltodict
+
+from tapioca.exceptions import ClientError
+from tapioca.adapters import generate_wrapper_from_adapter
+from tapioca.streaming import JSONItemStream, XMLItemStream
+from tapioca.tapioca import TapiocaClient
+
+from tests.client import TesterClient, XMLClientAdapter
+
+
+class FakeResponse(object):
+
+    def __init__(self, body):
+        self.body = body.encode('utf-8')
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+DOCUMENT = {
+    'meta': {'count': 3, 'data': ['not', 'these']},
+    'data': [
+        {'id': 1, 'name': 'with "quotes" and [brackets], {braces}: too'},
+        {'id': 2, 'nested': {'data': [1, 2, {'deep': []}]}, 'escaped': '\\"'},
+        [3, 'list item'],
+    ],
+    'paging': {'next': 'http://api.example.org/next'},
+}
+
+
+XML_DOCUMENT = (
+    '<?xml version="1.0"?>'
+    '<catalog version="2">'
+    '<info><book>not this one</book></info>'
+    '<book id="1"><title>First &amp; best</title></book>'
+    '<book id="2"><title>Second</title><tag>a</tag><tag>b</tag></book>'
+    '<book/>'
+    '</catalog>'
+)
+
+
+class StreamXMLClientAdapter(XMLClientAdapter):
+
+    def get_iterator_stream_path(self, response):
+        return 'catalog.book'
+
+    def get_iterator_next_request_kwargs(self, iterator_request_kwargs,
+                                         response_data, response):
+        next_url = response.headers.get('X-Next')
+        if next_url:
+            return {'url': next_url}
+
+
+StreamXMLClient = generate_wrapper_from_adapter(StreamXMLClientAdapter)
+
+
+class TestJSONItemStream(unittest.TestCase):
+
+    def stream(self, document, path, chunk_size=64):
+        return JSONItemStream(FakeResponse(json.dumps(document)), path,
+                              codec='json', chunk_size=chunk_size)
+
+    def test_yields_items_for_every_chunk_size(self):
+        for chunk_size in (1, 2, 3, 7, 64, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                stream = self.stream(DOCUMENT, 'data', chunk_size=chunk_size)
+
+                self.assertEqual(list(stream), DOCUMENT['data'])
+
+    def test_response_data_keeps_everything_but_the_items(self):
+        for chunk_size in (1, 5, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                stream = self.stream(DOCUMENT, 'data', chunk_size=chunk_size)
+                list(stream)
+
+                expected = dict(DOCUMENT, data=[])
+                self.assertEqual(stream.response_data, expected)
+
+    def test_response_data_requires_consumed_stream(self):
+        stream = self.stream(DOCUMENT, 'data')
+        next(stream)
+
+        with self.assertRaises(ValueError):
+            stream.response_data
+
+    def test_nested_path(self):
+        stream = self.stream({'result': {'items': [{'a': 1}, {'a': 2}]}},
+                             'result.items')
+
+        self.assertEqual(list(stream), [{'a': 1}, {'a': 2}])
+
+    def test_path_as_sequence(self):
+        stream = self.stream({'a.b': [1, 2]}, ['a.b'])
+
+        self.assertEqual(list(stream), [1, 2])
+
+    def test_top_level_array(self):
+        stream = self.stream([{'a': 1}, 'b', 3, None], '', chunk_size=2)
+
+        self.assertEqual(list(stream), [{'a': 1}, 'b', 3, None])
+
+    def test_empty_array(self):
+        stream = self.stream({'data': []}, 'data')
+
+        self.assertEqual(list(stream), [])
+        self.assertEqual(stream.response_data, {'data': []})
+
+    def test_missing_path_yields_nothing(self):
+        stream = self.stream({'other': [1]}, 'data')
+
+        self.assertEqual(list(stream), [])
+        self.assertEqual(stream.response_data, {'other': [1]})
+
+    def test_memory_is_bounded_by_item_size(self):
+        document = {'data': [{'id': i, 'padding': 'x' * 100} for i in range(2000)]}
+        response = FakeResponse(json.dumps(document))
+        stream = JSONItemStream(response, 'data', chunk_size=256)
+
+        count = 0
+        for item in stream:
+            count += 1
+            buffer = stream._items.gi_frame.f_locals['buffer']
+            self.assertLess(len(buffer), 512)
+
+        self.assertEqual(count, 2000)
+        self.assertTrue(response.closed)
+
+    def test_close(self):
+        response = FakeResponse(json.dumps(DOCUMENT))
+        stream = JSONItemStream(response, 'data')
+        next(stream)
+
+        stream.close()
+
+        self.assertTrue(response.closed)
+        self.assertEqual(list(stream), [])
+
+
+class TestXMLItemStream(unittest.TestCase):
+
+    def test_yields_items_like_xmltodict(self):
+        expected = xmltodict.parse(XML_DOCUMENT)['catalog']['book']
+
+        for chunk_size in (1, 7, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                stream = XMLItemStream(FakeResponse(XML_DOCUMENT), 'catalog.book',
+                                       chunk_size=chunk_size)
+
+                self.assertEqual(list(stream), expected)
+                self.assertIsNone(stream.response_data)
+
+    def test_parse_kwargs(self):
+        stream = XMLItemStream(FakeResponse(XML_DOCUMENT), ['catalog', 'book'],
+                               parse_kwargs={'attr_prefix': '_'})
+
+        self.assertEqual(next(stream)['_id'], '1')
+
+    def test_buffered_items_are_bounded(self):
+        document = '<feed>%s</feed>' % ('<entry>x</entry>' * 1000)
+        stream = XMLItemStream(FakeResponse(document), 'feed.entry',
+                               max_buffered_items=5, chunk_size=10000)
+
+        self.assertEqual(next(stream), 'x')
+        self.assertLessEqual(stream._items.gi_frame.f_locals['parsed'].qsize(), 5)
+        self.assertEqual(len(list(stream)), 999)
+
+    def test_invalid_documents_raise(self):
+        stream = XMLItemStream(FakeResponse('<feed><entry>x</entry><entry>'),
+                               'feed.entry')
+
+        self.assertEqual(next(stream), 'x')
+        with self.assertRaises(ExpatError):
+            next(stream)
+
+    def test_close(self):
+        document = '<feed>%s</feed>' % ('<entry>x</entry>' * 1000)
+        response = FakeResponse(document)
+        stream = XMLItemStream(response, 'feed.entry', max_buffered_items=1,
+                               chunk_size=10)
+        next(stream)
+
+        stream.close()
+
+        self.assertTrue(response.closed)
+        self.assertEqual(list(stream), [])
+
+
+class TestStreamedRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = TesterClient()
+
+    @responses.activate
+    def test_iterating_streamed_executor(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body=json.dumps(DOCUMENT), status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get(stream=True)
+
+        items = list(response())
+        self.assertTrue(all(isinstance(item, TapiocaClient) for item in items))
+        self.assertEqual(items[0].id().data, 1)
+        self.assertEqual([item().data for item in items], DOCUMENT['data'])
+
+    @responses.activate
+    def test_streamed_pages(self):
+        next_url = 'http://api.example.org/next_batch'
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": [{"key": "a"}], "paging": {"next": "%s"}}' % next_url,
+                      status=200,
+                      content_type='application/json')
+        responses.add(responses.GET, next_url,
+                      body='{"data": [{"key": "b"}, {"key": "c"}], "paging": {"next": ""}}',
+                      status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get(stream=True)
+
+        keys = [item.key().data for item in response().pages()]
+
+        self.assertEqual(keys, ['a', 'b', 'c'])
+        self.assertIsInstance(response().data, JSONItemStream)
+
+    @responses.activate
+    def test_streamed_pages_with_max_items(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": [{"key": "a"}, {"key": "b"}, {"key": "c"}]}',
+                      status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get(stream=True)
+
+        keys = [item.key().data for item in response().pages(max_items=2)]
+
+        self.assertEqual(keys, ['a', 'b'])
+
+    @responses.activate
+    def test_streamed_pages_can_not_be_prefetched(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": []}', status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get(stream=True)
+
+        with self.assertRaises(ValueError):
+            next(response().pages(prefetch=2))
+
+    @responses.activate
+    def test_streamed_error_responses_are_processed(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"error": "bad request test"}', status=400,
+                      content_type='application/json')
+
+        with self.assertRaises(ClientError) as context:
+            self.wrapper.test().get(stream=True)
+
+        self.assertIn('bad request test', context.exception.args)
+
+
+class TestStreamedXMLRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = StreamXMLClient()
+
+    @responses.activate
+    def test_iterating_streamed_executor(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body=XML_DOCUMENT, status=200,
+                      content_type='application/xml')
+
+        response = self.wrapper.test().get(stream=True)
+
+        items = list(response())
+        self.assertEqual(items[0].title().data, 'First & best')
+        self.assertEqual(items[1].tag().data, ['a', 'b'])
+        self.assertIsNone(items[2]().data)
+
+    @responses.activate
+    def test_streamed_pages(self):
+        next_url = 'http://api.example.org/next_batch'
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='<catalog><book>1</book><book>2</book></catalog>',
+                      status=200, content_type='application/xml',
+                      headers={'X-Next': next_url})
+        responses.add(responses.GET, next_url,
+                      body='<catalog><book>3</book></catalog>',
+                      status=200, content_type='application/xml')
+
+        response = self.wrapper.test().get(stream=True)
+
+        books = [item().data for item in response().pages()]
+
+        self.assertEqual(books, ['1', '2', '3'])
+
+    @responses.activate
+    def test_parse_kwargs_are_used(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body=XML_DOCUMENT, status=200,
+                      content_type='application/xml')
+
+        response = self.wrapper.test().get(stream=True,
+                                           xmltodict_parse__force_list=('title',))
+
+        self.assertEqual(next(iter(response())).title().data, ['First & best'])
@@ -6,14 +6,24 @@ import unittest
 import responses
 import json
 import pickle
+import requests
+import threading
+import time
+from unittest import mock
 
 import xmltodict
 from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 
-from tapioca.tapioca import TapiocaClient
+from tapioca.tapioca import TapiocaClient, TapiocaClientExecutor, TapiocaClientView
+from tapioca.adapters import generate_wrapper_from_adapter
 from tapioca.exceptions import ClientError, ServerError
+from tapioca.sessions import shared_sessions
 
-from tests.client import TesterClient, TokenRefreshClient, XMLClient, FailTokenRefreshClient
+from tests.client import (
+    RESOURCE_MAPPING, TesterClientAdapter, TesterClient, TokenRefreshClientAdapter,
+    TokenRefreshClient, XMLClient,
+    FailTokenRefreshClient, PageNumberClient)
 
 
 class TestTapiocaClient(unittest.TestCase):
@@ -116,10 +126,204 @@ class TestTapiocaClient(unittest.TestCase):
         with self.assertRaises(IndexError):
             response[3]
 
+    @responses.activate
+    def test_navigating_response_data_returns_views(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": [{"key": "value"}]}',
+                      status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get()
+        key = response.data[0].key
+
+        self.assertIsInstance(key, TapiocaClientView)
+        self.assertIs(key._root, response)
+        self.assertEqual(key._path, ('data', 0, 'key'))
+        self.assertFalse(hasattr(key, '__dict__'))
+        self.assertIs(key._api, response._api)
+        self.assertIs(key._session, response._session)
+
+    @responses.activate
+    def test_calling_a_view_returns_an_executor(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": {"key": "value"}}',
+                      status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get()
+        executor = response.data.key()
+
+        self.assertIs(type(executor), TapiocaClientExecutor)
+        self.assertEqual(executor.data, 'value')
+        self.assertEqual(executor._request_kwargs, response._request_kwargs)
+        with self.assertRaises(Exception):
+            executor.response
+
+    def test_views_fall_back_to_resource_mapping(self):
+        client = self.wrapper._wrap_in_tapioca({'data': {}})
+
+        resource = client.data.test
+
+        self.assertIs(type(resource), TapiocaClient)
+        self.assertEqual(resource().data, 'https://api.example.org/test/')
+
+    def test_views_are_pickleable(self):
+        client = self.wrapper._wrap_in_tapioca({'data': [1, 2]})
+
+        view = pickle.loads(pickle.dumps(client.data[1]))
+
+        self.assertEqual(view._path, ('data', 1))
+        self.assertEqual(view().data, 2)
+
+    def test_derived_clients_share_adapter(self):
+        resource = self.wrapper.test
+        executor = resource()
+
+        self.assertIs(resource._api, self.wrapper._api)
+        self.assertIs(executor._api, self.wrapper._api)
+        self.assertIs(executor._api.serializer, self.wrapper._api.serializer)
+
+    def test_derived_clients_instantiate_adapter_when_sharing_is_disabled(self):
+        class UnsharedAdapter(TesterClientAdapter):
+            share_adapter = False
+
+        wrapper = generate_wrapper_from_adapter(UnsharedAdapter)()
+        resource = wrapper.test
+
+        self.assertIsNot(resource._api, wrapper._api)
+        self.assertIsInstance(resource._api, wrapper._api.__class__)
+
+    @responses.activate
+    def test_paged_items_share_adapter(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": [{"key": "value"}, {"key": "value"}]}',
+                      status=200,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get()
+
+        for item in response().pages():
+            self.assertIs(item._api, self.wrapper._api)
+
+    def test_resources_are_resolved_once(self):
+        with mock.patch.object(self.wrapper._api, 'get_resource_mapping',
+                               wraps=self.wrapper._api.get_resource_mapping) as mapping:
+            for _ in range(3):
+                self.assertEqual(self.wrapper.test().data,
+                                 'https://api.example.org/test/')
+                with self.assertRaises(AttributeError):
+                    self.wrapper.not_a_resource
+
+        # test, then not_a_resource and its two camel case variants
+        self.assertEqual(mapping.call_count, 4)
+
+    def test_resources_are_resolved_per_api_params(self):
+        class ParamsRootAdapter(TesterClientAdapter):
+            def get_api_root(self, api_params, **kwargs):
+                return api_params['api_root']
+
+        adapter = ParamsRootAdapter()
+
+        self.assertEqual(
+            adapter._resolve_resource('test', {'api_root': 'https://a.org'}),
+            ('https://a.org/test/', RESOURCE_MAPPING['test']))
+        self.assertEqual(
+            adapter._resolve_resource('test', {'api_root': 'https://b.org'}),
+            ('https://b.org/test/', RESOURCE_MAPPING['test']))
+
+    def test_resources_are_resolved_again_when_api_params_change(self):
+        class ParamsRootAdapter(TesterClientAdapter):
+            def get_api_root(self, api_params, **kwargs):
+                return api_params['instance_url']
+
+        wrapper = generate_wrapper_from_adapter(ParamsRootAdapter)(
+            instance_url='https://a.org')
+        self.assertEqual(wrapper.test().data, 'https://a.org/test/')
+
+        wrapper._api_params['instance_url'] = 'https://b.org'
+
+        self.assertEqual(wrapper.test().data, 'https://b.org/test/')
+
+    @responses.activate
+    def test_resources_are_resolved_again_after_refreshing_authentication(self):
+        class InstanceRefreshAdapter(TokenRefreshClientAdapter):
+            def get_api_root(self, api_params, **kwargs):
+                return api_params['auth']['instance_url']
+
+            def refresh_authentication(self, api_params, *args, **kwargs):
+                api_params['auth']['instance_url'] = 'https://b.org'
+                return 'new_token'
+
+        wrapper = generate_wrapper_from_adapter(InstanceRefreshAdapter)(
+            auth={'instance_url': 'https://a.org'}, refresh_token_by_default=True)
+        responses.add(responses.GET, 'https://a.org/test/', status=401,
+                      body='{}', content_type='application/json')
+        responses.add(responses.GET, 'https://a.org/test/', status=200,
+                      body='{}', content_type='application/json')
+
+        wrapper.test().get()
+
+        self.assertEqual(wrapper.test().data, 'https://b.org/test/')
+
+    def test_resource_resolution_cache_can_be_disabled(self):
+        class UncachedAdapter(TesterClientAdapter):
+            cache_resources = False
+
+        adapter = UncachedAdapter()
+        adapter._resolve_resource('test', {})
+
+        self.assertEqual(adapter._resolved_resources, {})
+
+    def test_fill_url_with_missing_params_raises_key_error(self):
+        with self.assertRaises(KeyError):
+            self.wrapper.user(other=1)
+
     def test_fill_url_from_default_params(self):
         wrapper = TesterClient(default_url_params={'id': 123})
         self.assertEqual(wrapper.user().data, 'https://api.example.org/user/123/')
 
+    def test_url_params_do_not_change_default_url_params(self):
+        default_url_params = {'id': 123}
+        wrapper = TesterClient(default_url_params=default_url_params)
+
+        self.assertEqual(wrapper.user(id=456).data, 'https://api.example.org/user/456/')
+        self.assertEqual(wrapper.user().data, 'https://api.example.org/user/123/')
+        self.assertEqual(default_url_params, {'id': 123})
+
+    def test_fill_url_template_with_quoted_params(self):
+        class QuotingAdapter(TesterClientAdapter):
+            quote_url_params = True
+
+        wrapper = generate_wrapper_from_adapter(QuotingAdapter)()
+
+        self.assertEqual(wrapper.user(id='a/b c').data,
+                         'https://api.example.org/user/a%2Fb%20c/')
+
+    def test_pool_options_configure_session(self):
+        wrapper = TesterClient(pool_maxsize=32, pool_block=True)
+
+        http_adapter = wrapper._session.get_adapter('https://api.example.org')
+
+        self.assertEqual(http_adapter._pool_maxsize, 32)
+        self.assertTrue(http_adapter._pool_block)
+        self.assertNotIn('pool_maxsize', wrapper._api_params)
+        self.assertIs(wrapper.test()._session, wrapper._session)
+
+    def test_pool_options_can_not_be_used_with_a_session(self):
+        with self.assertRaises(ValueError):
+            TesterClient(session=requests.Session(), pool_maxsize=32)
+
+    def test_shared_session_per_api_root(self):
+        self.addCleanup(shared_sessions.clear)
+
+        wrapper = TesterClient(share_session=True, pool_maxsize=32)
+        other_wrapper = TesterClient(share_session=True, pool_maxsize=32)
+
+        self.assertIs(wrapper._session, other_wrapper._session)
+        self.assertIsNot(TesterClient(share_session=True)._session,
+                         wrapper._session)
+        self.assertIsNot(TesterClient()._session, wrapper._session)
+
     @responses.activate
     def test_is_pickleable(self):
         wrapper = TesterClient()
@@ -245,6 +449,38 @@ class TestTapiocaExecutor(unittest.TestCase):
 
         self.assertEqual(response().status_code, 200)
 
+    @responses.activate
+    def test_response_executor_has_timings(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": {"key": "value"}}',
+                      status=200,
+                      content_type='application/json')
+
+        timings = self.wrapper.test().get()().timings
+
+        self.assertEqual(list(timings.phases),
+                         ['serialize', 'network', 'decode', 'wrap'])
+        self.assertLessEqual(timings.phases['serialize'][1],
+                             timings.phases['network'][0])
+        self.assertLessEqual(timings.phases['decode'][1],
+                             timings.phases['wrap'][0])
+        self.assertIsNone(timings.replay)
+        self.assertIsNone(self.wrapper.test().timings)
+
+    @responses.activate
+    def test_error_client_has_timings(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"error": "not found"}',
+                      status=404,
+                      content_type='application/json')
+
+        with self.assertRaises(ClientError) as context:
+            self.wrapper.test().get()
+
+        timings = context.exception.client().timings
+        self.assertIn('network', timings.durations)
+        self.assertNotIn('wrap', timings.phases)
+
 
 class TestTapiocaExecutorRequests(unittest.TestCase):
 
@@ -363,6 +599,81 @@ class TestTapiocaExecutorRequests(unittest.TestCase):
         self.assertIn("server error test", server_exception.exception.args)
 
 
+class TestBatchRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = TesterClient()
+
+    def _add_users(self, count, failing_ids=()):
+        for i in range(count):
+            status = 404 if i in failing_ids else 200
+            responses.add(responses.GET, self.wrapper.user(id=i).data,
+                          body=json.dumps({'id': i}),
+                          status=status,
+                          content_type='application/json')
+
+    @responses.activate
+    def test_batch_returns_responses_in_input_order(self):
+        self._add_users(20)
+
+        results = self.wrapper().batch(
+            [self.wrapper.user(id=i) for i in range(20)], concurrency=4)
+
+        self.assertEqual([r.id().data for r in results], list(range(20)))
+
+    @responses.activate
+    def test_batch_captures_tapioca_exceptions_per_item(self):
+        self._add_users(5, failing_ids=(1, 3))
+
+        results = self.wrapper().batch(
+            [self.wrapper.user(id=i) for i in range(5)])
+
+        self.assertIsInstance(results[1], ClientError)
+        self.assertIsInstance(results[3], ClientError)
+        self.assertEqual(results[1].status_code, 404)
+        self.assertEqual([results[i].id().data for i in (0, 2, 4)], [0, 2, 4])
+
+    @responses.activate
+    def test_batch_captures_connection_errors_per_item(self):
+        self._add_users(5)
+        responses.replace(responses.GET, self.wrapper.user(id=2).data,
+                          body=requests.ConnectionError('connection refused'))
+
+        results = self.wrapper().batch(
+            [self.wrapper.user(id=i) for i in range(5)], concurrency=2)
+
+        self.assertIsInstance(results[2], requests.ConnectionError)
+        self.assertEqual([results[i].id().data for i in (0, 1, 3, 4)],
+                         [0, 1, 3, 4])
+
+    @responses.activate
+    def test_batch_uses_method_and_per_item_kwargs(self):
+        responses.add(responses.POST, self.wrapper.test().data,
+                      body='{}', status=201,
+                      content_type='application/json')
+
+        results = self.wrapper().batch(
+            [(self.wrapper.test(), {'data': {'n': 1}}),
+             (self.wrapper.test(), {'data': {'n': 2}})],
+            method='post', headers={'X-Test': 'batch'})
+
+        self.assertEqual([r().status_code for r in results], [201, 201])
+        bodies = sorted(json.loads(c.request.body)['n'] for c in responses.calls)
+        self.assertEqual(bodies, [1, 2])
+        for call in responses.calls:
+            self.assertEqual(call.request.headers['X-Test'], 'batch')
+
+    @responses.activate
+    def test_batch_accepts_resource_clients(self):
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"key": "value"}', status=200,
+                      content_type='application/json')
+
+        results = self.wrapper().batch([self.wrapper.test])
+
+        self.assertEqual(results[0].key().data, 'value')
+
+
 class TestIteratorFeatures(unittest.TestCase):
 
     def setUp(self):
@@ -492,6 +803,169 @@ class TestIteratorFeatures(unittest.TestCase):
 
         self.assertEqual(iterations_count, 0)
 
+    def _add_numbered_pages(self, page_count):
+        url = self.wrapper.test().data
+        for page in range(page_count):
+            next_url = 'http://api.example.org/page/%d' % (page + 1)
+            if page == page_count - 1:
+                next_url = ''
+            responses.add(responses.GET, url,
+                          body=json.dumps({'data': [{'page': page}, {'page': page}],
+                                           'paging': {'next': next_url}}),
+                          status=200,
+                          content_type='application/json')
+            url = next_url
+
+    @responses.activate
+    def test_prefetched_pages_iterator(self):
+        self._add_numbered_pages(4)
+
+        response = self.wrapper.test().get()
+
+        pages = [item.page().data for item in response().pages(prefetch=2)]
+
+        self.assertEqual(pages, [0, 0, 1, 1, 2, 2, 3, 3])
+
+    @responses.activate
+    def test_prefetched_pages_honour_max_pages(self):
+        self._add_numbered_pages(5)
+
+        response = self.wrapper.test().get()
+
+        pages = [item.page().data
+                 for item in response().pages(max_pages=2, prefetch=3)]
+
+        self.assertEqual(pages, [0, 0, 1, 1])
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_prefetched_pages_honour_max_items(self):
+        self._add_numbered_pages(3)
+
+        response = self.wrapper.test().get()
+
+        pages = [item.page().data
+                 for item in response().pages(max_items=3, prefetch=1)]
+
+        self.assertEqual(pages, [0, 0, 1])
+
+    @responses.activate
+    def test_closing_prefetched_pages_stops_fetching(self):
+        self._add_numbered_pages(10)
+
+        response = self.wrapper.test().get()
+
+        items = response().pages(prefetch=1)
+        next(items)
+        items.close()
+        calls_after_close = len(responses.calls)
+
+        # first page, plus the prefetched page and the one in flight
+        self.assertLessEqual(calls_after_close, 3)
+        self.assertEqual(len(responses.calls), calls_after_close)
+
+    @responses.activate
+    def test_prefetched_pages_propagate_errors(self):
+        next_url = 'http://api.example.org/next_batch'
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body='{"data": [{"key": "value"}], "paging": {"next": "%s"}}' % next_url,
+                      status=200,
+                      content_type='application/json')
+        responses.add(responses.GET, next_url,
+                      body='{"error": "server error test"}',
+                      status=500,
+                      content_type='application/json')
+
+        response = self.wrapper.test().get()
+
+        with self.assertRaises(ServerError):
+            for item in response().pages(prefetch=2):
+                pass
+
+
+class TestParallelIteratorFeatures(unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = PageNumberClient()
+
+    def _add_pages(self, total_pages, failing_page=None):
+        def request_callback(request):
+            page = int(request.params.get('page', 1))
+            if page == failing_page:
+                return (500, {}, '{"error": "server error test"}')
+            # later pages answer faster to shuffle completion order
+            time.sleep(0.01 * (total_pages - page))
+            return (200, {}, json.dumps({
+                'data': [{'page': page}, {'page': page}],
+                'total_pages': total_pages}))
+
+        responses.add_callback(responses.GET, self.wrapper.test().data,
+                               callback=request_callback,
+                               content_type='application/json')
+
+    @responses.activate
+    def test_parallel_pages_are_yielded_in_order(self):
+        self._add_pages(6)
+
+        response = self.wrapper.test().get()
+
+        pages = [item.page().data for item in response().pages(parallel=3)]
+
+        self.assertEqual(pages, [1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6])
+
+    @responses.activate
+    def test_parallel_pages_as_completed(self):
+        self._add_pages(6)
+
+        response = self.wrapper.test().get()
+
+        pages = [item.page().data
+                 for item in response().pages(parallel=3, ordered=False)]
+
+        self.assertEqual(pages[:2], [1, 1])
+        self.assertEqual(sorted(pages), [1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6])
+
+    @responses.activate
+    def test_parallel_pages_honour_max_pages(self):
+        self._add_pages(6)
+
+        response = self.wrapper.test().get()
+
+        pages = [item.page().data
+                 for item in response().pages(parallel=4, max_pages=3)]
+
+        self.assertEqual(pages, [1, 1, 2, 2, 3, 3])
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_parallel_pages_honour_max_items(self):
+        self._add_pages(6)
+
+        response = self.wrapper.test().get()
+
+        pages = [item.page().data
+                 for item in response().pages(parallel=2, max_items=3)]
+
+        self.assertEqual(pages, [1, 1, 2])
+        # first page, the yielded page and at most the pages in flight
+        self.assertLessEqual(len(responses.calls), 4)
+
+    @responses.activate
+    def test_parallel_pages_propagate_errors(self):
+        self._add_pages(4, failing_page=3)
+
+        response = self.wrapper.test().get()
+
+        with self.assertRaises(ServerError):
+            for item in response().pages(parallel=2):
+                pass
+
+    def test_parallel_and_prefetch_are_exclusive(self):
+        client = self.wrapper._wrap_in_tapioca({'data': [], 'total_pages': 1})
+
+        with self.assertRaises(ValueError):
+            next(client().pages(parallel=2, prefetch=2))
+
 
 class TestTokenRefreshing(unittest.TestCase):
 
@@ -590,6 +1064,176 @@ class TestTokenRefreshing(unittest.TestCase):
 
         self.assertEqual(response().refresh_data, 'new_token')
 
+    @responses.activate
+    def test_timings_include_refresh_and_replay(self):
+        responses.add(responses.POST, self.wrapper.test().data, status=401)
+        responses.add(responses.POST, self.wrapper.test().data, status=201)
+
+        timings = self.wrapper.test().post()().timings
+
+        self.assertEqual(list(timings.phases),
+                         ['serialize', 'network', 'decode', 'auth_refresh', 'replay'])
+        self.assertEqual(list(timings.replay.phases),
+                         ['serialize', 'network', 'decode', 'wrap'])
+        self.assertLessEqual(timings.phases['replay'][0],
+                             timings.replay.phases['serialize'][0])
+
+    @responses.activate
+    def test_concurrent_expired_requests_refresh_authentication_once(self):
+        class HeaderTokenRefreshAdapter(TokenRefreshClientAdapter):
+            refresh_count = 0
+
+            def get_request_kwargs(self, api_params, *args, **kwargs):
+                arguments = super(HeaderTokenRefreshAdapter, self).get_request_kwargs(
+                    api_params, *args, **kwargs)
+                arguments['headers'] = {'Authorization': api_params['token']}
+                return arguments
+
+            def refresh_authentication(self, api_params, *args, **kwargs):
+                HeaderTokenRefreshAdapter.refresh_count += 1
+                time.sleep(0.05)
+                return super(HeaderTokenRefreshAdapter, self).refresh_authentication(
+                    api_params, *args, **kwargs)
+
+        wrapper = generate_wrapper_from_adapter(HeaderTokenRefreshAdapter)(
+            token='token', refresh_token_by_default=True)
+        request_count = 8
+        expired_requests = threading.Barrier(request_count)
+
+        def request_callback(request):
+            if request.headers['Authorization'] == 'new_token':
+                return (200, {}, '{}')
+            expired_requests.wait(timeout=5)
+            return (401, {}, '{"error": "Token expired"}')
+
+        responses.add_callback(responses.POST, wrapper.test().data,
+                               callback=request_callback,
+                               content_type='application/json')
+
+        results = wrapper().batch([wrapper.test()] * request_count,
+                                  method='post', concurrency=request_count)
+
+        self.assertEqual([result().status_code for result in results],
+                         [200] * request_count)
+        self.assertEqual([result().refresh_data for result in results],
+                         ['new_token'] * request_count)
+        self.assertEqual(HeaderTokenRefreshAdapter.refresh_count, 1)
+        self.assertEqual(len(responses.calls), 2 * request_count)
+
+    @responses.activate
+    def test_later_expiration_refreshes_authentication_again(self):
+        responses.add(responses.POST, self.wrapper.test().data, status=401, body='{}',
+                      content_type='application/json')
+        responses.add(responses.POST, self.wrapper.test().data, status=201, body='{}',
+                      content_type='application/json')
+        responses.add(responses.POST, self.wrapper.test().data, status=401, body='{}',
+                      content_type='application/json')
+        responses.add(responses.POST, self.wrapper.test().data, status=201, body='{}',
+                      content_type='application/json')
+
+        with mock.patch.object(self.wrapper._api, 'refresh_authentication',
+                               return_value='new_token') as refresh_authentication:
+            self.wrapper.test().post()
+            self.wrapper.test().post()
+
+        self.assertEqual(refresh_authentication.call_count, 2)
+
+
+class ExpiringTokenAdapter(TokenRefreshClientAdapter):
+
+    def get_request_kwargs(self, api_params, *args, **kwargs):
+        arguments = super(ExpiringTokenAdapter, self).get_request_kwargs(
+            api_params, *args, **kwargs)
+        arguments['headers'] = {'Authorization': api_params['token']}
+        return arguments
+
+    def get_authentication_expiration(self, api_params):
+        return api_params['expires_at']
+
+    def refresh_authentication(self, api_params, *args, **kwargs):
+        api_params['expires_at'] = time.time() + 3600
+        return super(ExpiringTokenAdapter, self).refresh_authentication(
+            api_params, *args, **kwargs)
+
+
+ExpiringTokenClient = generate_wrapper_from_adapter(ExpiringTokenAdapter)
+
+
+class TestProactiveTokenRefreshing(unittest.TestCase):
+
+    def setUp(self):
+        responses.add(responses.GET, TesterClient().test().data,
+                      body='{}', status=200, content_type='application/json')
+
+    @responses.activate
+    def test_refreshes_authentication_before_expiration(self):
+        wrapper = ExpiringTokenClient(token='token', expires_at=time.time() + 30,
+                                      refresh_token_by_default=True)
+
+        response = wrapper.test().get()
+
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(responses.calls[0].request.headers['Authorization'], 'new_token')
+        self.assertEqual(response().refresh_data, 'new_token')
+
+    @responses.activate
+    def test_accepts_datetime_expirations(self):
+        expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        wrapper = ExpiringTokenClient(token='token', expires_at=expires_at,
+                                      refresh_token_by_default=True)
+
+        wrapper.test().get()
+
+        self.assertEqual(responses.calls[0].request.headers['Authorization'], 'new_token')
+
+    @responses.activate
+    def test_does_not_refresh_authentication_far_from_expiration(self):
+        wrapper = ExpiringTokenClient(token='token', expires_at=time.time() + 3600,
+                                      refresh_token_by_default=True)
+
+        wrapper.test().get()
+
+        self.assertEqual(responses.calls[0].request.headers['Authorization'], 'token')
+
+    @responses.activate
+    def test_failed_refresh_before_expiration_keeps_current_authentication(self):
+        class FailingRefreshAdapter(ExpiringTokenAdapter):
+            def refresh_authentication(self, api_params, *args, **kwargs):
+                raise ConnectionError('auth server is down')
+
+        wrapper = generate_wrapper_from_adapter(FailingRefreshAdapter)(
+            token='token', expires_at=time.time() + 30,
+            refresh_token_by_default=True)
+
+        response = wrapper.test().get()
+
+        self.assertEqual(response().status_code, 200)
+        self.assertEqual(responses.calls[0].request.headers['Authorization'], 'token')
+
+    @responses.activate
+    def test_failed_refresh_after_expiration_is_raised(self):
+        class FailingRefreshAdapter(ExpiringTokenAdapter):
+            def refresh_authentication(self, api_params, *args, **kwargs):
+                raise ConnectionError('auth server is down')
+
+        wrapper = generate_wrapper_from_adapter(FailingRefreshAdapter)(
+            token='token', expires_at=time.time() - 1,
+            refresh_token_by_default=True)
+
+        with self.assertRaises(ConnectionError):
+            wrapper.test().get()
+        self.assertEqual(len(responses.calls), 0)
+
+    @responses.activate
+    def test_does_not_refresh_authentication_when_disabled(self):
+        wrapper = ExpiringTokenClient(token='token', expires_at=time.time())
+
+        wrapper.test().get()
+        wrapper.test().get(refresh_token=False)
+
+        self.assertEqual([call.request.headers['Authorization'] for call in responses.calls],
+                         ['token', 'token'])
+
 
 class TestXMLRequests(unittest.TestCase):
 
@@ -678,3 +1322,23 @@ class TestXMLRequests(unittest.TestCase):
         response = self.wrapper.test().post(data=data)
 
         self.assertEqual(response().data, xmltodict.parse(xml_body))
+
+    def test_adapter_is_shared_between_derived_clients(self):
+        self.assertIs(self.wrapper.test()._api, self.wrapper._api)
+
+    @responses.activate
+    def test_parse_params_are_kept_per_thread(self):
+        xml_body = '<catalog><book>text1</book></catalog>'
+        responses.add(responses.GET, self.wrapper.test().data,
+                      body=xml_body, status=200,
+                      content_type='application/xml')
+
+        thread = threading.Thread(
+            target=self.wrapper._api.get_request_kwargs,
+            args=({}, 'GET'), kwargs={'xmltodict_parse__force_list': ('book',)})
+        thread.start()
+        thread.join()
+
+        response = self.wrapper.test().get()
+
+        self.assertEqual(response().data, xmltodict.parse(xml_body))
@@ -0,0 +1,320 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+from requests.auth import HTTPBasicAuth, HTTPDigestAuth, HTTPProxyAuth
+
+from tapioca.adapters import (
+    generate_async_wrapper_from_adapter, generate_wrapper_from_adapter)
+from tapioca.exceptions import ClientError
+from tapioca.sessions import shared_sessions
+from tapioca.transports import (
+    HTTP2AsyncTransport, HTTP2Transport, HTTPXResponse, HTTPXTransport,
+    InMemoryAsyncTransport, InMemoryTransport, RequestsTransport,
+    TransportResponse)
+
+from tests.client import TesterClientAdapter, TesterClient
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class InMemoryAdapter(TesterClientAdapter):
+    transport_class = InMemoryTransport
+    async_transport_class = InMemoryAsyncTransport
+
+
+AsyncTesterClient = generate_async_wrapper_from_adapter(TesterClientAdapter)
+InMemoryClient = generate_wrapper_from_adapter(InMemoryAdapter)
+AsyncInMemoryClient = generate_async_wrapper_from_adapter(InMemoryAdapter)
+
+
+class TestTransportResponse(unittest.TestCase):
+
+    def test_exposes_the_requests_api(self):
+        response = TransportResponse(200, {'Content-Type': 'application/json'},
+                                     '{"é": 1}'.encode('utf-8'))
+
+        self.assertEqual(response.headers['content-type'], 'application/json')
+        self.assertEqual(response.text, '{"é": 1}')
+        self.assertEqual(response.json(), {'é': 1})
+        self.assertEqual(b''.join(response.iter_content(chunk_size=3)),
+                         response.content)
+        self.assertEqual(len(list(response.iter_content(chunk_size=3))), 3)
+        self.assertEqual(list(response.iter_content(chunk_size=None)),
+                         [response.content])
+
+
+class TestInMemoryTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = InMemoryTransport()
+        self.wrapper = TesterClient(session=self.transport)
+
+    def test_answers_registered_requests(self):
+        self.transport.add('POST', self.wrapper.test().data, '{"data": 1}',
+                           status_code=201, headers={'X-Id': '7'})
+
+        response = self.wrapper.test().post(data={'key': 'value'})
+
+        self.assertEqual(response().status_code, 201)
+        self.assertEqual(response().response.headers['x-id'], '7')
+        self.assertEqual(response.data().data, 1)
+        method, url, kwargs = self.transport.calls[0]
+        self.assertEqual((method, url), ('POST', self.wrapper.test().data))
+        self.assertEqual(json.loads(kwargs['data']), {'key': 'value'})
+
+    def test_answers_in_order_then_repeats_the_last_response(self):
+        url = self.wrapper.test().data
+        self.transport.add('GET', url, '{}', status_code=404)
+        self.transport.add('GET', url, '{"a": 1}')
+
+        with self.assertRaises(ClientError):
+            self.wrapper.test().get()
+        self.assertEqual(self.wrapper.test().get().a().data, 1)
+        self.assertEqual(self.wrapper.test().get().a().data, 1)
+
+    def test_unknown_requests_raise_connection_errors(self):
+        with self.assertRaises(requests.ConnectionError):
+            self.wrapper.test().get()
+
+    def test_streamed_responses(self):
+        self.transport.add('GET', self.wrapper.test().data,
+                           json.dumps({'data': [{'id': i} for i in range(5)]}))
+
+        response = self.wrapper.test().get(stream=True)
+
+        self.assertEqual([item.id().data for item in response()], list(range(5)))
+
+
+class TestAsyncInMemoryTransport(unittest.IsolatedAsyncioTestCase):
+
+    async def test_answers_registered_requests(self):
+        wrapper = AsyncInMemoryClient()
+        wrapper._session.add('GET', wrapper.test().data, '{"a": 1}')
+
+        response = await wrapper.test().get()
+
+        self.assertIsInstance(wrapper._session, InMemoryAsyncTransport)
+        self.assertEqual(response.a().data, 1)
+
+
+class TestTransportSelection(unittest.TestCase):
+
+    def test_adapter_transport_class(self):
+        wrapper = InMemoryClient()
+
+        self.assertIsInstance(wrapper._session, InMemoryTransport)
+        self.assertIs(wrapper.test()._session, wrapper._session)
+
+    def test_transport_class_receives_pool_options(self):
+        with self.assertRaises(ValueError):
+            InMemoryClient(pool_maxsize=10)
+
+        class RequestsTransportAdapter(TesterClientAdapter):
+            transport_class = RequestsTransport
+
+        wrapper = generate_wrapper_from_adapter(RequestsTransportAdapter)(
+            pool_maxsize=32)
+
+        http_adapter = wrapper._session.session.get_adapter('https://api.example.org')
+        self.assertEqual(http_adapter._pool_maxsize, 32)
+
+    def test_shared_transports(self):
+        self.addCleanup(shared_sessions.clear)
+
+        wrapper = InMemoryClient(share_session=True)
+
+        self.assertIsInstance(wrapper._session, InMemoryTransport)
+        self.assertIs(InMemoryClient(share_session=True)._session, wrapper._session)
+        self.assertIsNot(TesterClient(share_session=True)._session, wrapper._session)
+
+    def test_requests_session_is_used_as_is(self):
+        session = requests.Session()
+
+        self.assertIs(InMemoryClient(session=session)._session, session)
+
+
+class TestRequestsTransport(unittest.TestCase):
+
+    def test_sends_through_the_session(self):
+        session = requests.Session()
+        transport = RequestsTransport(session)
+        wrapper = TesterClient(session=transport)
+
+        self.assertIs(wrapper._session, transport)
+        self.assertIs(transport.session, session)
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class TestHTTPXTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.sent = []
+
+        def handler(request):
+            self.sent.append(request)
+            return httpx.Response(200, json={'data': [{'key': 'value'}]})
+
+        self.client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    def test_httpx_clients_are_wrapped(self):
+        wrapper = TesterClient(session=self.client)
+
+        response = wrapper.test().post(data={'key': 'value'}, params={'q': '1'})
+
+        self.assertIsInstance(wrapper._session, HTTPXTransport)
+        self.assertIsInstance(response().response, HTTPXResponse)
+        self.assertEqual(response.data[0].key().data, 'value')
+        self.assertEqual(json.loads(self.sent[0].content), {'key': 'value'})
+        self.assertEqual(self.sent[0].url.params['q'], '1')
+
+    def test_streamed_responses(self):
+        wrapper = TesterClient(session=HTTPXTransport(self.client))
+
+        response = wrapper.test().get(stream=True)
+
+        self.assertEqual([item.key().data for item in response()], ['value'])
+
+    def test_requests_kwargs_are_translated(self):
+        wrapper = TesterClient(session=self.client)
+
+        wrapper.test().get(auth=HTTPBasicAuth('user', 'secret'), timeout=(1, 5),
+                           allow_redirects=False, verify=True, proxies={})
+        wrapper.test().get(auth=HTTPDigestAuth('user', 'secret'), stream=True,
+                           allow_redirects=False)
+
+        self.assertEqual(self.sent[0].headers['Authorization'],
+                         'Basic dXNlcjpzZWNyZXQ=')
+        self.assertEqual(self.sent[0].extensions['timeout'],
+                         {'connect': 1, 'read': 5, 'write': None, 'pool': None})
+        self.assertNotIn('Authorization', self.sent[1].headers)
+
+    def test_client_options_are_rejected_per_request(self):
+        wrapper = TesterClient(session=self.client)
+
+        for kwargs in [{'verify': False}, {'cert': '/client.pem'},
+                       {'proxies': {'https': 'http://proxy'}},
+                       {'auth': HTTPProxyAuth('user', 'secret')},
+                       {'hooks': {'response': []}}]:
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    wrapper.test().get(**kwargs)
+        self.assertEqual(self.sent, [])
+
+    def test_pool_options_configure_limits(self):
+        with mock.patch('httpx.Client') as client:
+            HTTPXTransport.from_pool_options(pool_connections=2, pool_maxsize=5)
+
+        self.assertEqual(client.call_args[1]['limits'].max_connections, 10)
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class TestHTTP2Transport(unittest.TestCase):
+
+    def setUp(self):
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.lock = threading.Lock()
+
+        def handler(request):
+            host = request.url.host
+            with self.lock:
+                self.in_flight[host] = self.in_flight.get(host, 0) + 1
+                self.max_in_flight[host] = max(self.max_in_flight.get(host, 0),
+                                               self.in_flight[host])
+            time.sleep(0.02)
+            with self.lock:
+                self.in_flight[host] -= 1
+            return httpx.Response(200, json={'data': [{'key': 'value'}]})
+
+        self.client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    def test_limits_concurrent_streams_per_origin(self):
+        transport = HTTP2Transport(self.client, max_concurrent_streams=2)
+        wrapper = TesterClient(session=transport)
+
+        results = wrapper.test().batch([wrapper.test() for _ in range(6)],
+                                       concurrency=6)
+
+        self.assertEqual([result().status_code for result in results], [200] * 6)
+        self.assertEqual(self.max_in_flight, {'api.example.org': 2})
+
+    def test_origins_have_their_own_streams(self):
+        transport = HTTP2Transport(self.client, max_concurrent_streams=1)
+        wrapper = TesterClient(session=transport)
+
+        wrapper.test().batch([wrapper.test(), wrapper.another_root()] * 2,
+                             concurrency=4)
+
+        self.assertEqual(self.max_in_flight,
+                         {'api.example.org': 1, 'api.another.com': 1})
+
+    def test_streamed_responses_hold_their_stream_until_closed(self):
+        transport = HTTP2Transport(self.client, max_concurrent_streams=1)
+        wrapper = TesterClient(session=transport)
+
+        response = wrapper.test().get(stream=True)
+        streams = transport._get_streams(wrapper.test().data)
+        self.assertFalse(streams.acquire(blocking=False))
+
+        list(response())
+        self.assertTrue(streams.acquire(blocking=False))
+
+    def test_builds_http2_clients(self):
+        with mock.patch('httpx.Client') as client:
+            transport = HTTP2Transport.from_pool_options(pool_maxsize=5)
+
+        self.assertTrue(client.call_args[1]['http2'])
+        self.assertEqual(transport.max_concurrent_streams, 100)
+        with self.assertRaises(ValueError):
+            HTTP2Transport(self.client, max_concurrent_streams=0)
+
+    def test_transport_classes_can_be_shared_as_sessions(self):
+        self.addCleanup(shared_sessions.clear)
+
+        class FewStreamsTransport(HTTP2Transport):
+            max_concurrent_streams = 10
+
+        with mock.patch('httpx.Client'):
+            wrapper = TesterClient(session=FewStreamsTransport, share_session=True)
+            other_wrapper = TesterClient(session=FewStreamsTransport,
+                                         share_session=True)
+
+        self.assertIsInstance(wrapper._session, FewStreamsTransport)
+        self.assertIs(other_wrapper._session, wrapper._session)
+        self.assertEqual(wrapper._session.max_concurrent_streams, 10)
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class TestHTTP2AsyncTransport(unittest.IsolatedAsyncioTestCase):
+
+    async def test_limits_concurrent_streams_per_origin(self):
+        in_flight = []
+        max_in_flight = []
+
+        async def handler(request):
+            in_flight.append(request)
+            max_in_flight.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(request)
+            return httpx.Response(200, json={'key': 'value'})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        wrapper = AsyncTesterClient(
+            session=HTTP2AsyncTransport(client, max_concurrent_streams=3))
+
+        responses = await asyncio.gather(*[wrapper.test().get() for _ in range(9)])
+
+        self.assertEqual([r.key().data for r in responses], ['value'] * 9)
+        self.assertEqual(max(max_in_flight), 3)
@@ -0,0 +1,58 @@
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import unittest
+
+from tapioca.urls import MissingURLParamsError, URLTemplate, compile_url_template
+
+
+class TestURLTemplate(unittest.TestCase):
+
+    def test_fill(self):
+        template = URLTemplate('https://api.example.org/{user_id}/items/{id}/')
+
+        self.assertEqual(template.fields, ('user_id', 'id'))
+        self.assertEqual(template.fill({'user_id': 'abc', 'id': 1, 'other': 2}),
+                         'https://api.example.org/abc/items/1/')
+
+    def test_fill_matches_str_format(self):
+        templates = [
+            'https://api.example.org/items/',
+            'https://api.example.org/{id}',
+            '{id}/{{literal}}/{id}/',
+            'https://api.example.org/{id:05d}/{name!r}/',
+            'https://api.example.org/{item.real}/{ids[1]}/',
+        ]
+        params = {'id': 12, 'name': 'a b', 'item': 3, 'ids': [4, 5]}
+
+        for template in templates:
+            with self.subTest(template=template):
+                self.assertEqual(URLTemplate(template).fill(params),
+                                 template.format(**params))
+
+    def test_missing_params(self):
+        template = URLTemplate('https://api.example.org/{user_id}/{id}/{id:d}/')
+
+        with self.assertRaises(MissingURLParamsError) as context:
+            template.fill({'other': 1})
+
+        self.assertEqual(str(context.exception), 'Missing URL params: id, user_id')
+        self.assertEqual(context.exception.missing, ('id', 'user_id'))
+        self.assertIsInstance(context.exception, KeyError)
+        self.assertIsInstance(context.exception, ValueError)
+
+    def test_missing_params_of_simple_templates_raise_key_errors(self):
+        with self.assertRaises(KeyError):
+            URLTemplate('https://api.example.org/{id}/').fill({})
+
+    def test_quote_params(self):
+        params = {'name': 'a b/c', 'id': 1}
+
+        self.assertEqual(URLTemplate('/{name}/{id}/').fill(params, quote_params=True),
+                         '/a%20b%2Fc/1/')
+        self.assertEqual(URLTemplate('/{name!s}/{id:02d}/').fill(params, quote_params=True),
+                         '/a%20b%2Fc/01/')
+
+    def test_templates_are_compiled_once(self):
+        self.assertIs(compile_url_template('/{id}/'), compile_url_template('/{id}/'))